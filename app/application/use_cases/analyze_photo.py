@@ -0,0 +1,153 @@
+import time
+from mmap import mmap
+from typing import Dict, List
+
+from app.domain.interfaces.image_decoder_service import ImageDecoderService
+from app.domain.interfaces.perceptual_hash_service import PerceptualHashService
+from app.domain.interfaces.photo_recogniction_service import PhotoRecognictionService
+from app.domain.models.photo_analysis import PhotoAnalysis
+
+
+class AnalyzePhoto:
+    """
+    Etapas de CPU de una foto. No usa repositorios, así que puede ejecutarse
+    en un proceso aparte y devolver el resultado al proceso principal.
+    """
+
+    def __init__(self,
+        image_decoder_service: ImageDecoderService,
+        perceptual_hash_service: PerceptualHashService,
+        photo_recogniction_service: PhotoRecognictionService,
+        preview_size: int = 224,
+        face_batch_size: int = 0,
+        thumbnail_sizes: Dict[int, int] | None = None):
+        self.image_decoder_service = image_decoder_service
+        self.perceptual_hash_service = perceptual_hash_service
+        self.photo_recogniction_service = photo_recogniction_service
+        # CLIP reescala el lado corto a 224 px, no necesita la imagen completa
+        self.preview_size = preview_size
+        # Con detección de caras por lotes se decodifican tantas fotos a la vez
+        self.face_batch_size = face_batch_size
+        # Miniaturas que se generan al importar (lado largo -> calidad WebP)
+        self.thumbnail_sizes = thumbnail_sizes or {}
+
+    def execute(self, file_content: bytes | mmap, hash: str | None = None) -> tuple[bool, PhotoAnalysis | None, str]:
+        return self.execute_many([file_content], [hash])[0]
+
+    def execute_many(self,
+        files_content: List[bytes | mmap],
+        hashes: List[str | None] | None = None) -> List[tuple[bool, PhotoAnalysis | None, str]]:
+        """
+        Analiza varias fotos; las caras se detectan por lotes de `face_batch_size`.
+        Con el SHA-256 de cada archivo (`hashes`) las caras y el embedding de la
+        foto se pueden recuperar de la caché de embeddings.
+        """
+        hashes = hashes or [None] * len(files_content)
+        chunk_size = max(1, self.face_batch_size)
+        results = []
+        for start in range(0, len(files_content), chunk_size):
+            end = start + chunk_size
+            results.extend(self._execute_chunk(files_content[start:end], hashes[start:end]))
+        return results
+
+    def _execute_chunk(self,
+        files_content: List[bytes | mmap],
+        hashes: List[str | None]) -> List[tuple[bool, PhotoAnalysis | None, str]]:
+        results: List[tuple[bool, PhotoAnalysis | None, str] | None] = [None] * len(files_content)
+        decoded = []
+        for position, (file_content, hash) in enumerate(zip(files_content, hashes)):
+            try:
+                timings: Dict[str, float] = {}
+                # Se decodifica una sola vez y la imagen se comparte entre todas las etapas
+                start = time.perf_counter()
+                result, image, error = self.image_decoder_service.decode(file_content)
+                timings["decode"] = time.perf_counter() - start
+                if not result:
+                    results[position] = (False, None, error)
+                    continue
+                image.content_hash = hash
+
+                start = time.perf_counter()
+                phash = self.perceptual_hash_service.calculate_hash(image)
+                timings["phash"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                result, webp_file, error = self.photo_recogniction_service.to_webp(image)
+                timings["webp"] = time.perf_counter() - start
+                if not result:
+                    results[position] = (False, None, f"Error al convertir a WebP: {error}")
+                    continue
+                start = time.perf_counter()
+                thumbnails = self.photo_recogniction_service.render_thumbnails(image, self.thumbnail_sizes)
+                timings["thumbnails"] = time.perf_counter() - start
+                decoded.append((position, image, phash, webp_file, thumbnails, timings))
+            except Exception as e:
+                results[position] = (False, None, f"Error al analizar la foto: {e}")
+
+        try:
+            start = time.perf_counter()
+            faces_by_image = self.photo_recogniction_service.recognize_faces_many([image for _, image, _, _, _, _ in decoded])
+            # Con detección por lotes el tiempo se reparte entre las fotos del lote
+            faces_time = (time.perf_counter() - start) / max(1, len(decoded))
+        except Exception as e:
+            for position, _, _, _, _, _ in decoded:
+                results[position] = (False, None, f"Error al analizar la foto: {e}")
+            return results
+
+        for (position, image, phash, webp_file, thumbnails, timings), faces in zip(decoded, faces_by_image):
+            try:
+                timings["faces"] = faces_time
+                results[position] = (True, PhotoAnalysis(
+                    extension=image.extension,
+                    mime_type=image.mime_type,
+                    phash=phash,
+                    webp=webp_file.getvalue(),
+                    preview=image.resized(self.preview_size),
+                    faces=faces,
+                    thumbnails=thumbnails,
+                    timings=timings), "")
+            except Exception as e:
+                results[position] = (False, None, f"Error al analizar la foto: {e}")
+        return results
+
+    def render_thumbnail(self, file_content: bytes, size: int, quality: int) -> tuple[bool, bytes | None, str]:
+        """Miniatura de `size` px a partir del original, para las que no se generan al importar."""
+        result, image, error = self.image_decoder_service.decode(file_content)
+        if not result:
+            return False, None, error
+        return True, self.photo_recogniction_service.render_thumbnails(image, {size: quality})[size], ""
+
+
+_analyze_photo: AnalyzePhoto | None = None
+
+
+def init_analysis_worker():
+    """Prepara los servicios de CPU en un proceso del pool."""
+    global _analyze_photo
+    from app.config.container import get_container, preload_analysis_libraries
+
+    container = get_container()
+    _analyze_photo = container.analyze_photo()
+    preload_analysis_libraries()
+
+
+def analyze_in_worker(file_content: bytes, hash: str | None = None) -> tuple[bool, PhotoAnalysis | None, str]:
+    if _analyze_photo is None:
+        init_analysis_worker()
+    return _analyze_photo.execute(file_content, hash)
+
+
+def analyze_path_in_worker(file_path: str, hash: str | None = None) -> tuple[bool, PhotoAnalysis | None, str]:
+    """Como `analyze_in_worker`, pero el proceso lee el archivo del disco en vez de recibir los bytes serializados."""
+    from app.infrastructure.services.mapped_file import map_file
+
+    if _analyze_photo is None:
+        init_analysis_worker()
+    with map_file(file_path) as file_content:
+        return _analyze_photo.execute(file_content, hash)
+
+
+def render_thumbnail_in_worker(file_content: bytes, size: int, quality: int) -> tuple[bool, bytes | None, str]:
+    if _analyze_photo is None:
+        init_analysis_worker()
+    return _analyze_photo.render_thumbnail(file_content, size, quality)
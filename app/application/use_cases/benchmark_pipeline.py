@@ -0,0 +1,291 @@
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+from PIL import Image
+
+from app.config.container import Container
+from app.config.settings import Settings
+from app.domain.models.photo import Photo
+
+try:
+    import resource
+except ImportError:  # Windows: sin medida de memoria
+    resource = None
+
+
+@dataclass(frozen=True)
+class CorpusImage:
+    label: str
+    content: bytes
+
+
+@dataclass
+class StageBenchmark:
+    stage: str
+    samples: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    # Operaciones por segundo con un solo hilo
+    throughput: float
+
+
+@dataclass
+class PipelineBenchmarkReport:
+    images: int
+    peak_rss_mb: float
+    stages: List[StageBenchmark] = field(default_factory=list)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PipelineBenchmarkReport":
+        return cls(
+            images=data["images"],
+            peak_rss_mb=data["peak_rss_mb"],
+            stages=[StageBenchmark(**stage) for stage in data["stages"]])
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "PipelineBenchmarkReport":
+        with open(path, encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+
+@dataclass
+class StageComparison:
+    stage: str
+    baseline_p50_ms: float
+    p50_ms: float
+    change: float
+    regression: bool
+
+
+def generate_corpus(count: int, resolutions: List[int], formats: List[str], seed: int = 0) -> List[CorpusImage]:
+    """
+    Genera `count` imágenes por resolución (lado largo, 4:3) y formato. Son
+    manchas suaves con grano para que los códecs trabajen como con una foto;
+    cada imagen es distinta, así que ninguna se detecta como duplicada.
+    """
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for resolution in resolutions:
+        width, height = resolution, max(1, resolution * 3 // 4)
+        for number in range(count):
+            blobs = rng.integers(0, 256, (height // 64 + 2, width // 64 + 2, 3), dtype=np.uint8)
+            base = np.asarray(Image.fromarray(blobs).resize((width, height), Image.Resampling.BICUBIC), dtype=np.int16)
+            grain = rng.integers(-12, 13, (height, width, 1), dtype=np.int16)
+            image = Image.fromarray(np.clip(base + grain, 0, 255).astype(np.uint8))
+            for image_format in formats:
+                content = _encode(image, image_format)
+                if content is not None:
+                    corpus.append(CorpusImage(label=f"{image_format}-{resolution}-{number}", content=content))
+    return corpus
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes | None:
+    buffer = io.BytesIO()
+    if image_format == "heic":
+        import pillow_heif
+
+        try:
+            pillow_heif.from_pillow(image).save(buffer, quality=85)
+        except Exception as e:
+            # libheif sin codificador HEVC: el formato se omite
+            print(f"No se pueden generar imágenes HEIC: {e}")
+            return None
+    elif image_format == "png":
+        image.save(buffer, format="PNG")
+    else:
+        image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def benchmark_container(work_dir: str) -> Container:
+    """
+    Contenedor aislado para medir sin servicios externos: SQLite y base
+    vectorial embebida dentro de `work_dir` y storage en memoria.
+    """
+    from dependency_injector import providers
+
+    from app.infrastructure.repositories.storage_repository_memory import StorageRepositoryMemory
+
+    settings = Settings(
+        db_url=f"sqlite:///{os.path.join(work_dir, 'benchmark.db')}",
+        vector_backend="local",
+        vector_data_dir=os.path.join(work_dir, "vectors"),
+        face_identity_mode="immediate",
+        # El corpus se genera con la misma semilla: con caché se mediría la lectura del disco, no los modelos
+        embedding_cache_dir="")
+    container = Container()
+    container.config.override(providers.Object(settings))
+    container.storage_repository.override(providers.Singleton(StorageRepositoryMemory))
+    return container
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux da KB y macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class BenchmarkPipeline:
+    """
+    Mide cada etapa del pipeline por separado (hash, detección de formato,
+    decodificación, hash perceptual, WebP, miniaturas, CLIP, caras, storage,
+    vectores y base de datos) y `ProcessPhoto.execute` completo, sobre un
+    corpus generado.
+
+    Las etapas aisladas se repiten `repeat` veces por imagen; el pipeline
+    completo procesa cada imagen una sola vez, porque la segunda sería un
+    duplicado.
+    """
+
+    def __init__(self, container: Container, repeat: int = 3):
+        self.container = container
+        self.repeat = max(1, repeat)
+
+    @staticmethod
+    def _measure(action: Callable[[], object]) -> float:
+        start = time.perf_counter()
+        action()
+        return (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def _summary(stage: str, latencies: List[float]) -> StageBenchmark:
+        values = np.asarray(latencies)
+        return StageBenchmark(
+            stage=stage,
+            samples=len(values),
+            p50_ms=float(np.percentile(values, 50)),
+            p95_ms=float(np.percentile(values, 95)),
+            p99_ms=float(np.percentile(values, 99)),
+            mean_ms=float(values.mean()),
+            throughput=float(len(values) / (values.sum() / 1000)) if values.sum() > 0 else 0.0)
+
+    def execute(self, corpus: List[CorpusImage]) -> PipelineBenchmarkReport:
+        from app.application.use_cases.call_process_photo import CallProcessPhoto
+        from app.infrastructure.repositories.photo_repository_orm import PhotoRepositoryORM
+
+        container = self.container
+        settings = container.config()
+        hashing_service = container.hashing_service()
+        extension_service = container.extension_service()
+        image_decoder_service = container.image_decoder_service()
+        perceptual_hash_service = container.perceptual_hash_service()
+        photo_recogniction_service = container.photo_recogniction_service()
+        embedding_service = container.embedding_service()
+        storage_repository = container.storage_repository()
+        photo_vector_repository = container.photo_vector_repository()
+        thumbnail_sizes = container.eager_thumbnail_sizes()
+        analyze_photo = container.analyze_photo()
+
+        # Carga de modelos fuera de las medidas
+        result, image, error = image_decoder_service.decode(corpus[0].content)
+        if not result:
+            raise Exception(error)
+        embedding_service.get_image_embedding(image.resized(analyze_photo.preview_size))
+        photo_recogniction_service.recognize_faces(image)
+
+        latencies: Dict[str, List[float]] = {}
+
+        def measure(stage: str, action: Callable[[], object]):
+            latencies.setdefault(stage, []).append(self._measure(action))
+
+        session = container.session_factory()()
+        try:
+            photo_repository = PhotoRepositoryORM(session)
+            for _ in range(self.repeat):
+                for item in corpus:
+                    content = item.content
+                    measure("hash", lambda: hashing_service.calculate_file_hash(content))
+                    measure("sniff", lambda: (
+                        extension_service.get_file_extension_from_bytes(content),
+                        extension_service.get_mime_type_from_bytes(content)))
+                    result, image, error = image_decoder_service.decode(content)
+                    if not result:
+                        raise Exception(f"{item.label}: {error}")
+                    measure("decode", lambda: image_decoder_service.decode(content))
+                    measure("phash", lambda: perceptual_hash_service.calculate_hash(image))
+                    measure("webp", lambda: photo_recogniction_service.to_webp(image))
+                    if thumbnail_sizes:
+                        measure("thumbnails", lambda: photo_recogniction_service.render_thumbnails(image, thumbnail_sizes))
+                    preview = image.resized(analyze_photo.preview_size)
+                    measure("clip", lambda: embedding_service.get_image_embedding(preview))
+                    measure("faces", lambda: photo_recogniction_service.recognize_faces(image))
+                    measure("storage", lambda: storage_repository.upload_file(content, image.extension, image.mime_type))
+
+                    embedding = np.random.default_rng().normal(size=settings.vector_size_photo).tolist()
+                    measure("vectors", lambda: (
+                        photo_vector_repository.search_many([embedding]),
+                        photo_vector_repository.add_vectors([embedding], [str(uuid.uuid4())])))
+                    hash = uuid.uuid4().hex * 2
+                    measure("db", lambda: (
+                        photo_repository.create_photo(Photo(id="", path="", path_web="", hash=hash)),
+                        photo_repository.get_by_hash(hash)))
+        finally:
+            session.close()
+
+        # Pipeline completo: una vez por imagen, cada una en su propia sesión como en /upload
+        call_process_photo = CallProcessPhoto(container)
+        for item in corpus:
+            session = container.session_factory()()
+            try:
+                process_photo = call_process_photo._build_process_photo(session)
+                outcome = {}
+                measure("pipeline", lambda: outcome.update(result=process_photo.execute(item.content)))
+                result, _, error = outcome["result"]
+                if not result:
+                    raise Exception(f"{item.label}: {error}")
+            finally:
+                session.close()
+
+        return PipelineBenchmarkReport(
+            images=len(corpus),
+            peak_rss_mb=_peak_rss_mb(),
+            stages=[self._summary(stage, values) for stage, values in latencies.items()])
+
+
+def compare_with_baseline(report: PipelineBenchmarkReport, baseline: PipelineBenchmarkReport, tolerance: float = 0.2) -> List[StageComparison]:
+    """Una etapa es una regresión si su p50 supera al de la referencia en más de `tolerance`."""
+    baseline_stages = {stage.stage: stage for stage in baseline.stages}
+    comparisons = []
+    for stage in report.stages:
+        reference = baseline_stages.get(stage.stage)
+        if reference is None or reference.p50_ms <= 0:
+            continue
+        change = stage.p50_ms / reference.p50_ms - 1
+        comparisons.append(StageComparison(
+            stage=stage.stage,
+            baseline_p50_ms=reference.p50_ms,
+            p50_ms=stage.p50_ms,
+            change=change,
+            regression=change > tolerance))
+    return comparisons
+
+
+def iter_pipeline_benchmark_lines(report: PipelineBenchmarkReport, comparisons: List[StageComparison] | None = None) -> Iterable[str]:
+    changes = {comparison.stage: comparison for comparison in comparisons or []}
+    yield f"Imágenes: {report.images}  Memoria máxima: {report.peak_rss_mb:.0f} MB"
+    yield f"{'etapa':<12}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'op/s':>10}  referencia"
+    for stage in report.stages:
+        line = (f"{stage.stage:<12}{stage.samples:>6}{stage.p50_ms:>10.2f}{stage.p95_ms:>10.2f}"
+                f"{stage.p99_ms:>10.2f}{stage.throughput:>10.1f}")
+        comparison = changes.get(stage.stage)
+        if comparison is not None:
+            line += f"  {comparison.change:+.0%}" + ("  ⚠️ regresión" if comparison.regression else "")
+        yield line
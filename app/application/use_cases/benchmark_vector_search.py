@@ -0,0 +1,75 @@
+import time
+from dataclasses import dataclass
+from typing import Iterable, List
+
+import numpy as np
+
+from app.infrastructure.repositories.vector_db_qdrant import VectorDBQdrant
+
+
+@dataclass
+class VectorSearchBenchmarkRow:
+    hnsw_ef: int | None
+    rescore: bool | None
+    recall: float
+    p50_ms: float
+    p95_ms: float
+
+
+class BenchmarkVectorSearch:
+    """
+    Mide recall@k frente a latencia de una colección de Qdrant.
+
+    Usa como consultas vectores de la propia colección y como referencia la
+    búsqueda exacta (sin HNSW ni cuantización). Cada configuración de
+    `hnsw_ef` y de `rescore` se mide consulta a consulta, como en el pipeline.
+    """
+
+    def __init__(self, vector_repository: VectorDBQdrant):
+        self.vector_repository = vector_repository
+
+    def _search(self, queries: List[List[float]], top_k: int, **params) -> tuple[List[List[str]], List[float]]:
+        results, latencies = [], []
+        for query in queries:
+            start = time.perf_counter()
+            result, ids, error = self.vector_repository.search_many([query], top_k=top_k, **params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not result:
+                raise Exception(error)
+            results.append(ids[0])
+        return results, latencies
+
+    def execute(self,
+        queries: int = 100,
+        top_k: int = 10,
+        ef_values: List[int] | None = None) -> List[VectorSearchBenchmarkRow]:
+        vectors = self.vector_repository.sample_vectors(queries)
+        if not vectors:
+            return []
+        expected, _ = self._search(vectors, top_k, exact=True)
+
+        quantized = self.vector_repository.collection_config.quantization != "none"
+        rows = []
+        for hnsw_ef in ef_values or [None]:
+            for rescore in ([True, False] if quantized else [None]):
+                found, latencies = self._search(vectors, top_k, hnsw_ef=hnsw_ef, rescore=rescore)
+                recall = np.mean([
+                    len(set(ids) & set(reference)) / max(1, len(reference))
+                    for ids, reference in zip(found, expected)
+                ])
+                rows.append(VectorSearchBenchmarkRow(
+                    hnsw_ef=hnsw_ef,
+                    rescore=rescore,
+                    recall=float(recall),
+                    p50_ms=float(np.percentile(latencies, 50)),
+                    p95_ms=float(np.percentile(latencies, 95)),
+                ))
+        return rows
+
+
+def iter_benchmark_lines(rows: List[VectorSearchBenchmarkRow], top_k: int) -> Iterable[str]:
+    yield f"{'hnsw_ef':>8} {'rescore':>8} {f'recall@{top_k}':>10} {'p50 ms':>8} {'p95 ms':>8}"
+    for row in rows:
+        hnsw_ef = "default" if row.hnsw_ef is None else str(row.hnsw_ef)
+        rescore = "-" if row.rescore is None else ("sí" if row.rescore else "no")
+        yield f"{hnsw_ef:>8} {rescore:>8} {row.recall:>10.3f} {row.p50_ms:>8.2f} {row.p95_ms:>8.2f}"
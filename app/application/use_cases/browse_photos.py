@@ -0,0 +1,51 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from app.domain.models.photo import Photo
+from app.domain.repositories.photo_repository import PhotoRepository
+
+
+@dataclass(frozen=True)
+class PhotoPage:
+    photos: List[Photo] = field(default_factory=list)
+    # Id de la última foto de la página; None si no hay más
+    next_cursor: str | None = None
+
+    def to_dict(self):
+        return {
+            'photos': [photo.to_dict() for photo in self.photos],
+            'next_cursor': self.next_cursor,
+        }
+
+
+class BrowsePhotos:
+    """
+    Consultas de solo lectura de la galería. Las listas se paginan por clave
+    (el cursor es el id de la última foto devuelta), así que pedir la página
+    N cuesta lo mismo que pedir la primera.
+    """
+    MAX_LIMIT = 500
+
+    def __init__(self, photo_repository: PhotoRepository):
+        self.photo_repository = photo_repository
+
+    def _page(self, photos: List[Photo], limit: int) -> PhotoPage:
+        next_cursor = photos[-1].id if len(photos) == limit else None
+        return PhotoPage(photos=photos, next_cursor=next_cursor)
+
+    def list_photos(self, cursor: str | None = None, limit: int = 50) -> PhotoPage:
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        return self._page(self.photo_repository.list_photos(after_id=cursor, limit=limit), limit)
+
+    def list_people_photos(self, people_id: str, cursor: str | None = None, limit: int = 50) -> PhotoPage:
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        return self._page(self.photo_repository.list_people_photos(people_id, after_id=cursor, limit=limit), limit)
+
+    def get_photo(self, photo_id: str) -> Photo | None:
+        return self.photo_repository.get_photo(photo_id)
+
+    def get_duplicates(self, photo_id: str) -> List[Photo] | None:
+        """None si la foto no existe."""
+        if self.photo_repository.get_photo(photo_id) is None:
+            return None
+        return self.photo_repository.get_duplicates(photo_id)
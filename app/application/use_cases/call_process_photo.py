@@ -1,8 +1,13 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+import time
+from concurrent.futures import Executor
+from contextlib import ExitStack
+from mmap import mmap
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
 
 from app.domain.interfaces.embedding_service import EmbeddingService
-from app.domain.interfaces.extension_service import ExtensionService
 from app.domain.interfaces.hashing_service import HashingService
 from app.domain.repositories.photo_repository import PhotoRepository
 from app.domain.repositories.storage_repository import StorageRepository
@@ -10,84 +15,230 @@ from app.domain.repositories.vector_repository import VectorRepository
 from app.domain.repositories.duplicate_photo_repository import DuplicatePhotoRepository
 from app.domain.repositories.people_repository import PeopleRepository
 from app.domain.repositories.photo_people_repository import PhotoPeopleRepository
-from app.domain.interfaces.photo_recogniction_service import PhotoRecognictionService
 
 from app.infrastructure.repositories.photo_repository_orm import PhotoRepositoryORM
-from app.infrastructure.repositories.storage_repository_minio import StorageRepositoryMinio
-from app.infrastructure.repositories.vector_db_qdrant import VectorDBQdrant
-from app.infrastructure.services.embedding_service_imple import EmbeddingServiceImpl
-from app.infrastructure.services.extension_service_imple import ExtensionServiceImpl
-from app.infrastructure.services.hashing_service_imple import HashingServiceImpl
 from app.infrastructure.repositories.duplicate_photo_repository_orm import DuplicatePhotoRepositoryORM
-from app.infrastructure.services.photo_recogniction_service_imple import PhotoRecognictionServiceImpl
+from app.infrastructure.repositories.face_repository_orm import FaceRepositoryORM
 from app.infrastructure.repositories.people_repository_orm import PeopleRepositoryORM
 from app.infrastructure.repositories.photo_people_repository_orm import PhotoPeopleRepositoryORM
+from app.infrastructure.repositories.unit_of_work_orm import UnitOfWorkORM
+from app.infrastructure.services.mapped_file import map_file
 
-from app.config.settings import Settings
+from app.config.container import Container, get_container
 
+from app.application.use_cases.analyze_photo import AnalyzePhoto, analyze_in_worker, analyze_path_in_worker
 from app.application.use_cases.process_photo import ProcessPhoto
 
 from app.domain.models.photo import Photo
+from app.domain.models.photo_analysis import PhotoAnalysis
 
 
 class CallProcessPhoto:
-    def process_photo(self, image: str | bytes)->tuple[bool, Photo, str]:
-        file_content: bytes
-        if isinstance(image, (str)):
-            file_content = open(image, "rb").read()
-        else:
-            file_content = image
-        config = Settings()
-        engine = create_engine(
-            config.db_url
-            )
-        session_local = sessionmaker(bind=engine)
-        session = session_local()
-
-        hashing_service: HashingService = HashingServiceImpl()
+    def __init__(self, container: Container | None = None, micro_batching: bool = False):
+        self.container = container or get_container()
+        self.micro_batching = micro_batching
+
+    def _build_process_photo(self, session: Session) -> ProcessPhoto:
+        hashing_service: HashingService = self.container.hashing_service()
         photo_repository: PhotoRepository = PhotoRepositoryORM(session)
-        storage_repository: StorageRepository = StorageRepositoryMinio(
-            endpoint=config.minio_endpoint,
-            access_key=config.minio_access_key,
-            secret_key=config.minio_secret_key,
-            bucket_name=config.minio_bucket_name,
-            secure=config.minio_secure)
-        extension_service: ExtensionService = ExtensionServiceImpl()
-        
-        embedding_service: EmbeddingService = EmbeddingServiceImpl(model_name=config.embedding_model_name)
-        photo_vector_repository: VectorRepository = VectorDBQdrant(
-            collection_name="photo_vectors",
-            vector_size=config.vector_size_photo,
-            distance=config.distance)
-        people_vector_repository: VectorRepository = VectorDBQdrant(
-            collection_name="people_vectors",
-            vector_size=config.vector_size_people,
-            distance=config.distance)
-        
+        storage_repository: StorageRepository = self.container.storage_repository()
+        analyze_photo: AnalyzePhoto = self.container.analyze_photo()
+
+        embedding_service: EmbeddingService = (
+            self.container.micro_batch_embedding_service()
+            if self.micro_batching
+            else self.container.embedding_service())
+        photo_vector_repository: VectorRepository = self.container.photo_vector_repository()
+        people_vector_repository: VectorRepository = self.container.people_vector_repository()
+
         duplicate_repository: DuplicatePhotoRepository = DuplicatePhotoRepositoryORM(session)
-        photo_recogniction_service: PhotoRecognictionService = PhotoRecognictionServiceImpl(file_content,extension_service)
         people_repository: PeopleRepository = PeopleRepositoryORM(session)
-        people_storage_repository: StorageRepository = StorageRepositoryMinio(
-            endpoint=config.minio_endpoint,
-            access_key=config.minio_access_key,
-            secret_key=config.minio_secret_key,
-            bucket_name=config.minio_bucket_name,
-            secure=config.minio_secure)
+        people_storage_repository: StorageRepository = self.container.storage_repository()
         photo_people_repository: PhotoPeopleRepository = PhotoPeopleRepositoryORM(session)
-        process_photo: ProcessPhoto = ProcessPhoto(
+        return ProcessPhoto(
             hashing_service=hashing_service,
             photo_repository=photo_repository,
             storage_repository=storage_repository,
-            extension_service=extension_service,
+            analyze_photo=analyze_photo,
             embedding_service=embedding_service,
             photo_vector_repository=photo_vector_repository,
             people_vector_repository=people_vector_repository,
             duplicate_repository=duplicate_repository,
-            photo_recogniction_service=photo_recogniction_service,
             people_repository=people_repository,
             people_storage_repository=people_storage_repository,
-            photo_people_repository=photo_people_repository)
-        
-        result = process_photo.execute(file_content)
-        return result
-        
\ No newline at end of file
+            photo_people_repository=photo_people_repository,
+            known_hash_filter=self.container.known_hash_filter(),
+            perceptual_hash_index=self.container.perceptual_hash_index(),
+            unit_of_work=UnitOfWorkORM(session),
+            face_repository=FaceRepositoryORM(session),
+            defer_face_identity=self.container.config().face_identity_mode == "deferred",
+            thumbnail_sizes=self.container.config().thumbnail_sizes,
+            content_addressed=self.container.config().storage_key_mode == "content",
+            metrics_service=self.container.metrics_service())
+
+    def find_by_hash(self, hash: str) -> Photo | None:
+        """Busca una foto ya importada sin leer ni decodificar el archivo."""
+        session = self.container.session_factory()()
+        try:
+            return self._build_process_photo(session).find_by_hash(hash)
+        finally:
+            session.close()
+
+    def _find(self, process_photo: ProcessPhoto, image: str | bytes) -> tuple[str, bytes | None, Photo | None]:
+        """Calcula el hash y busca la foto. Devuelve (hash, contenido, foto existente)."""
+        # Con una ruta se calcula el hash por bloques y solo se lee el archivo entero si es nuevo
+        hash = process_photo.calculate_hash(image)
+        return hash, None if isinstance(image, str) else image, process_photo.find_by_hash(hash)
+
+    def process_photo(self, image: str | bytes)->tuple[bool, Photo, str]:
+        return self.process_photos([image])[0]
+
+    def process_photos(self, images: List[str | bytes]) -> List[tuple[bool, Photo, str]]:
+        """
+        Procesa un lote de fotos confirmando todas en una sola transacción.
+        Cada foto va en su propio savepoint, así que una foto fallida no
+        arrastra a las demás. Las rutas se proyectan en memoria (mmap) en lugar
+        de leerse enteras.
+        """
+        results: List[tuple[bool, Photo, str] | None] = [None] * len(images)
+        positions_by_hash: Dict[str, int] = {}
+        repeated: Dict[int, int] = {}
+        session = self.container.session_factory()()
+        mapped_files = ExitStack()
+        try:
+            process_photo = self._build_process_photo(session)
+            with process_photo.unit_of_work:
+                pending: List[tuple[int, str, bytes | mmap]] = []
+                pending_hashes: Dict[str, int] = {}
+                for position, image in enumerate(images):
+                    try:
+                        hash, file_content, photo = self._find(process_photo, image)
+                        if photo:
+                            results[position] = (False, photo, " foto ya procesada")
+                            continue
+                        if hash in pending_hashes:
+                            # El mismo archivo dos veces en el lote: se guarda una sola vez
+                            repeated[position] = pending_hashes[hash]
+                            continue
+                        if file_content is None:
+                            file_content = mapped_files.enter_context(map_file(image))
+                    except Exception as e:
+                        results[position] = (False, None, f"{e}")
+                        continue
+                    pending_hashes[hash] = position
+                    pending.append((position, hash, file_content))
+
+                items: List[tuple[bytes | mmap, str, PhotoAnalysis]] = []
+                analyses = process_photo.analyze_photo.execute_many(
+                    [file_content for _, _, file_content in pending],
+                    [hash for _, hash, _ in pending])
+                for (position, hash, file_content), (result, analysis, error) in zip(pending, analyses):
+                    if not result:
+                        process_photo.record_failure("analyze")
+                        results[position] = (False, None, error)
+                        continue
+                    positions_by_hash[hash] = position
+                    items.append((file_content, hash, analysis))
+
+                for position, result in zip(positions_by_hash.values(), process_photo.save_many(items)):
+                    results[position] = result
+                for position, original in repeated.items():
+                    result, photo, error = results[original]
+                    results[position] = (False, photo, " foto ya procesada") if result else (result, photo, error)
+            return results
+        except Exception as e:
+            # Si falla el commit del lote no se ha guardado ninguna foto nueva
+            for position in [*positions_by_hash.values(), *repeated]:
+                results[position] = (False, None, f"{e}")
+            return [result or (False, None, f"{e}") for result in results]
+        finally:
+            session.close()
+            mapped_files.close()
+
+    def process_photo_timed(self,
+        file: bytes | str,
+        cpu_executor: Executor | None = None,
+        hash: str | None = None) -> tuple[bool, Photo, str, Dict[str, float]]:
+        """
+        Procesa la foto midiendo cuánto tarda cada etapa (en segundos).
+        `file` son los bytes o la ruta del archivo; si se pasa `cpu_executor`,
+        el análisis se ejecuta en ese pool. Con una ruta, el proceso del pool
+        lee el archivo del disco y aquí solo se proyecta en memoria para subirlo.
+        """
+        timings: Dict[str, float] = {}
+        session = self.container.session_factory()()
+        try:
+            with ExitStack() as mapped_files:
+                process_photo = self._build_process_photo(session)
+
+                start = time.perf_counter()
+                if hash is None:
+                    hash = process_photo.calculate_hash(file)
+                timings["hash"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                photo = process_photo.find_by_hash(hash)
+                timings["lookup"] = time.perf_counter() - start
+                if photo:
+                    return False, photo, " foto ya procesada", timings
+
+                file_content = mapped_files.enter_context(map_file(file)) if isinstance(file, str) else file
+                start = time.perf_counter()
+                if cpu_executor is None:
+                    result, analysis, error = process_photo.analyze_photo.execute(file_content, hash)
+                elif isinstance(file, str):
+                    result, analysis, error = cpu_executor.submit(analyze_path_in_worker, file, hash).result()
+                else:
+                    result, analysis, error = cpu_executor.submit(analyze_in_worker, file_content, hash).result()
+                timings["analyze"] = time.perf_counter() - start
+                if not result:
+                    process_photo.record_failure("analyze")
+                    return False, None, error, timings
+
+                start = time.perf_counter()
+                result, photo, error = process_photo.save(file_content, hash, analysis)
+                timings["save"] = time.perf_counter() - start
+                return result, photo, error, timings
+        finally:
+            session.close()
+
+    async def process_photo_async(self,
+        file: bytes | str,
+        cpu_executor: Executor,
+        io_executor: Executor,
+        hash: str | None = None) -> tuple[bool, Photo, str]:
+        """
+        Igual que process_photo pero sin bloquear el event loop: las etapas de CPU
+        van al pool de procesos y las de E/S (storage, base de datos, vectores)
+        al pool de hilos. Con una ruta el archivo no se carga entero en memoria.
+        """
+        loop = asyncio.get_running_loop()
+        session = self.container.session_factory()()
+        try:
+            process_photo = self._build_process_photo(session)
+
+            if hash is None:
+                hash = await loop.run_in_executor(io_executor, process_photo.calculate_hash, file)
+            photo = await loop.run_in_executor(io_executor, process_photo.find_by_hash, hash)
+            if photo:
+                return False, photo, " foto ya procesada"
+
+            if not isinstance(file, str):
+                result, analysis, error = await loop.run_in_executor(cpu_executor, analyze_in_worker, file, hash)
+                if not result:
+                    process_photo.record_failure("analyze")
+                    return False, None, error
+                return await loop.run_in_executor(io_executor, process_photo.save, file, hash, analysis)
+
+            result, analysis, error = await loop.run_in_executor(cpu_executor, analyze_path_in_worker, file, hash)
+            if not result:
+                process_photo.record_failure("analyze")
+                return False, None, error
+            return await loop.run_in_executor(io_executor, self._save_path, process_photo, file, hash, analysis)
+        finally:
+            await loop.run_in_executor(io_executor, session.close)
+
+    @staticmethod
+    def _save_path(process_photo: ProcessPhoto, file_path: str, hash: str, analysis: PhotoAnalysis) -> tuple[bool, Photo, str]:
+        with map_file(file_path) as file_content:
+            return process_photo.save(file_content, hash, analysis)
@@ -0,0 +1,232 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from app.domain.models.face import Face
+from app.domain.models.people import People
+from app.domain.models.photo_people import PhotoPeople
+from app.domain.repositories.face_repository import FaceRepository
+from app.domain.repositories.people_repository import PeopleRepository
+from app.domain.repositories.photo_people_repository import PhotoPeopleRepository
+from app.domain.repositories.unit_of_work import UnitOfWork
+from app.domain.repositories.vector_repository import VectorRepository
+
+
+@dataclass
+class ClusterReport:
+    faces: int = 0
+    clusters: int = 0
+    noise: int = 0
+    people_created: int = 0
+    people_merged: int = 0
+    faces_reassigned: int = 0
+
+
+class ClusterFaces:
+    """
+    Agrupa todas las caras guardadas en personas con DBSCAN (distancia
+    euclídea, radio = tolerancia de face_recognition), sin depender del orden
+    en que se importaron las fotos.
+
+    Cada grupo conserva la persona existente con más caras en él; las demás
+    personas del grupo se fusionan en ella y los grupos sin persona crean una
+    nueva. Una persona repartida entre varios grupos se queda con el mayor y
+    el resto pasan a personas nuevas.
+
+    Las caras que DBSCAN deja como ruido (menos de `min_samples` caras dentro
+    de la tolerancia) no se asignan a ningún grupo: conservan su persona, o
+    se quedan sin ella si esa persona se fusiona en otra. Con `min_samples`
+    1 o 2, DBSCAN equivale a un enlace simple que encadena personas
+    distintas en una sola.
+
+    Todas las filas de `faces`, `people` y `photo_people` se reescriben en
+    una sola transacción y el vector de cada persona pasa a ser la media de
+    sus caras. Si la transacción falla, la colección de personas vuelve a
+    su estado anterior.
+    """
+    NOISE = -1
+    # Caras que se copian de una vez a la matriz de encodings
+    LOAD_CHUNK = 10000
+
+    def __init__(self,
+        face_repository: FaceRepository,
+        people_repository: PeopleRepository,
+        photo_people_repository: PhotoPeopleRepository,
+        people_vector_repository: VectorRepository,
+        unit_of_work: UnitOfWork,
+        tolerance: float = 0.6,
+        min_samples: int = 3):
+        self.face_repository = face_repository
+        self.people_repository = people_repository
+        self.photo_people_repository = photo_people_repository
+        self.people_vector_repository = people_vector_repository
+        self.unit_of_work = unit_of_work
+        self.tolerance = tolerance
+        self.min_samples = min_samples
+
+    def _cluster(self, embeddings: np.ndarray) -> np.ndarray:
+        """Etiqueta de grupo de cada cara; `NOISE` para las que no pertenecen a ninguno."""
+        from sklearn.cluster import DBSCAN
+
+        return DBSCAN(eps=self.tolerance, min_samples=self.min_samples, metric="euclidean", n_jobs=-1).fit_predict(embeddings)
+
+    def _load(self) -> Tuple[List[Face], np.ndarray]:
+        """
+        Lee las caras por bloques y copia sus encodings a una matriz float32;
+        las caras se guardan sin el encoding para no tenerlo dos veces.
+        """
+        faces: List[Face] = []
+        chunks: List[np.ndarray] = []
+        pending: List[np.ndarray] = []
+        for face in self.face_repository.iter_faces():
+            pending.append(face.embedding)
+            faces.append(replace(face, embedding=[]))
+            if len(pending) == self.LOAD_CHUNK:
+                chunks.append(np.asarray(pending, dtype=np.float32))
+                pending = []
+        if pending:
+            chunks.append(np.asarray(pending, dtype=np.float32))
+        if not chunks:
+            return faces, np.empty((0, 0), dtype=np.float32)
+        return faces, np.concatenate(chunks)
+
+    @classmethod
+    def _assign_owners(cls, faces: List[Face], labels: np.ndarray) -> Dict[int, str]:
+        """Empareja grupos y personas existentes, de mayor a menor número de caras en común."""
+        overlaps = Counter(
+            (int(label), face.people_id)
+            for face, label in zip(faces, labels)
+            if face.people_id is not None and label != cls.NOISE
+        )
+        owners: Dict[int, str] = {}
+        owned: Set[str] = set()
+        for (label, people_id), _ in overlaps.most_common():
+            if label in owners or people_id in owned:
+                continue
+            owners[label] = people_id
+            owned.add(people_id)
+        return owners
+
+    def execute(self) -> ClusterReport:
+        report = ClusterReport()
+        faces, embeddings = self._load()
+        report.faces = len(faces)
+        if not faces:
+            return report
+
+        labels = self._cluster(embeddings)
+        members: Dict[int, List[int]] = defaultdict(list)
+        for position, label in enumerate(labels):
+            if label != self.NOISE:
+                members[int(label)].append(position)
+        report.clusters = len(members)
+        report.noise = int(np.count_nonzero(labels == self.NOISE))
+
+        owners = self._assign_owners(faces, labels)
+
+        # Grupos sin persona: se crea una con la cara más cercana al centro como imagen
+        new_people: List[People] = []
+        new_labels: List[int] = []
+        for label, positions in members.items():
+            if label in owners:
+                continue
+            centroid = embeddings[positions].mean(axis=0)
+            with_image = [position for position in positions if faces[position].web_path] or positions
+            representative = min(with_image, key=lambda position: np.linalg.norm(embeddings[position] - centroid))
+            new_people.append(People(id="", label="", web_path=faces[representative].web_path))
+            new_labels.append(label)
+
+        with self.unit_of_work:
+            for label, people in zip(new_labels, self.people_repository.create_people_bulk(new_people)):
+                owners[label] = people.id
+            report.people_created = len(new_people)
+
+            # Personas sin grupo propio: se fusionan en el grupo que tenía la mayoría de sus caras
+            kept = set(owners.values())
+            votes: Dict[str, Counter] = defaultdict(Counter)
+            for face, label in zip(faces, labels):
+                if face.people_id is not None and face.people_id not in kept and label != self.NOISE:
+                    votes[face.people_id][owners[int(label)]] += 1
+            merged_into = {people_id: counter.most_common(1)[0][0] for people_id, counter in votes.items()}
+            report.people_merged = len(merged_into)
+
+            people_ids = self._people_ids(faces, labels, owners, merged_into)
+            assignments = {
+                face.id: people_id
+                for face, people_id in zip(faces, people_ids)
+                if face.people_id != people_id
+            }
+            self.face_repository.assign_people_bulk(assignments)
+            report.faces_reassigned = len(assignments)
+
+            self.photo_people_repository.replace_photo_people(
+                self._photo_people(faces, people_ids, merged_into))
+            self.people_repository.delete_people_bulk(list(merged_into))
+
+            vectors_ids = list(owners.values())
+            vectors = [embeddings[members[label]].mean(axis=0).tolist() for label in owners]
+            created_ids = [owners[label] for label in new_labels]
+            self.unit_of_work.on_rollback(lambda: self._restore_vectors(faces, embeddings, created_ids))
+            self.people_vector_repository.add_vectors(vectors, vectors_ids)
+            self.people_vector_repository.delete_many(list(merged_into))
+        return report
+
+    def _people_ids(self,
+        faces: List[Face],
+        labels: np.ndarray,
+        owners: Dict[int, str],
+        merged_into: Dict[str, str]) -> List[str | None]:
+        """Persona final de cada cara: la de su grupo o, para el ruido, la que tenía si sigue existiendo."""
+        people_ids: List[str | None] = []
+        for face, label in zip(faces, labels):
+            if label != self.NOISE:
+                people_ids.append(owners[int(label)])
+            elif face.people_id in merged_into:
+                people_ids.append(None)
+            else:
+                people_ids.append(face.people_id)
+        return people_ids
+
+    def _restore_vectors(self, faces: List[Face], embeddings: np.ndarray, created_ids: List[str]):
+        """
+        Deshace las escrituras en la colección de personas: borra las personas
+        nuevas y devuelve a las existentes el vector de las caras que tenían
+        antes de agrupar (la media, como al agrupar).
+        """
+        previous: Dict[str, List[int]] = defaultdict(list)
+        for position, face in enumerate(faces):
+            if face.people_id is not None:
+                previous[face.people_id].append(position)
+        self.people_vector_repository.delete_many(created_ids)
+        self.people_vector_repository.add_vectors(
+            [embeddings[positions].mean(axis=0).tolist() for positions in previous.values()], list(previous))
+
+    def _photo_people(self,
+        faces: List[Face],
+        people_ids: List[str | None],
+        merged_into: Dict[str, str]) -> List[PhotoPeople]:
+        """
+        Las fotos con caras guardadas toman sus personas de las caras; las
+        importadas antes de guardar caras conservan sus filas, con las personas
+        fusionadas sustituidas.
+        """
+        photos_with_faces = {face.photo_id for face in faces}
+        rows = {
+            (face.photo_id, people_id)
+            for face, people_id in zip(faces, people_ids)
+            if people_id is not None
+        }
+        for row in self.photo_people_repository.get_all_photo_people():
+            if row.photo_id not in photos_with_faces:
+                rows.add((row.photo_id, merged_into.get(row.people_id, row.people_id)))
+        return [PhotoPeople(photo_id=photo_id, people_id=people_id) for photo_id, people_id in rows]
+
+
+def iter_cluster_report_lines(report: ClusterReport) -> Iterable[str]:
+    yield f"Caras: {report.faces}"
+    yield f"Grupos: {report.clusters} ({report.noise} caras sueltas)"
+    yield f"Personas nuevas: {report.people_created}"
+    yield f"Personas fusionadas: {report.people_merged}"
+    yield f"Caras reasignadas: {report.faces_reassigned}"
@@ -0,0 +1,64 @@
+from concurrent.futures import Executor
+from typing import Dict
+
+from app.application.use_cases.analyze_photo import render_thumbnail_in_worker
+from app.domain.interfaces.image_decoder_service import ImageDecoderService
+from app.domain.interfaces.photo_recogniction_service import PhotoRecognictionService
+from app.domain.repositories.photo_repository import PhotoRepository
+from app.domain.repositories.storage_repository import StorageRepository
+
+
+class GetThumbnail:
+    """
+    Devuelve una miniatura de la foto. Las que no se generaron al importar
+    (THUMBNAIL_LAZY_SIZES) se generan a partir del original la primera vez que
+    se piden y se guardan en su clave fija para las siguientes peticiones.
+    Con `cpu_executor`, la decodificación y el renderizado se hacen en ese pool.
+    """
+
+    def __init__(self,
+        photo_repository: PhotoRepository,
+        storage_repository: StorageRepository,
+        image_decoder_service: ImageDecoderService,
+        photo_recogniction_service: PhotoRecognictionService,
+        thumbnail_sizes: Dict[int, int],
+        cpu_executor: Executor | None = None):
+        self.photo_repository = photo_repository
+        self.storage_repository = storage_repository
+        self.image_decoder_service = image_decoder_service
+        self.photo_recogniction_service = photo_recogniction_service
+        self.thumbnail_sizes = thumbnail_sizes
+        self.cpu_executor = cpu_executor
+
+    def execute(self, photo_id: str, size: int) -> tuple[bool, bytes | None, str]:
+        photo = self.photo_repository.get_photo(photo_id)
+        if photo is None:
+            return False, None, "Foto no encontrada"
+        thumbnail_key = photo.thumbnails.get(size)
+        if thumbnail_key is None or size not in self.thumbnail_sizes:
+            return False, None, f"Tamaño de miniatura no disponible: {size}"
+
+        result, thumbnail, _ = self.storage_repository.get_file(thumbnail_key)
+        if result:
+            return True, thumbnail, ""
+
+        result, file_content, error = self.storage_repository.get_file(photo.path)
+        if not result:
+            return False, None, error
+        result, thumbnail, error = self._render(file_content, size)
+        if not result:
+            return False, None, error
+        result, _, error, _ = self.storage_repository.upload_file(thumbnail, "webp", "image/webp", object_name=thumbnail_key)
+        if not result:
+            # La miniatura se sirve igualmente; se volverá a generar en la siguiente petición
+            print(f"No se pudo guardar la miniatura {thumbnail_key}: {error}")
+        return True, thumbnail, ""
+
+    def _render(self, file_content: bytes, size: int) -> tuple[bool, bytes | None, str]:
+        quality = self.thumbnail_sizes[size]
+        if self.cpu_executor is not None:
+            return self.cpu_executor.submit(render_thumbnail_in_worker, file_content, size, quality).result()
+        result, image, error = self.image_decoder_service.decode(file_content)
+        if not result:
+            return False, None, error
+        return True, self.photo_recogniction_service.render_thumbnails(image, {size: quality})[size], ""
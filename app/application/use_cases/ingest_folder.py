@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+from tqdm import tqdm
+
+from app.config.settings import Settings
+from app.domain.interfaces.metrics_service import MetricsService
+
+
+@dataclass
+class IngestReport:
+    total: int = 0
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    resumed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        done = self.processed + self.skipped + self.failed
+        return done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+_call_process_photo = None
+
+
+def _init_worker():
+    """Inicializa el contenedor del proceso hijo una sola vez."""
+    global _call_process_photo
+    try:
+        # Cada proceso ya es un núcleo; evitamos que torch cree sus propios hilos
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    from app.application.use_cases.call_process_photo import CallProcessPhoto
+    from app.config.container import get_container, preload_analysis_libraries, warm_up
+
+    container = get_container()
+    try:
+        warm_up(container)
+        preload_analysis_libraries()
+    except Exception as e:
+        # Si el initializer falla, el pool relanza el proceso en bucle; el error
+        # se reportará por cada foto al procesarla
+        print(f"Error al precargar los servicios: {e}")
+    _call_process_photo = CallProcessPhoto(container)
+
+
+def _process_batch(paths: List[str]) -> tuple[List[tuple[str, bool, bool, str]], Dict[str, Any]]:
+    """
+    Procesa un lote de fotos en el proceso hijo con una sola transacción.
+    Devuelve (ruta, ok, ya_existia, error) por cada foto y las métricas del
+    proceso acumuladas desde el lote anterior.
+    """
+    reports = _process_paths(paths)
+    return reports, _call_process_photo.container.metrics_service().drain()
+
+
+def _process_paths(paths: List[str]) -> List[tuple[str, bool, bool, str]]:
+    try:
+        results = _call_process_photo.process_photos(paths)
+    except Exception as e:
+        return [(path, False, False, f"{e}") for path in paths]
+    reports = []
+    for path, (result, photo, error) in zip(paths, results):
+        if result:
+            reports.append((path, True, False, ""))
+        elif photo is not None:
+            reports.append((path, True, True, ""))
+        else:
+            reports.append((path, False, False, error))
+    return reports
+
+
+class IngestFolder:
+    """
+    Importa de forma masiva todas las fotos de una carpeta usando un pool de procesos.
+    Cada proceso recibe lotes de hasta `batch_size` fotos y los confirma en una
+    sola transacción.
+
+    Las rutas completadas se registran en un journal para poder reanudar la
+    importación tras una interrupción sin volver a leer los archivos.
+    """
+    JOURNAL_NAME = ".home-photo-ingest.log"
+
+    def __init__(self,
+        settings: Settings | None = None,
+        workers: int | None = None,
+        journal_path: str | None = None,
+        metrics_service: MetricsService | None = None):
+        self.settings = settings or Settings()
+        self.workers = workers or os.cpu_count() or 1
+        self.journal_path = journal_path
+        self.extensions = {extension.lower() for extension in self.settings.supported_extensions}
+        # Recibe las métricas de los procesos hijos para resumirlas al terminar
+        self.metrics_service = metrics_service
+
+    def find_photos(self, folder: str) -> List[str]:
+        """Recorre la carpeta recursivamente filtrando por las extensiones soportadas."""
+        photos = []
+        for root, _, files in os.walk(folder):
+            for name in files:
+                if Path(name).suffix.lower() in self.extensions:
+                    photos.append(os.path.join(root, name))
+        photos.sort()
+        return photos
+
+    def _load_journal(self, journal_path: str) -> Set[str]:
+        if not os.path.exists(journal_path):
+            return set()
+        with open(journal_path, "r", encoding="utf-8") as journal:
+            return {line.rstrip("\n") for line in journal if line.strip()}
+
+    def execute(self, folder: str) -> IngestReport:
+        folder = os.path.abspath(folder)
+        journal_path = self.journal_path or os.path.join(folder, self.JOURNAL_NAME)
+        done = self._load_journal(journal_path)
+
+        photos = self.find_photos(folder)
+        pending = [path for path in photos if path not in done]
+        report = IngestReport(total=len(photos), resumed=len(photos) - len(pending))
+        if not pending:
+            return report
+
+        # Lotes pequeños si hay pocas fotos para que todos los procesos tengan trabajo
+        batch_size = max(1, min(self.settings.batch_size, len(pending) // (self.workers * 4) or 1))
+        batches = [pending[index:index + batch_size] for index in range(0, len(pending), batch_size)]
+        start = time.perf_counter()
+        pool = multiprocessing.Pool(processes=self.workers, initializer=_init_worker)
+        try:
+            with open(journal_path, "a", encoding="utf-8") as journal, \
+                    tqdm(total=len(pending), unit="foto", desc="Importando") as progress:
+                for batch, metrics in pool.imap_unordered(_process_batch, batches):
+                    if self.metrics_service is not None:
+                        self.metrics_service.merge(metrics)
+                    for path, ok, existed, error in batch:
+                        if ok:
+                            journal.write(f"{path}\n")
+                            if existed:
+                                report.skipped += 1
+                            else:
+                                report.processed += 1
+                        else:
+                            report.failed += 1
+                            tqdm.write(f"❌ {path}: {error}")
+                    journal.flush()
+                    progress.update(len(batch))
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            report.elapsed = time.perf_counter() - start
+        return report
+
+
+def iter_report_lines(report: IngestReport) -> Iterable[str]:
+    yield f"Fotos encontradas: {report.total}"
+    yield f"Ya importadas (journal): {report.resumed}"
+    yield f"Procesadas: {report.processed}"
+    yield f"Duplicadas por hash: {report.skipped}"
+    yield f"Fallidas: {report.failed}"
+    yield f"Tiempo: {report.elapsed:.1f}s ({report.throughput:.2f} fotos/s)"
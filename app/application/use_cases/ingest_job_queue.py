@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Executor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.application.use_cases.call_process_photo import CallProcessPhoto
+from app.config.container import Container
+from app.domain.models.job import Job
+from app.infrastructure.repositories.job_repository_orm import JobRepositoryORM
+
+
+class IngestJobQueue:
+    """
+    Cola persistente de fotos subidas.
+
+    Los archivos se guardan en `spool_dir` y el trabajo en la tabla `jobs`, así
+    que los trabajos sobreviven a un reinicio. Un pool de hilos reclama los
+    trabajos pendientes y ejecuta el pipeline registrando el tiempo de cada etapa.
+
+    Un trabajo fallido vuelve a la cola hasta `max_attempts` intentos; después
+    queda como fallido y se borra su archivo. Al arrancar solo se recuperan
+    los trabajos en curso reclamados hace más de `lease_seconds`: los demás
+    pueden ser de otro proceso que comparte la base de datos.
+    """
+
+    def __init__(self,
+        container: Container,
+        spool_dir: str,
+        workers: int = 2,
+        cpu_executor: Executor | None = None,
+        poll_interval: float = 1.0,
+        max_attempts: int = 3,
+        lease_seconds: float = 900):
+        self.container = container
+        self.spool_dir = spool_dir
+        self.workers = max(1, workers)
+        self.cpu_executor = cpu_executor
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.lease_seconds = lease_seconds
+        self._wake_up = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def _job_repository(self, session) -> JobRepositoryORM:
+        return JobRepositoryORM(session)
+
+    def spool_path(self) -> str:
+        """Ruta nueva dentro de `spool_dir` donde escribir un archivo subido antes de encolarlo."""
+        return os.path.join(self.spool_dir, f"{uuid.uuid4()}.upload")
+
+    def enqueue(self, file_path: str, hash: str | None = None) -> Job:
+        """
+        Encola un archivo ya escrito en `spool_path()`; el trabajo lo borra al
+        terminar. `hash` es su SHA-256, si ya se calculó al recibirlo.
+        """
+        session = self.container.session_factory()()
+        try:
+            job = self._job_repository(session).create_job(file_path, hash)
+        except Exception:
+            os.remove(file_path)
+            raise
+        finally:
+            session.close()
+        with self._wake_up:
+            self._wake_up.notify()
+        return job
+
+    def get_job(self, id: str) -> Optional[Job]:
+        session = self.container.session_factory()()
+        try:
+            return self._job_repository(session).get_job(id)
+        finally:
+            session.close()
+
+    def list_jobs(self, status: str | None = None, limit: int = 50, offset: int = 0) -> List[Job]:
+        session = self.container.session_factory()()
+        try:
+            return self._job_repository(session).list_jobs(status=status, limit=limit, offset=offset)
+        finally:
+            session.close()
+
+    def requeue_abandoned(self) -> int:
+        """Devuelve a la cola los trabajos en curso cuyo plazo (`lease_seconds`) ya venció."""
+        session = self.container.session_factory()()
+        try:
+            # Las columnas guardan la hora UTC sin zona horaria
+            started_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=self.lease_seconds)
+            return self._job_repository(session).requeue_running(started_before)
+        finally:
+            session.close()
+
+    def start(self):
+        requeued = self.requeue_abandoned()
+        if requeued:
+            print(f"ℹ️  {requeued} trabajos interrumpidos vuelven a la cola")
+        self._stopping.clear()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ingest-job-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        with self._wake_up:
+            self._wake_up.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def _claim(self) -> Optional[Job]:
+        session = self.container.session_factory()()
+        try:
+            return self._job_repository(session).claim_next()
+        finally:
+            session.close()
+
+    def _run(self):
+        call_process_photo = CallProcessPhoto(self.container, micro_batching=True)
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"Error al reclamar un trabajo: {e}")
+                job = None
+            if job is None:
+                with self._wake_up:
+                    self._wake_up.wait(self.poll_interval)
+                continue
+            try:
+                self._process(call_process_photo, job)
+            except Exception as e:
+                # El trabajo sigue en curso y vuelve a la cola cuando vence su plazo; el hilo no se pierde
+                print(f"Error al terminar el trabajo {job.id}: {e}")
+
+    def _process(self, call_process_photo: CallProcessPhoto, job: Job):
+        timings = {}
+        if job.started_at is not None:
+            timings["queued"] = (job.started_at - job.created_at).total_seconds()
+        start = time.perf_counter()
+        if job.attempts > self.max_attempts:
+            # Se reclamó otra vez tras caerse el proceso a mitad de cada intento
+            result, photo, error = False, None, f"Se agotaron los {self.max_attempts} intentos"
+        else:
+            try:
+                result, photo, error, stage_timings = call_process_photo.process_photo_timed(
+                    job.file_path, cpu_executor=self.cpu_executor, hash=job.hash)
+                timings.update(stage_timings)
+            except Exception as e:
+                result, photo, error = False, None, f"{e}"
+        timings["total"] = time.perf_counter() - start
+
+        session = self.container.session_factory()()
+        try:
+            job_repository = self._job_repository(session)
+            # Una foto ya importada no es un fallo: el trabajo apunta a la existente
+            if result or photo is not None:
+                job_repository.mark_done(job.id, photo.id, timings)
+                self._remove_upload(job.file_path)
+                if result:
+                    self.container.read_cache().clear()
+            elif job.attempts < self.max_attempts:
+                job_repository.mark_retry(job.id, error, timings)
+            else:
+                job_repository.mark_failed(job.id, error, timings)
+                self._remove_upload(job.file_path)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _remove_upload(file_path: str):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
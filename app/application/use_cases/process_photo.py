@@ -1,14 +1,26 @@
+from contextlib import nullcontext
+from mmap import mmap
+from typing import ContextManager, Iterable, List, Tuple
+
 from app.domain.interfaces.embedding_service import EmbeddingService
-from app.domain.interfaces.extension_service import ExtensionService
 from app.domain.interfaces.hashing_service import HashingService
+from app.domain.interfaces.known_hash_filter import KnownHashFilter
+from app.domain.interfaces.metrics_service import MetricsService
+from app.domain.interfaces.perceptual_hash_index import PerceptualHashIndex
+from app.domain.models.face import Face
 from app.domain.models.photo import People, Photo
+from app.domain.models.photo_analysis import PhotoAnalysis
+from app.domain.models.photo_people import PhotoPeople
+from app.domain.models.storage_object import StorageObject
 from app.domain.repositories.duplicate_photo_repository import DuplicatePhotoRepository
+from app.domain.repositories.face_repository import FaceRepository
 from app.domain.repositories.people_repository import PeopleRepository
 from app.domain.repositories.photo_people_repository import PhotoPeopleRepository
-from app.domain.repositories.photo_repository import PhotoRepository
+from app.domain.repositories.photo_repository import PhotoAlreadyExists, PhotoRepository
 from app.domain.repositories.storage_repository import StorageRepository
+from app.domain.repositories.unit_of_work import UnitOfWork
 from app.domain.repositories.vector_repository import VectorRepository
-from app.domain.interfaces.photo_recogniction_service import PhotoRecognictionService
+from app.application.use_cases.analyze_photo import AnalyzePhoto
 
 
 class ProcessPhoto:
@@ -16,112 +28,321 @@ class ProcessPhoto:
         hashing_service: HashingService,
         photo_repository: PhotoRepository,
         storage_repository: StorageRepository,
-        extension_service: ExtensionService,
+        analyze_photo: AnalyzePhoto,
         embedding_service: EmbeddingService,
         photo_vector_repository: VectorRepository,
         people_vector_repository: VectorRepository,
         duplicate_repository: DuplicatePhotoRepository,
-        photo_recogniction_service: PhotoRecognictionService,
         people_repository: PeopleRepository,
         people_storage_repository: StorageRepository,
-        photo_people_repository: PhotoPeopleRepository):
+        photo_people_repository: PhotoPeopleRepository,
+        known_hash_filter: KnownHashFilter,
+        perceptual_hash_index: PerceptualHashIndex,
+        unit_of_work: UnitOfWork,
+        face_repository: FaceRepository,
+        defer_face_identity: bool = False,
+        thumbnail_sizes: Iterable[int] = (),
+        content_addressed: bool = False,
+        metrics_service: MetricsService | None = None):
         self.hashing_service = hashing_service
         self.photo_repository = photo_repository
         self.storage_repository = storage_repository
-        self.extension_service = extension_service
+        self.analyze_photo = analyze_photo
         self.embedding_service = embedding_service
         self.photo_vector_repository = photo_vector_repository
         self.duplicate_repository = duplicate_repository
-        self.photo_recogniction_service = photo_recogniction_service
         self.people_vector_repository = people_vector_repository
         self.people_repository = people_repository
         self.photo_people_repository = photo_people_repository
         self.people_storage_repository = people_storage_repository
-        
-    def _dele_photo(self,
-                    storage_path:str,
-                    webp_storage_path:str,
-                    photo: Photo,
-                    ):
-        if storage_path is not None:
-            self.storage_repository.delete_file(storage_path)
-            self.storage_repository.delete_file(webp_storage_path)
-        if photo is not None:
-            for person in photo.people:
-                self.people_vector_repository.delete_by_id(person.id)
-                self.people_storage_repository.delete_file(person.web_path)
-                self.people_repository.delete(person.id)
-            
-            self.photo_vector_repository.delete_by_id(photo.id)
-            self.photo_repository.delete(photo.id)
-        
-           
-
-    def execute(self, file_content: bytes) -> tuple[bool, Photo, str]:
-        photo: Photo = None
-        webp_file: str = None
-        storage_path: str = None
+        self.known_hash_filter = known_hash_filter
+        self.perceptual_hash_index = perceptual_hash_index
+        self.unit_of_work = unit_of_work
+        self.face_repository = face_repository
+        # Durante una importación masiva las caras se guardan sin persona y se agrupan después
+        self.defer_face_identity = defer_face_identity
+        # Todas las miniaturas configuradas, también las que se generan al pedirlas
+        self.thumbnail_sizes = sorted(thumbnail_sizes)
+        # Claves derivadas del SHA-256: reimportar o reintentar no vuelve a subir ni duplica archivos
+        self.content_addressed = content_addressed
+        # Histogramas de tiempo por etapa (stage_seconds) y contadores de duplicados, caras y fallos
+        self.metrics_service = metrics_service
+
+    def _timer(self, stage: str) -> ContextManager:
+        if self.metrics_service is None:
+            return nullcontext()
+        return self.metrics_service.timer("stage_seconds", stage=stage)
+
+    def _count(self, name: str, amount: float = 1, **labels: str):
+        if self.metrics_service is not None:
+            self.metrics_service.increment(name, amount, **labels)
+
+    def record_failure(self, stage: str):
+        """Cuenta una foto fallida; `stage` es la etapa que falló (analyze o save)."""
+        self._count("failures_total", stage=stage)
+
+    def calculate_hash(self, file: bytes | mmap | str) -> str:
+        """SHA-256 del contenido o, con una ruta, del archivo leído por bloques."""
+        with self._timer("hash"):
+            if isinstance(file, str):
+                return self.hashing_service.calculate_path_hash(file)
+            return self.hashing_service.calculate_file_hash(file)
+
+    def find_by_hash(self, hash: str) -> Photo | None:
+        """
+        Solo consulta la base de datos si el filtro en memoria conoce el hash.
+        Si otro proceso la importa a la vez y el filtro aún no lo sabe, la
+        restricción única la rechaza al guardar (ver `_save_many`).
+        """
+        if not self.known_hash_filter.might_contain(hash):
+            return None
+        with self._timer("lookup"):
+            photo = self.photo_repository.get_by_hash(hash)
+        if photo:
+            self._count("duplicates_total", kind="hash")
+        return photo
+
+    def execute(self, file_content: bytes | mmap, hash: str | None = None) -> tuple[bool, Photo, str]:
+        if hash is None:
+            hash = self.calculate_hash(file_content)
+        photo = self.find_by_hash(hash)
+        if photo:
+            return False, photo, " foto ya procesada"
+
+        result, analysis, error = self.analyze_photo.execute(file_content, hash)
+        if not result:
+            self.record_failure("analyze")
+            return False, None, error
+        return self.save(file_content, hash, analysis)
+
+    def save(self, file_content: bytes | mmap, hash: str, analysis: PhotoAnalysis) -> tuple[bool, Photo, str]:
+        """
+        Etapas de E/S: storage, base de datos y base vectorial.
+
+        Todas las filas de la foto se confirman en una sola transacción. Si algo
+        falla se deshace y se borran los archivos y vectores ya creados.
+        """
+        return self.save_many([(file_content, hash, analysis)])[0]
+
+    def save_many(self, items: List[Tuple[bytes | mmap, str, PhotoAnalysis]]) -> List[tuple[bool, Photo, str]]:
+        """
+        Guarda un lote de fotos ya analizadas. Cada foto se guarda en su propio
+        savepoint; los vectores de fotos y caras de todo el lote se buscan e
+        insertan en Qdrant con una sola petición por colección.
+        """
+        if self.metrics_service is not None:
+            # Etapas de CPU medidas en AnalyzePhoto, quizá en otro proceso
+            for _, _, analysis in items:
+                for stage, seconds in analysis.timings.items():
+                    self.metrics_service.observe("stage_seconds", seconds, stage=stage)
+        with self._timer("save"):
+            results = self._save_many(items)
+        for (_, _, analysis), (result, photo, _) in zip(items, results):
+            if result:
+                self._count("photos_saved_total")
+                if self.metrics_service is not None:
+                    self.metrics_service.observe("faces_per_photo", len(analysis.faces))
+            elif photo is None:
+                self.record_failure("save")
+        return results
+
+    def _save_many(self, items: List[Tuple[bytes | mmap, str, PhotoAnalysis]]) -> List[tuple[bool, Photo, str]]:
+        results: List[tuple[bool, Photo, str] | None] = [None] * len(items)
         try:
-            hash = self.hashing_service.calculate_file_hash(file_content)
+            with self.unit_of_work as unit_of_work:
+                stored: List[Tuple[int, Photo, PhotoAnalysis, List[str]]] = []
+                for position, (file_content, hash, analysis) in enumerate(items):
+                    try:
+                        with self.unit_of_work as photo_unit_of_work:
+                            photo, near_duplicate_ids = self._store_photo(photo_unit_of_work, file_content, hash, analysis)
+                    except PhotoAlreadyExists:
+                        # Otro proceso la ha guardado después de buscarla: es la misma foto ya procesada
+                        results[position] = self._already_processed(hash)
+                        continue
+                    except Exception as e:
+                        results[position] = (False, None, f"{e}")
+                        continue
+                    stored.append((position, photo, analysis, near_duplicate_ids))
+
+                if stored:
+                    self._save_photo_vectors(unit_of_work, stored)
+                    self._save_people(unit_of_work, stored)
+                for position, photo, _, _ in stored:
+                    results[position] = (True, photo, "")
+        except Exception as e:
+            # Los fallos de la base vectorial afectan a todo el lote
+            return [result or (False, None, f"{e}") for result in results]
+        return results
+
+    def _already_processed(self, hash: str) -> tuple[bool, Photo, str]:
+        self.known_hash_filter.add(hash)
+        with self._timer("lookup"):
             photo = self.photo_repository.get_by_hash(hash)
-            if photo:
-                return False, photo, " foto ya procesada"
-            
-            extension = self.extension_service.get_file_extension_from_bytes(file_content)
-            mime_type = self.extension_service.get_mime_type_from_bytes(file_content)
-            if extension is None or mime_type is None:
-                raise Exception("Error al obtener la extensión o el tipo MIME del archivo")
-            
-            result, webp_file, error = self.photo_recogniction_service.to_webp()
-            if not result:
-                raise Exception(f"Error al convertir a WebP: {error}")
-            result, storage_path, error = self.storage_repository.upload_file(file_content, extension, mime_type)
-            if not result:
-                raise Exception(f"Error al subir la foto WebP al storage: {error}")
-            
-            result, webp_storage_path, error = self.storage_repository.upload_file(webp_file.getvalue(), "webp", "image/webp")
-            if not result:
-                raise Exception(f"Error al subir el archivo WebP a la base de datos: {error}")
-            
-            photo = self.photo_repository.create_photo(Photo(id="",hash=hash, path=storage_path, path_web=webp_storage_path, people=[]))
-            if not photo:
-                raise Exception(f"Error al crear la foto en la base de datos")
-            
-            result, embedding, error = self.embedding_service.get_embedding(webp_file.getvalue())
-            if not result:
-                raise Exception(f"Error al obtener el embedding: {error}")
-            
-            result, ids, error = self.photo_vector_repository.search_ids(embedding)
-            if not result:
-                raise Exception(f"Error al buscar los IDs: {error}")
-            
+        self._count("duplicates_total", kind="hash")
+        return False, photo, " foto ya procesada"
+
+    def _store_photo(self, unit_of_work: UnitOfWork, file_content: bytes | mmap, hash: str, analysis: PhotoAnalysis) -> Tuple[Photo, List[str]]:
+        # Copias redimensionadas o recomprimidas se detectan aquí, sin pasar por CLIP
+        with self._timer("phash_index"):
+            near_duplicate_ids = self.perceptual_hash_index.search(analysis.phash)
+
+        # El original, su WebP y las miniaturas se suben a la vez
+        thumbnails = {size: Photo.thumbnail_key(hash, size) for size in self.thumbnail_sizes}
+        files = [
+            self._storage_object(file_content, analysis.extension, analysis.mime_type, "originals", hash, f"{hash}.{analysis.extension}"),
+            self._storage_object(analysis.webp, "webp", "image/webp", "web", hash, f"{hash}.webp"),
+            *[
+                StorageObject(thumbnail, "webp", "image/webp", object_name=Photo.thumbnail_key(hash, size), skip_if_exists=True)
+                for size, thumbnail in analysis.thumbnails.items()
+            ],
+        ]
+        with self._timer("storage"):
+            uploads = self.storage_repository.upload_files(files)
+        self._delete_on_rollback(unit_of_work, self.storage_repository, files, uploads)
+        errors = [error for result, _, error, _ in uploads if not result]
+        if errors:
+            raise Exception(f"Error al subir la foto al storage: {errors[0]}")
+        (_, storage_path, _, _), (_, webp_storage_path, _, _) = uploads[:2]
+        for size, (_, thumbnail_key, _, _) in zip(analysis.thumbnails, uploads[2:]):
+            thumbnails[size] = thumbnail_key
+
+        with self._timer("db"):
+            photo = self.photo_repository.create_photo(Photo(id="",hash=hash, path=storage_path, path_web=webp_storage_path, people=[], phash=analysis.phash, thumbnails=thumbnails))
+        if not photo:
+            raise Exception(f"Error al crear la foto en la base de datos")
+        self.known_hash_filter.add(hash)
+        # Al añadirlo ya, las copias dentro del mismo lote se detectan como duplicadas
+        self.perceptual_hash_index.add(photo.id, analysis.phash)
+        unit_of_work.on_rollback(lambda: self.perceptual_hash_index.remove(photo.id))
+
+        if len(near_duplicate_ids) > 0:
+            self._count("duplicates_total", kind="perceptual")
+            with self._timer("db"):
+                self.duplicate_repository.save_duplicate_photo(photo.id, near_duplicate_ids)
+        return photo, near_duplicate_ids
+
+    def _save_photo_vectors(self, unit_of_work: UnitOfWork, stored: List[Tuple[int, Photo, PhotoAnalysis, List[str]]]):
+        pending = [(photo, analysis) for _, photo, analysis, near_duplicate_ids in stored if not near_duplicate_ids]
+        if not pending:
+            return
+
+        with self._timer("clip"):
+            if len(pending) == 1:
+                # Una sola foto pasa por el micro-batching del servicio de embeddings
+                result, embedding, error = self.embedding_service.get_image_embedding(pending[0][1].preview)
+                embeddings = [embedding]
+            else:
+                result, embeddings, error = self.embedding_service.get_image_embeddings([analysis.preview for _, analysis in pending])
+        if not result:
+            raise Exception(f"Error al obtener el embedding: {error}")
+
+        # La colección solo devuelve las fotos por encima de PHOTO_DUPLICATE_SIMILARITY
+        with self._timer("vectors"):
+            result, ids_by_photo, error = self.photo_vector_repository.search_many(embeddings)
+        if not result:
+            raise Exception(f"Error al buscar los IDs: {error}")
+
+        new_vectors: List[List[float]] = []
+        new_ids: List[str] = []
+        for (photo, _), embedding, ids in zip(pending, embeddings, ids_by_photo):
             "Hay photos duplicadas"
             if len(ids) > 0:
-                self.duplicate_repository.save_duplicate_photo(photo.id, ids)
+                self._count("duplicates_total", kind="embedding")
+                with self._timer("db"):
+                    self.duplicate_repository.save_duplicate_photo(photo.id, ids)
             else:
-                self.photo_vector_repository.add_vector(embedding, photo.id)
-
-            faces = self.photo_recogniction_service.recognize_faces()
-            if len(faces) > 0:
-                for face in faces:
-                    result, person_ids, error = self.people_vector_repository.search_ids(face.embedings)
-                    if not result:
-                        print(f"Error al buscar el ID de la persona: {error}")
-                        continue
-                    if len(person_ids) < 1:
-                        people_path = self.people_storage_repository.upload_file(face.face_image, ".webp", "image/webp")
-                        people = self.people_repository.create_people(People(id=person_ids[0], web_path=people_path))
-                        self.people_vector_repository.add_vector(face.embedding, people.id)
-                        photo.people.append(people)
-                        "crear people repositorio y guardar el primer id"
-                        "obtener la cara de la persona y guardarla"
-                        people_id = people.id
-                    else:
-                        people_id = person_ids[0]
-                    self.photo_people_repository.create_photo_people(People(photo_id=photo.id, people_id=people_id))
-
-                
-            return True, photo, ""
-        except Exception as e:
-            self._dele_photo(storage_path, webp_storage_path, photo)
-            return False, None, f"{e}"
\ No newline at end of file
+                new_vectors.append(embedding)
+                new_ids.append(photo.id)
+        with self._timer("vectors"):
+            self.photo_vector_repository.add_vectors(new_vectors, new_ids)
+        unit_of_work.on_rollback(lambda: self.photo_vector_repository.delete_many(new_ids))
+
+    def _storage_object(self, data, extension: str, content_type: str, prefix: str, hash: str, name: str) -> StorageObject:
+        if not self.content_addressed:
+            return StorageObject(data, extension, content_type)
+        return StorageObject(data, extension, content_type, object_name=Photo.content_key(prefix, hash, name), skip_if_exists=True)
+
+    def _save_people(self, unit_of_work: UnitOfWork, stored: List[Tuple[int, Photo, PhotoAnalysis, List[str]]]):
+        # El número de la cara dentro de su foto forma parte de su clave en el storage
+        faces = [(photo, face, index) for _, photo, analysis, _ in stored for index, face in enumerate(analysis.faces)]
+        if not faces:
+            return
+        if self.defer_face_identity:
+            self._save_unresolved_faces(unit_of_work, faces)
+            return
+
+        with self._timer("vectors"):
+            result, ids_by_face, error = self.people_vector_repository.search_many([face["embedding"] for _, face, _ in faces])
+        if not result:
+            print(f"Error al buscar el ID de la persona: {error}")
+            return
+
+        # Las caras de personas nuevas de todo el lote se suben a la vez
+        unknown = [position for position, person_ids in enumerate(ids_by_face) if len(person_ids) < 1]
+        uploads = dict(zip(unknown, self._upload_faces(unit_of_work, [faces[position] for position in unknown])))
+
+        new_vectors: List[List[float]] = []
+        new_ids: List[str] = []
+        photo_people: List[PhotoPeople] = []
+        face_rows: List[Face] = []
+        for position, ((photo, face, _), person_ids) in enumerate(zip(faces, ids_by_face)):
+            people_path = None
+            if len(person_ids) < 1:
+                result, people_path, error, _ = uploads[position]
+                if not result:
+                    print(f"Error al subir la cara de la persona: {error}")
+                    continue
+                with self._timer("db"):
+                    people = self.people_repository.create_people(People(id="", label="", web_path=people_path))
+                new_vectors.append(face["embedding"])
+                new_ids.append(people.id)
+                photo.people.append(people)
+                people_id = people.id
+            else:
+                people_id = person_ids[0]
+            photo_people.append(PhotoPeople(photo_id=photo.id, people_id=people_id))
+            face_rows.append(Face(id="", photo_id=photo.id, people_id=people_id, embedding=face["embedding"], web_path=people_path))
+        with self._timer("vectors"):
+            self.people_vector_repository.add_vectors(new_vectors, new_ids)
+        unit_of_work.on_rollback(lambda: self.people_vector_repository.delete_many(new_ids))
+        with self._timer("db"):
+            self.photo_people_repository.create_photo_people_bulk(photo_people)
+            self.face_repository.create_faces_bulk(face_rows)
+
+    def _save_unresolved_faces(self, unit_of_work: UnitOfWork, faces: List[Tuple[Photo, dict, int]]):
+        """Guarda las caras sin persona; `ClusterFaces` las agrupa después sin consultar Qdrant por cara."""
+        face_rows: List[Face] = []
+        uploads = self._upload_faces(unit_of_work, faces)
+        for (photo, face, _), (result, face_path, error, _) in zip(faces, uploads):
+            if not result:
+                print(f"Error al subir la cara de la persona: {error}")
+                continue
+            face_rows.append(Face(id="", photo_id=photo.id, people_id=None, embedding=face["embedding"], web_path=face_path))
+        with self._timer("db"):
+            self.face_repository.create_faces_bulk(face_rows)
+
+    def _upload_faces(self, unit_of_work: UnitOfWork, faces: List[Tuple[Photo, dict, int]]) -> List[tuple[bool, str, str, bool]]:
+        files = [
+            self._storage_object(face["face_image"], "webp", "image/webp", "faces", photo.hash, f"{photo.hash}-{index}.webp")
+            for photo, face, index in faces
+        ]
+        with self._timer("storage"):
+            uploads = self.people_storage_repository.upload_files(files)
+        self._delete_on_rollback(unit_of_work, self.people_storage_repository, files, uploads)
+        return uploads
+
+    @staticmethod
+    def _delete_on_rollback(
+        unit_of_work: UnitOfWork,
+        storage_repository: StorageRepository,
+        files: List[StorageObject],
+        uploads: List[tuple[bool, str, str, bool]]):
+        """
+        Al deshacer solo se borran los objetos subidos con una clave aleatoria.
+        Una clave derivada del hash (modo content, miniaturas) puede ser la de
+        una foto ya guardada o la de otra importación del mismo archivo que
+        sigue en curso: si esta falla, el objeto se queda huérfano.
+        """
+        for file, (result, path, _, written) in zip(files, uploads):
+            if result and written and file.object_name is None:
+                unit_of_work.on_rollback(lambda path=path: storage_repository.delete_file(path))
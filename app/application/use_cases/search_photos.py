@@ -0,0 +1,99 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from app.domain.interfaces.cache_service import CacheService
+from app.domain.interfaces.embedding_service import EmbeddingService
+from app.domain.interfaces.image_decoder_service import ImageDecoderService
+from app.domain.models.photo import Photo
+from app.domain.repositories.photo_repository import PhotoRepository
+from app.domain.repositories.vector_repository import VectorRepository
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    photo: Photo
+    score: float
+
+    def to_dict(self):
+        return {
+            'photo': self.photo.to_dict(),
+            'score': self.score,
+        }
+
+
+@dataclass(frozen=True)
+class SearchPage:
+    results: List[SearchResult] = field(default_factory=list)
+    # Offset de la siguiente página; None si no hay más
+    next_offset: int | None = None
+
+    def to_dict(self):
+        return {
+            'results': [result.to_dict() for result in self.results],
+            'next_offset': self.next_offset,
+        }
+
+
+class SearchPhotos:
+    """
+    Búsqueda semántica sobre `photo_vectors`: por texto con el encoder de
+    texto de CLIP o por una imagen de ejemplo. Los embeddings de las
+    consultas se guardan en `embedding_cache` por texto normalizado o por
+    SHA-256 de la imagen, así que repetir o paginar una búsqueda no vuelve a
+    pasar por el modelo.
+    """
+    MAX_LIMIT = 100
+
+    def __init__(self,
+        embedding_service: EmbeddingService,
+        image_decoder_service: ImageDecoderService,
+        photo_vector_repository: VectorRepository,
+        photo_repository: PhotoRepository,
+        embedding_cache: CacheService,
+        preview_size: int = 224):
+        self.embedding_service = embedding_service
+        self.image_decoder_service = image_decoder_service
+        self.photo_vector_repository = photo_vector_repository
+        self.photo_repository = photo_repository
+        self.embedding_cache = embedding_cache
+        # Misma reducción que en la importación para que los embeddings sean comparables
+        self.preview_size = preview_size
+
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def search_text(self, text: str, offset: int = 0, limit: int = 20) -> tuple[bool, SearchPage | None, str]:
+        query = self.normalize_query(text)
+        if not query:
+            return False, None, "La búsqueda está vacía"
+        embedding = self.embedding_cache.get(("text", query))
+        if embedding is None:
+            result, embedding, error = self.embedding_service.get_text_embedding(query)
+            if not result:
+                return False, None, error
+            self.embedding_cache.set(("text", query), embedding)
+        return self._search(embedding, offset, limit)
+
+    def search_image(self, file_content: bytes, hash: str, offset: int = 0, limit: int = 20) -> tuple[bool, SearchPage | None, str]:
+        embedding = self.embedding_cache.get(("image", hash))
+        if embedding is None:
+            result, image, error = self.image_decoder_service.decode(file_content)
+            if not result:
+                return False, None, error
+            result, embedding, error = self.embedding_service.get_image_embedding(image.resized(self.preview_size))
+            if not result:
+                return False, None, error
+            self.embedding_cache.set(("image", hash), embedding)
+        return self._search(embedding, offset, limit)
+
+    def _search(self, embedding: List[float], offset: int, limit: int) -> tuple[bool, SearchPage | None, str]:
+        offset = max(0, offset)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        result, scored, error = self.photo_vector_repository.search_scored(embedding, top_k=limit, offset=offset)
+        if not result:
+            return False, None, error
+        photos = {photo.id: photo for photo in self.photo_repository.get_photos([id for id, _ in scored])}
+        results = [SearchResult(photo=photos[id], score=score) for id, score in scored if id in photos]
+        next_offset = offset + limit if len(scored) == limit else None
+        return True, SearchPage(results=results, next_offset=next_offset), ""
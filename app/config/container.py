@@ -1,16 +1,381 @@
+import functools
+import math
+import threading
+from datetime import datetime
+from typing import Dict, List, Set
+
 from app.config.settings import Settings
 from dependency_injector import containers, providers
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
+
+from app.application.use_cases.analyze_photo import AnalyzePhoto
+from app.infrastructure.db.schema import ensure_schema
+from app.infrastructure.repositories.photo_repository_orm import PhotoRepositoryORM
+from app.infrastructure.repositories.vector_db_local import VectorDBLocal
+from app.infrastructure.services.cached_embedding_service_imple import CachedEmbeddingServiceImpl
+from app.infrastructure.services.embedding_cache_imple import MmapEmbeddingCacheImpl
+from app.infrastructure.services.embedding_service_imple import EmbeddingServiceImpl
+from app.infrastructure.services.extension_service_imple import ExtensionServiceImpl
+from app.infrastructure.services.fastembed_embedding_service_imple import FastEmbedEmbeddingServiceImpl
+from app.infrastructure.services.hashing_service_imple import HashingServiceImpl
+from app.infrastructure.services.image_decoder_service_imple import ImageDecoderServiceImpl
+from app.infrastructure.services.known_hash_filter_imple import KnownHashFilterImpl
+from app.infrastructure.services.lru_cache_service_imple import LRUCacheServiceImpl
+from app.infrastructure.services.metrics_service_imple import PrometheusMetricsServiceImpl
+from app.infrastructure.services.perceptual_hash_index_imple import BKTreePerceptualHashIndex
+from app.infrastructure.services.perceptual_hash_service_imple import PerceptualHashServiceImpl
+from app.infrastructure.services.micro_batch_embedding_service_imple import MicroBatchEmbeddingServiceImpl
+from app.infrastructure.services.photo_recogniction_service_imple import PhotoRecognictionServiceImpl
+
+
+def _enable_sqlite_savepoints(engine: Engine):
+    """
+    pysqlite abre las transacciones por su cuenta y rompe los SAVEPOINT que usa
+    la unidad de trabajo; se desactiva y el BEGIN lo emite SQLAlchemy.
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+
+def _init_engine(db_url: str):
+    """Crea el engine una sola vez y lo libera al apagar el contenedor."""
+    engine: Engine = create_engine(db_url, pool_pre_ping=True)
+    if engine.dialect.name == "sqlite":
+        _enable_sqlite_savepoints(engine)
+    ensure_schema(engine)
+    yield engine
+    engine.dispose()
+
+
+def _init_micro_batch_embedding_service(embedding_service, batch_size: int, max_wait_ms: float):
+    """Arranca el hilo de micro-batching y lo detiene al apagar el contenedor."""
+    service = MicroBatchEmbeddingServiceImpl(embedding_service, batch_size=batch_size, max_wait_ms=max_wait_ms)
+    yield service
+    service.close()
+
+
+def _init_embedding_cache(directory: str, max_mb: int) -> MmapEmbeddingCacheImpl | None:
+    """Caché de embeddings en disco; con EMBEDDING_CACHE_DIR vacío no hay caché."""
+    if not directory:
+        return None
+    return MmapEmbeddingCacheImpl(directory, max_bytes=max_mb * 1024 * 1024)
+
+
+def _embedding_model_version(backend: str, quantize: bool) -> str:
+    """
+    Versión del modelo en la clave de la caché de embeddings: el backend, la
+    versión de su librería y, con fastembed, si los pesos están en int8.
+    """
+    from importlib import metadata
+
+    package = "fastembed" if backend == "fastembed" else "sentence-transformers"
+    try:
+        version = metadata.version(package)
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    int8 = "-int8" if backend == "fastembed" and quantize else ""
+    return f"{backend}-{version}{int8}"
+
+
+def _init_cached_embedding_service(embedding_service, embedding_cache, model_name: str, model_version: str):
+    if embedding_cache is None:
+        return embedding_service
+    return CachedEmbeddingServiceImpl(embedding_service, embedding_cache, model_name, model_version)
+
+
+def _known_hashes(session_factory, since: datetime | None) -> List[str]:
+    session = session_factory()
+    try:
+        return list(PhotoRepositoryORM(session).get_all_hashes(since))
+    finally:
+        session.close()
+
+
+def _init_known_hash_filter(session_factory) -> KnownHashFilterImpl:
+    """Carga en memoria los hashes de las fotos ya importadas y sigue leyendo los que importen otros procesos."""
+    known_hash_filter = KnownHashFilterImpl(source=functools.partial(_known_hashes, session_factory))
+    known_hash_filter.refresh()
+    return known_hash_filter
+
+
+def _init_perceptual_hash_index(session_factory, max_distance: int) -> BKTreePerceptualHashIndex:
+    """Reconstruye el BK-tree con los hashes perceptuales guardados en la base de datos."""
+    perceptual_hash_index = BKTreePerceptualHashIndex(max_distance=max_distance)
+    session = session_factory()
+    try:
+        perceptual_hash_index.load(PhotoRepositoryORM(session).get_all_phashes())
+    finally:
+        session.close()
+    return perceptual_hash_index
+
+
+def _init_storage_repository(**kwargs):
+    """minio y urllib3 se importan al crear el repositorio, no al cargar el contenedor."""
+    from app.infrastructure.repositories.storage_repository_minio import StorageRepositoryMinio
+
+    return StorageRepositoryMinio(**kwargs)
+
+
+def _init_qdrant_collection_config(settings: Settings):
+    from app.infrastructure.repositories.vector_db_qdrant import QdrantCollectionConfig
+
+    return QdrantCollectionConfig.from_settings(settings)
+
+
+def _init_vector_db_qdrant(**kwargs):
+    """qdrant_client tarda casi un segundo en importarse; con VECTOR_BACKEND=local no se carga nunca."""
+    from app.infrastructure.repositories.vector_db_qdrant import VectorDBQdrant
+
+    return VectorDBQdrant(**kwargs)
+
+
+def _face_score_threshold(distance: str, tolerance: float) -> float:
+    """
+    Traduce la tolerancia de face_recognition (distancia euclídea máxima entre
+    encodings) al umbral de puntuación de la colección de caras. Los encodings
+    de dlib tienen norma cercana a 1, así que d² ≈ 2 - 2·coseno.
+    """
+    if distance == "Euclid":
+        return tolerance
+    return 1 - tolerance ** 2 / 2
+
+
+def _photo_score_threshold(distance: str, similarity: float) -> float:
+    """
+    Traduce la similitud coseno mínima entre dos fotos duplicadas al umbral de
+    puntuación de la colección de fotos. Los embeddings de CLIP están
+    normalizados, así que d = √(2 - 2·coseno) y el producto escalar es el coseno.
+    """
+    if distance == "Euclid":
+        return math.sqrt(max(2 - 2 * similarity, 0))
+    return similarity
+
+
+def _eager_thumbnail_sizes(sizes: Dict[int, int], lazy_sizes: Set[int]) -> Dict[int, int]:
+    """Miniaturas que se generan al importar; las perezosas se generan al pedirlas."""
+    return {size: quality for size, quality in sizes.items() if size not in lazy_sizes}
+
+
 class Container(containers.DeclarativeContainer):
+    """
+    Contenedor de servicios del proceso.
+
+    Todos los providers son perezosos: el engine, el filtro de hashes conocidos,
+    el índice de hashes perceptuales, los clientes de MinIO/Qdrant y el modelo
+    CLIP se crean la primera vez que se piden y luego se reutilizan en todas
+    las fotos procesadas por el proceso. Las librerías pesadas (torch, dlib,
+    minio, qdrant_client) tampoco se importan hasta entonces, así que cargar
+    el contenedor es rápido.
+    """
     config = providers.Singleton(Settings)
-    engine = create_engine(
-        config.provided.db_url
-        )
-    SessionLocal = sessionmaker(bind=engine)
-    session = providers.Singleton(SessionLocal)
-    
-    
-    
+
+    engine = providers.Resource(_init_engine, db_url=config.provided.db_url)
+    session_factory = providers.Singleton(sessionmaker, bind=engine)
+
+    hashing_service = providers.Singleton(HashingServiceImpl)
+    known_hash_filter = providers.ThreadSafeSingleton(_init_known_hash_filter, session_factory=session_factory)
+    perceptual_hash_service = providers.Singleton(PerceptualHashServiceImpl, hash_size=config.provided.hash_size)
+    perceptual_hash_index = providers.ThreadSafeSingleton(
+        _init_perceptual_hash_index,
+        session_factory=session_factory,
+        max_distance=config.provided.duplicate_threshold)
+    embedding_cache = providers.ThreadSafeSingleton(
+        _init_embedding_cache,
+        directory=config.provided.embedding_cache_dir,
+        max_mb=config.provided.embedding_cache_max_mb)
+    extension_service = providers.Singleton(ExtensionServiceImpl)
+    image_decoder_service = providers.Singleton(ImageDecoderServiceImpl, extension_service=extension_service)
+    photo_recogniction_service = providers.Singleton(
+        PhotoRecognictionServiceImpl,
+        model=config.provided.face_recognition_model,
+        detection_size=config.provided.face_detection_size,
+        upsample=config.provided.face_recognition_upsample,
+        num_jitters=config.provided.face_recognition_jitters,
+        batch_size=config.provided.face_recognition_batch_size,
+        encoding_workers=config.provided.thumbnail_workers,
+        embedding_cache=embedding_cache)
+    eager_thumbnail_sizes = providers.Callable(
+        _eager_thumbnail_sizes,
+        sizes=config.provided.thumbnail_sizes,
+        lazy_sizes=config.provided.thumbnail_lazy_sizes)
+    analyze_photo = providers.Singleton(
+        AnalyzePhoto,
+        image_decoder_service=image_decoder_service,
+        perceptual_hash_service=perceptual_hash_service,
+        photo_recogniction_service=photo_recogniction_service,
+        face_batch_size=config.provided.face_recognition_batch_size,
+        thumbnail_sizes=eager_thumbnail_sizes)
+    # EMBEDDING_BACKEND elige entre PyTorch (sentence-transformers) y ONNX Runtime (fastembed)
+    embedding_model_service = providers.Selector(
+        config.provided.embedding_backend,
+        sentence_transformers=providers.ThreadSafeSingleton(
+            EmbeddingServiceImpl,
+            model_name=config.provided.embedding_model_name,
+            batch_size=config.provided.batch_size),
+        fastembed=providers.ThreadSafeSingleton(
+            FastEmbedEmbeddingServiceImpl,
+            model_name=config.provided.embedding_model_name,
+            batch_size=config.provided.batch_size,
+            threads=config.provided.embedding_threads,
+            quantize=config.provided.embedding_quantize))
+    # Las fotos ya vistas (por SHA-256) se leen de la caché sin pasar por el modelo
+    embedding_service = providers.ThreadSafeSingleton(
+        _init_cached_embedding_service,
+        embedding_service=embedding_model_service,
+        embedding_cache=embedding_cache,
+        model_name=config.provided.embedding_model_name,
+        model_version=providers.Callable(
+            _embedding_model_version,
+            backend=config.provided.embedding_backend,
+            quantize=config.provided.embedding_quantize))
+    micro_batch_embedding_service = providers.Resource(
+        _init_micro_batch_embedding_service,
+        embedding_service=embedding_service,
+        batch_size=config.provided.batch_size,
+        max_wait_ms=config.provided.embedding_batch_wait_ms)
+
+    storage_repository = providers.ThreadSafeSingleton(
+        _init_storage_repository,
+        endpoint=config.provided.minio_endpoint,
+        access_key=config.provided.minio_access_key,
+        secret_key=config.provided.minio_secret_key,
+        bucket_name=config.provided.minio_bucket_name,
+        secure=config.provided.minio_secure,
+        max_connections=config.provided.minio_max_connections,
+        upload_workers=config.provided.minio_upload_workers,
+        part_size=config.provided.minio_part_size)
+
+    metrics_service = providers.ThreadSafeSingleton(PrometheusMetricsServiceImpl)
+
+    read_cache = providers.ThreadSafeSingleton(
+        LRUCacheServiceImpl,
+        max_size=config.provided.read_cache_size,
+        ttl=config.provided.read_cache_ttl)
+    query_embedding_cache = providers.ThreadSafeSingleton(
+        LRUCacheServiceImpl,
+        max_size=config.provided.search_embedding_cache_size,
+        ttl=config.provided.search_embedding_cache_ttl)
+
+    qdrant_collection_config = providers.Singleton(_init_qdrant_collection_config, settings=config)
+    face_score_threshold = providers.Callable(
+        _face_score_threshold,
+        distance=config.provided.distance,
+        tolerance=config.provided.face_recognition_tolerance)
+    photo_score_threshold = providers.Callable(
+        _photo_score_threshold,
+        distance=config.provided.distance,
+        similarity=config.provided.photo_duplicate_similarity)
+    # VECTOR_BACKEND elige entre el servidor Qdrant y la base vectorial embebida
+    photo_vector_repository = providers.Selector(
+        config.provided.vector_backend,
+        qdrant=providers.ThreadSafeSingleton(
+            _init_vector_db_qdrant,
+            collection_name="photo_vectors",
+            vector_size=config.provided.vector_size_photo,
+            url=config.provided.qdrant_url,
+            api_key=config.provided.qdrant_api_key,
+            distance=config.provided.distance,
+            collection_config=qdrant_collection_config,
+            score_threshold=photo_score_threshold),
+        local=providers.ThreadSafeSingleton(
+            VectorDBLocal,
+            collection_name="photo_vectors",
+            vector_size=config.provided.vector_size_photo,
+            data_dir=config.provided.vector_data_dir,
+            distance=config.provided.distance,
+            dtype=config.provided.vector_dtype,
+            approximate=config.provided.vector_approximate,
+            approximate_min_size=config.provided.vector_approximate_min_size,
+            lists=config.provided.vector_ivf_lists,
+            probes=config.provided.vector_ivf_probes,
+            score_threshold=photo_score_threshold))
+    people_vector_repository = providers.Selector(
+        config.provided.vector_backend,
+        qdrant=providers.ThreadSafeSingleton(
+            _init_vector_db_qdrant,
+            collection_name="people_vectors",
+            vector_size=config.provided.vector_size_people,
+            url=config.provided.qdrant_url,
+            api_key=config.provided.qdrant_api_key,
+            distance=config.provided.distance,
+            collection_config=qdrant_collection_config,
+            score_threshold=face_score_threshold),
+        local=providers.ThreadSafeSingleton(
+            VectorDBLocal,
+            collection_name="people_vectors",
+            vector_size=config.provided.vector_size_people,
+            data_dir=config.provided.vector_data_dir,
+            distance=config.provided.distance,
+            dtype=config.provided.vector_dtype,
+            approximate=config.provided.vector_approximate,
+            approximate_min_size=config.provided.vector_approximate_min_size,
+            lists=config.provided.vector_ivf_lists,
+            probes=config.provided.vector_ivf_probes,
+            score_threshold=face_score_threshold))
+
+
+_container: Container | None = None
+_container_lock = threading.Lock()
+_ready = threading.Event()
+
+
+def get_container() -> Container:
+    """Devuelve el contenedor compartido del proceso, creándolo si no existe."""
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = Container()
+    return _container
+
+
+def warm_up(container: Container | None = None) -> None:
+    """
+    Instancia por adelantado los servicios pesados (engine, hashes conocidos,
+    buckets, colecciones y modelo de embeddings) para que la primera petición
+    no pague su coste.
+    """
+    container = container or get_container()
+    container.engine()
+    container.known_hash_filter()
+    container.perceptual_hash_index()
+    container.storage_repository()
+    container.photo_vector_repository()
+    container.people_vector_repository()
+    container.embedding_service()
+    _ready.set()
+
+
+def preload_analysis_libraries() -> None:
+    """
+    Importa las librerías de las etapas de CPU. Los servicios las importan la
+    primera vez que las usan; los procesos dedicados a analizar fotos lo hacen
+    al arrancar para que la primera foto no pague ese coste.
+    """
+    import face_recognition  # noqa: F401
+    import imagehash  # noqa: F401
+    import pillow_heif  # noqa: F401
+
+
+def is_ready() -> bool:
+    """Indica si el contenedor del proceso ya tiene los servicios pesados cargados."""
+    return _ready.is_set()
 
 
+def shutdown() -> None:
+    """Libera el engine y descarta los servicios compartidos del proceso."""
+    global _container
+    with _container_lock:
+        _ready.clear()
+        if _container is None:
+            return
+        _container.shutdown_resources()
+        _container.reset_singletons()
+        _container = None
@@ -3,10 +3,10 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import List, Set
+from typing import Annotated, Any, Dict, List, Set
 
-from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic import Field, field_validator
+from pydantic_settings import BaseSettings, NoDecode
 from dotenv import load_dotenv
 
 # Cargar variables de entorno desde .env
@@ -34,6 +34,54 @@ class Settings(BaseSettings):
         description="Batch size for processing images"
     )
     
+    # API Configuration
+    api_cpu_workers: int = Field(
+        default=int(os.getenv("API_CPU_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))),
+        description="Number of worker processes for the CPU-bound stages of /upload"
+    )
+    api_io_workers: int = Field(
+        default=int(os.getenv("API_IO_WORKERS", "16")),
+        description="Number of threads for the I/O-bound stages of /upload (storage, DB, vectors)"
+    )
+    job_workers: int = Field(
+        default=int(os.getenv("JOB_WORKERS", "2")),
+        description="Number of threads consuming the ingest job queue"
+    )
+    job_max_attempts: int = Field(
+        default=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+        description="Times an ingest job is tried before it is marked as failed and its upload deleted"
+    )
+    job_lease_seconds: float = Field(
+        default=float(os.getenv("JOB_LEASE_SECONDS", "900")),
+        description="Seconds after which a running job is considered abandoned and requeued on startup"
+    )
+    read_cache_size: int = Field(
+        default=int(os.getenv("READ_CACHE_SIZE", "1024")),
+        description="Responses of the read endpoints kept in the in-process LRU cache (0 = disabled)"
+    )
+    read_cache_ttl: float = Field(
+        default=float(os.getenv("READ_CACHE_TTL", "30")),
+        description="Seconds a cached read response stays valid. Imports through this API process clear the cache; "
+                    "changes made by other processes (CLI ingest, cluster-faces, other API replicas) "
+                    "can stay invisible for up to this long"
+    )
+    search_image_max_bytes: int = Field(
+        default=int(os.getenv("SEARCH_IMAGE_MAX_BYTES", str(20 * 1024 * 1024))),
+        description="Largest query image accepted by /search/image; bigger uploads are rejected with 413"
+    )
+    search_embedding_cache_size: int = Field(
+        default=int(os.getenv("SEARCH_EMBEDDING_CACHE_SIZE", "4096")),
+        description="Query embeddings (normalized text or image SHA-256) kept in memory for /search"
+    )
+    search_embedding_cache_ttl: float = Field(
+        default=float(os.getenv("SEARCH_EMBEDDING_CACHE_TTL", "3600")),
+        description="Seconds a cached query embedding stays valid"
+    )
+    upload_spool_dir: str = Field(
+        default=os.getenv("UPLOAD_SPOOL_DIR", str(BASE_DIR / "spool")),
+        description="Folder where uploaded files wait until their job is processed"
+    )
+    
     # MinIO Configuration
     minio_endpoint: str = Field(
         default=os.getenv("MINIO_ENDPOINT", "localhost:9000"),
@@ -55,6 +103,23 @@ class Settings(BaseSettings):
         default=os.getenv("MINIO_SECURE", "false").lower() == "true",
         description="Whether to use HTTPS for MinIO connection"
     )
+    storage_key_mode: str = Field(
+        default=os.getenv("STORAGE_KEY_MODE", "uuid"),
+        description="uuid: random object names; content: keys derived from the photo SHA-256 "
+                    "under sharded prefixes, skipping uploads that already exist"
+    )
+    minio_max_connections: int = Field(
+        default=int(os.getenv("MINIO_MAX_CONNECTIONS", "32")),
+        description="Size of the pooled HTTP connections shared by all MinIO requests"
+    )
+    minio_upload_workers: int = Field(
+        default=int(os.getenv("MINIO_UPLOAD_WORKERS", "16")),
+        description="Uploads issued concurrently (the original, its WebP, thumbnails and face crops)"
+    )
+    minio_part_size: int = Field(
+        default=int(os.getenv("MINIO_PART_SIZE", str(16 * 1024 * 1024))),
+        description="Objects larger than this many bytes are sent as parallel multipart uploads (minimum 5 MiB)"
+    )
     
     # Face Recognition Configuration
     face_recognition_tolerance: float = Field(
@@ -66,11 +131,84 @@ class Settings(BaseSettings):
         description="Face recognition model to use (hog or cnn)"
     )
     
+    face_detection_size: int = Field(
+        default=int(os.getenv("FACE_DETECTION_SIZE", "1600")),
+        description="Longest side in pixels of the downscaled copy used for face detection (0 = full resolution)"
+    )
+    face_recognition_upsample: int = Field(
+        default=int(os.getenv("FACE_RECOGNITION_UPSAMPLE", "1")),
+        description="Times the detection image is upsampled to find smaller faces"
+    )
+    face_recognition_jitters: int = Field(
+        default=int(os.getenv("FACE_RECOGNITION_JITTERS", "1")),
+        description="Times each face is re-sampled when computing its encoding"
+    )
+    face_recognition_batch_size: int = Field(
+        default=int(os.getenv("FACE_RECOGNITION_BATCH_SIZE", "0")),
+        description="Photos per batched CNN face detection call (cnn model only, 0 = disabled)"
+    )
+    face_identity_mode: str = Field(
+        default=os.getenv("FACE_IDENTITY_MODE", "immediate"),
+        description="immediate: match each face against people_vectors while ingesting; "
+                    "deferred: store faces unassigned and resolve them with the cluster-faces command"
+    )
+    face_cluster_min_samples: int = Field(
+        default=int(os.getenv("FACE_CLUSTER_MIN_SAMPLES", "3")),
+        description="Minimum faces within the tolerance to form a DBSCAN cluster core; faces outside every cluster stay unassigned (1 or 2 chain different people together)"
+    )
+
+    # Thumbnail Configuration
+    # NoDecode: pydantic-settings decodificaría el valor como JSON en lugar de con el formato de .env.example
+    thumbnail_sizes: Annotated[Dict[int, int], NoDecode] = Field(
+        default=os.getenv("THUMBNAIL_SIZES", "256:80,1024:85,2048:85"),
+        validate_default=True,
+        description="WebP thumbnails to render as comma-separated longest_side:quality pairs"
+    )
+    thumbnail_lazy_sizes: Annotated[Set[int], NoDecode] = Field(
+        default=os.getenv("THUMBNAIL_LAZY_SIZES", "2048"),
+        validate_default=True,
+        description="Comma-separated thumbnail sizes rendered on first request instead of at ingest"
+    )
+    thumbnail_workers: int = Field(
+        default=int(os.getenv("THUMBNAIL_WORKERS", "4")),
+        description="Threads encoding the thumbnails of a photo in parallel"
+    )
+
+    @field_validator("thumbnail_sizes", mode="before")
+    @classmethod
+    def _parse_thumbnail_sizes(cls, value: Any) -> Any:
+        """`256:80,1024:85` -> {256: 80, 1024: 85}"""
+        if not isinstance(value, str):
+            return value
+        sizes = {}
+        for item in value.split(","):
+            if not item.strip():
+                continue
+            size, separator, quality = item.partition(":")
+            if not separator:
+                raise ValueError(f"Se esperaba lado:calidad y no {item.strip()!r}")
+            sizes[int(size)] = int(quality)
+        return sizes
+
+    @field_validator("thumbnail_lazy_sizes", mode="before")
+    @classmethod
+    def _parse_thumbnail_lazy_sizes(cls, value: Any) -> Any:
+        """`2048` o `1024,2048` -> {1024, 2048}"""
+        if isinstance(value, int):
+            return {value}
+        if not isinstance(value, str):
+            return value
+        return {int(size) for size in value.split(",") if size.strip()}
+    
     # Duplicate Detection Configuration
     duplicate_threshold: int = Field(
         default=int(os.getenv("DUPLICATE_THRESHOLD", "10")),
         description="Threshold for duplicate detection"
     )
+    photo_duplicate_similarity: float = Field(
+        default=float(os.getenv("PHOTO_DUPLICATE_SIMILARITY", "0.95")),
+        description="Minimum CLIP cosine similarity for a photo to be recorded as a duplicate of a stored one"
+    )
     hash_size: int = Field(
         default=int(os.getenv("HASH_SIZE", "8")),
         description="Hash size for image hashing"
@@ -103,6 +241,36 @@ class Settings(BaseSettings):
         description="Name of the embedding model to use"
     )
 
+    embedding_backend: str = Field(
+        default=os.getenv("EMBEDDING_BACKEND", "sentence_transformers"),
+        description="sentence_transformers: PyTorch model; fastembed: ONNX Runtime export of the same model (CPU, less memory)"
+    )
+
+    embedding_threads: int = Field(
+        default=int(os.getenv("EMBEDDING_THREADS", "0")),
+        description="ONNX Runtime threads per embedding model (fastembed backend, 0 = one per core)"
+    )
+
+    embedding_quantize: bool = Field(
+        default=os.getenv("EMBEDDING_QUANTIZE", "false").lower() == "true",
+        description="Use int8-quantized weights (fastembed backend); quantized once and kept next to the model cache"
+    )
+
+    embedding_batch_wait_ms: float = Field(
+        default=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "10")),
+        description="Maximum time a request waits to be grouped with others into one embedding batch"
+    )
+
+    embedding_cache_dir: str = Field(
+        default=os.getenv("EMBEDDING_CACHE_DIR", str(BASE_DIR / "embedding-cache")),
+        description="Folder of the on-disk cache of photo and face embeddings by SHA-256 and model (empty = disabled)"
+    )
+
+    embedding_cache_max_mb: int = Field(
+        default=int(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024")),
+        description="Size limit of the embedding cache; least recently used entries are evicted above it"
+    )
+
     vector_size_photo: int = Field(
         default=int(os.getenv("VECTOR_SIZE_PHOTO", "512")),
         description="Size of the vector"
@@ -117,6 +285,92 @@ class Settings(BaseSettings):
         default=os.getenv("DISTANCE", "Cosine"),
         description="Distance to use for the vector"
     )
+
+    # Vector Database Configuration
+    vector_backend: str = Field(
+        default=os.getenv("VECTOR_BACKEND", "qdrant"),
+        description="Vector database backend (qdrant or local)"
+    )
+    qdrant_url: str = Field(
+        default=os.getenv("QDRANT_URL", "http://localhost:6333"),
+        description="Qdrant server URL"
+    )
+    qdrant_api_key: str = Field(
+        default=os.getenv("QDRANT_API_KEY", "super_secret_api_key"),
+        description="Qdrant API key"
+    )
+    qdrant_quantization: str = Field(
+        default=os.getenv("QDRANT_QUANTIZATION", "none"),
+        description="Vector quantization of the Qdrant collections (none, scalar or binary)"
+    )
+    qdrant_quantization_quantile: float = Field(
+        default=float(os.getenv("QDRANT_QUANTIZATION_QUANTILE", "0.99")),
+        description="Quantile used to compute the int8 scalar quantization bounds"
+    )
+    qdrant_quantization_always_ram: bool = Field(
+        default=os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true",
+        description="Keep the quantized vectors in RAM"
+    )
+    qdrant_on_disk: bool = Field(
+        default=os.getenv("QDRANT_ON_DISK", "false").lower() == "true",
+        description="Keep the original vectors on disk (memmap) instead of RAM"
+    )
+    qdrant_rescore: bool = Field(
+        default=os.getenv("QDRANT_RESCORE", "true").lower() == "true",
+        description="Rescore quantized search candidates with the original vectors"
+    )
+    qdrant_oversampling: float = Field(
+        default=float(os.getenv("QDRANT_OVERSAMPLING", "2.0")),
+        description="Quantized candidates fetched per requested result before rescoring"
+    )
+    qdrant_hnsw_m: int = Field(
+        default=int(os.getenv("QDRANT_HNSW_M", "0")),
+        description="HNSW edges per node (0 = Qdrant default)"
+    )
+    qdrant_hnsw_ef_construct: int = Field(
+        default=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "0")),
+        description="HNSW neighbours considered while building the index (0 = Qdrant default)"
+    )
+    qdrant_hnsw_ef: int = Field(
+        default=int(os.getenv("QDRANT_HNSW_EF", "0")),
+        description="HNSW neighbours considered per search (0 = Qdrant default)"
+    )
+    qdrant_hnsw_on_disk: bool = Field(
+        default=os.getenv("QDRANT_HNSW_ON_DISK", "false").lower() == "true",
+        description="Keep the HNSW graph on disk"
+    )
+    qdrant_indexing_threshold: int = Field(
+        default=int(os.getenv("QDRANT_INDEXING_THRESHOLD", "0")),
+        description="Segment size in KB above which Qdrant builds the HNSW index (0 = Qdrant default)"
+    )
+    qdrant_memmap_threshold: int = Field(
+        default=int(os.getenv("QDRANT_MEMMAP_THRESHOLD", "0")),
+        description="Segment size in KB above which Qdrant moves vectors to memmap storage (0 = Qdrant default)"
+    )
+    vector_data_dir: str = Field(
+        default=os.getenv("VECTOR_DATA_DIR", str(BASE_DIR / "vectors")),
+        description="Folder for the local vector backend collections"
+    )
+    vector_dtype: str = Field(
+        default=os.getenv("VECTOR_DTYPE", "float32"),
+        description="Storage type of the local vector backend (float32 or float16)"
+    )
+    vector_approximate: bool = Field(
+        default=os.getenv("VECTOR_APPROXIMATE", "false").lower() == "true",
+        description="Use an approximate IVF index in the local vector backend for large collections"
+    )
+    vector_approximate_min_size: int = Field(
+        default=int(os.getenv("VECTOR_APPROXIMATE_MIN_SIZE", "50000")),
+        description="Minimum collection size before the local backend switches to the IVF index"
+    )
+    vector_ivf_lists: int = Field(
+        default=int(os.getenv("VECTOR_IVF_LISTS", "0")),
+        description="Number of IVF lists (0 = square root of the collection size)"
+    )
+    vector_ivf_probes: int = Field(
+        default=int(os.getenv("VECTOR_IVF_PROBES", "8")),
+        description="Number of IVF lists scanned per search"
+    )
     
     
     model_config = {
@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Hashable
+
+
+class CacheService(ABC):
+    """Caché en memoria del proceso para resultados de consultas de solo lectura."""
+    @abstractmethod
+    def get(self, key: Hashable) -> Any | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any):
+        pass
+
+    @abstractmethod
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Devuelve el valor guardado o lo calcula con `loader` y lo guarda."""
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
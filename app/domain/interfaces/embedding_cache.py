@@ -0,0 +1,25 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+
+class EmbeddingCache(ABC):
+    """
+    Caché persistente de embeddings por contenido, con clave (SHA-256 del
+    archivo, modelo, versión del modelo). Cada entrada es una matriz de
+    float32 con una fila por vector: una para el embedding de la foto y una
+    por cara (que puede no tener ninguna fila si la foto no tiene caras).
+    """
+    def get(self, hash: str, model: str, version: str) -> np.ndarray | None:
+        return self.get_many([hash], model, version)[0]
+
+    @abstractmethod
+    def get_many(self, hashes: List[str], model: str, version: str) -> List[np.ndarray | None]:
+        """Filas guardadas de cada hash, o None en las posiciones que no están."""
+        pass
+
+    @abstractmethod
+    def put(self, hash: str, model: str, version: str, rows: np.ndarray):
+        """Guarda (o sustituye) las filas de un hash; `rows` tiene forma (n, dim)."""
+        pass
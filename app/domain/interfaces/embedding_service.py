@@ -1,8 +1,31 @@
 from abc import ABC, abstractmethod
 from typing import List, Tuple
 
+from app.domain.models.decoded_image import DecodedImage
+
 
 class EmbeddingService(ABC):
   @abstractmethod
   def get_embedding(self, file_content: bytes) -> Tuple[bool, List[float] | None, str]:
-    pass
\ No newline at end of file
+    pass
+
+  @abstractmethod
+  def get_embeddings(self, files_content: List[bytes]) -> Tuple[bool, List[List[float] | None] | None, str]:
+    """
+    Calcula los embeddings de varias imágenes en lotes.
+    Las imágenes que no se pueden decodificar devuelven None en su posición.
+    """
+    pass
+
+  @abstractmethod
+  def get_image_embedding(self, image: DecodedImage) -> Tuple[bool, List[float] | None, str]:
+    pass
+
+  @abstractmethod
+  def get_image_embeddings(self, images: List[DecodedImage]) -> Tuple[bool, List[List[float]] | None, str]:
+    pass
+
+  @abstractmethod
+  def get_text_embedding(self, text: str) -> Tuple[bool, List[float] | None, str]:
+    """Embedding de un texto en el mismo espacio que las imágenes (CLIP)."""
+    pass
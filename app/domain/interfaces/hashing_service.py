@@ -1,7 +1,17 @@
 from abc import ABC, abstractmethod
+from mmap import mmap
+from typing import BinaryIO
 
 
 class HashingService(ABC):
   @abstractmethod
-  def calculate_file_hash(self, file_content: bytes) -> str:
-    pass
\ No newline at end of file
+  def calculate_file_hash(self, file_content: bytes | mmap) -> str:
+    pass
+
+  @abstractmethod
+  def calculate_stream_hash(self, stream: BinaryIO) -> str:
+    pass
+
+  @abstractmethod
+  def calculate_path_hash(self, path: str) -> str:
+    pass
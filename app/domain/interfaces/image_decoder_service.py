@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+from mmap import mmap
+from typing import Tuple
+
+from app.domain.models.decoded_image import DecodedImage
+
+
+class ImageDecoderService(ABC):
+    @abstractmethod
+    def decode(self, file_content: bytes | mmap) -> Tuple[bool, DecodedImage | None, str]:
+        pass
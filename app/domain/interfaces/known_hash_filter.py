@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+
+class KnownHashFilter(ABC):
+    """
+    Filtro en memoria de los hashes ya importados.
+    No tiene falsos negativos para las fotos que conoce el proceso; las que
+    importan otros procesos aparecen al refrescarse, así que un False es una
+    pista y la restricción única del hash en la base de datos es la garantía.
+    """
+    @abstractmethod
+    def might_contain(self, hash: str) -> bool:
+        pass
+
+    @abstractmethod
+    def add(self, hash: str):
+        pass
+
+    @abstractmethod
+    def load(self, hashes: Iterable[str]):
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
@@ -0,0 +1,49 @@
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator
+
+
+class MetricsService(ABC):
+    """
+    Métricas del proceso: histogramas de tiempos por etapa y contadores.
+    Las etiquetas se pasan como argumentos con nombre, por ejemplo
+    `observe("stage_seconds", 0.2, stage="webp")`.
+    """
+    @abstractmethod
+    def observe(self, name: str, value: float, **labels: str):
+        """Añade una muestra al histograma `name`."""
+        pass
+
+    @abstractmethod
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        pass
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Mide en segundos el bloque `with` y lo añade al histograma `name`, también si falla."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @abstractmethod
+    def drain(self) -> Dict[str, Any]:
+        """Devuelve lo acumulado desde la última llamada y lo pone a cero. Se puede enviar a otro proceso."""
+        pass
+
+    @abstractmethod
+    def merge(self, snapshot: Dict[str, Any]):
+        """Suma las métricas devueltas por `drain` en otro proceso."""
+        pass
+
+    @abstractmethod
+    def render(self) -> str:
+        """Métricas en el formato de texto de Prometheus."""
+        pass
+
+    @abstractmethod
+    def summary_lines(self) -> Iterable[str]:
+        """Resumen legible para mostrar al terminar un comando."""
+        pass
@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Tuple
+
+
+class PerceptualHashIndex(ABC):
+    """Índice de hashes perceptuales consultado por distancia de Hamming."""
+
+    @abstractmethod
+    def add(self, id: str, hash: str):
+        pass
+
+    @abstractmethod
+    def remove(self, id: str):
+        pass
+
+    @abstractmethod
+    def load(self, items: Iterable[Tuple[str, str]]):
+        pass
+
+    @abstractmethod
+    def search(self, hash: str) -> List[str]:
+        """Devuelve los ids cuyo hash está a una distancia menor o igual al umbral configurado."""
+        pass
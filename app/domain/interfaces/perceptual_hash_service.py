@@ -0,0 +1,10 @@
+from abc import ABC, abstractmethod
+
+from app.domain.models.decoded_image import DecodedImage
+
+
+class PerceptualHashService(ABC):
+    @abstractmethod
+    def calculate_hash(self, image: DecodedImage) -> str:
+        """Devuelve el hash perceptual de la imagen en hexadecimal."""
+        pass
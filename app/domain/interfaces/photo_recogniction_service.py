@@ -2,16 +2,25 @@ from abc import ABC, abstractmethod
 from io import BytesIO
 from typing import Any, Dict, List
 
+from app.domain.models.decoded_image import DecodedImage
+
 
 class PhotoRecognictionService(ABC):
     @abstractmethod 
-    def recognize_faces(self) -> List[Dict[str, Any]]:
+    def recognize_faces(self, image: DecodedImage) -> List[Dict[str, Any]]:
+        pass
+    @abstractmethod
+    def recognize_faces_many(self, images: List[DecodedImage]) -> List[List[Dict[str, Any]]]:
         pass
     @abstractmethod
-    def get_faces_images(self) -> List[bytes]:
+    def get_faces_images(self, image: DecodedImage) -> List[bytes]:
         pass
 
 
     @abstractmethod
-    def to_webp(self, quality: int = 90) -> tuple[bool, BytesIO | None, str ]:
-        pass
\ No newline at end of file
+    def render_thumbnails(self, image: DecodedImage, sizes: Dict[int, int]) -> Dict[int, bytes]:
+        pass
+
+    @abstractmethod
+    def to_webp(self, image: DecodedImage, quality: int = 90) -> tuple[bool, BytesIO | None, str ]:
+        pass
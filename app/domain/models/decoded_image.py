@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+from PIL import Image
+
+
+@dataclass
+class DecodedImage:
+    """
+    Imagen decodificada una sola vez por foto y compartida por todas las etapas
+    (WebP, caras y embeddings).
+
+    `content_hash` es el SHA-256 del archivo original; las copias reducidas lo
+    conservan y la caché de embeddings lo usa como clave.
+    """
+    image: Image.Image
+    extension: str
+    mime_type: str
+    content_hash: str | None = None
+
+    @cached_property
+    def array(self) -> np.ndarray:
+        """Vista RGB en NumPy (alto, ancho, 3) de la imagen."""
+        return np.asarray(self.image)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.image.size
+
+    def resized(self, shortest_side: int) -> "DecodedImage":
+        """Copia reducida con el lado corto de `shortest_side` píxeles (no amplía)."""
+        width, height = self.image.size
+        scale = shortest_side / min(width, height)
+        if scale >= 1:
+            return self
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        image = self.image.resize(size, Image.Resampling.BICUBIC)
+        return DecodedImage(image=image, extension=self.extension, mime_type=self.mime_type, content_hash=self.content_hash)
+
+    def fitted(self, longest_side: int) -> "DecodedImage":
+        """Copia reducida con el lado largo de `longest_side` píxeles (no amplía)."""
+        width, height = self.image.size
+        scale = longest_side / max(width, height)
+        if scale >= 1:
+            return self
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        # reducing_gap reduce primero por bloques enteros: mucho más rápido en fotos grandes
+        image = self.image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+        return DecodedImage(image=image, extension=self.extension, mime_type=self.mime_type, content_hash=self.content_hash)
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Face:
+    """Una cara detectada en una foto, con su encoding y la persona asignada (si ya se resolvió)."""
+    id: str
+    photo_id: str
+    people_id: str | None
+    embedding: List[float] | np.ndarray
+    web_path: str | None = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'photo_id': self.photo_id,
+            'people_id': self.people_id,
+            'web_path': self.web_path,
+        }
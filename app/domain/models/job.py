@@ -0,0 +1,38 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict
+
+
+class JobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    status: str
+    file_path: str
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    photo_id: str | None = None
+    error: str | None = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    hash: str | None = None
+    attempts: int = 0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'photo_id': self.photo_id,
+            'error': self.error,
+            'timings': self.timings,
+            'attempts': self.attempts,
+        }
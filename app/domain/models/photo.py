@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import Dict, List
 
 from app.domain.models.people import People
 
@@ -11,6 +11,18 @@ class Photo:
   path_web: str
   hash: str
   people: List[People] = field(default_factory=list)
+  phash: str | None = None
+  thumbnails: Dict[int, str] = field(default_factory=dict)
+
+  @staticmethod
+  def content_key(prefix: str, hash: str, name: str) -> str:
+    """Clave derivada del SHA-256, repartida en dos niveles de prefijos: `prefix/ab/cd/name`."""
+    return f"{prefix}/{hash[:2]}/{hash[2:4]}/{name}"
+
+  @staticmethod
+  def thumbnail_key(hash: str, size: int) -> str:
+    """Clave fija de cada miniatura: se puede generar o pedir sin consultar la base de datos."""
+    return Photo.content_key(f"thumbnails/{size}", hash, f"{hash}.webp")
 
   def to_dict(self):
     return {
@@ -18,5 +30,7 @@ class Photo:
       'path': self.path,
       'hash': self.hash,
       'path_web': self.path_web,
+      'phash': self.phash,
+      'thumbnails': {str(size): key for size, key in self.thumbnails.items()},
       'people': [person.to_dict() for person in self.people]
     }
\ No newline at end of file
@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from app.domain.models.decoded_image import DecodedImage
+
+
+@dataclass
+class PhotoAnalysis:
+    """
+    Resultado de las etapas de CPU de una foto (decodificación, hash perceptual,
+    WebP y caras). Es serializable para poder calcularse en otro proceso.
+    """
+    extension: str
+    mime_type: str
+    phash: str
+    webp: bytes
+    preview: DecodedImage
+    faces: List[Dict[str, Any]] = field(default_factory=list)
+    thumbnails: Dict[int, bytes] = field(default_factory=dict)
+    # Segundos de cada etapa; viajan con el análisis para registrarlos en el proceso que guarda la foto
+    timings: Dict[str, float] = field(default_factory=dict)
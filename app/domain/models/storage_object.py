@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+from mmap import mmap
+from typing import BinaryIO
+
+
+@dataclass(frozen=True)
+class StorageObject:
+    """Un archivo pendiente de subir al storage: bytes, un archivo proyectado o abierto en modo binario."""
+    data: bytes | mmap | BinaryIO
+    extension: str
+    content_type: str = "image/jpeg"
+    object_name: str | None = None
+    # Con claves derivadas del contenido, un objeto que ya existe no se vuelve a subir
+    skip_if_exists: bool = False
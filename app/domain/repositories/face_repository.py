@@ -0,0 +1,21 @@
+from abc import abstractmethod
+from typing import Dict, Iterator, List
+
+from app.domain.models.face import Face
+from app.domain.repositories.base_repository import BaseRepository
+
+
+class FaceRepository(BaseRepository[Face]):
+    @abstractmethod
+    def create_faces_bulk(self, faces: List[Face]) -> List[Face]:
+        pass
+
+    @abstractmethod
+    def iter_faces(self) -> Iterator[Face]:
+        """Todas las caras, leídas por bloques; el encoding es un array float32 de solo lectura."""
+        pass
+
+    @abstractmethod
+    def assign_people_bulk(self, assignments: Dict[str, str | None]) -> None:
+        """Cambia la persona de cada cara (id de cara -> id de persona, o None para dejarla sin persona)."""
+        pass
@@ -0,0 +1,47 @@
+from abc import abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.domain.models.job import Job
+from app.domain.repositories.base_repository import BaseRepository
+
+
+class JobRepository(BaseRepository[Job]):
+    @abstractmethod
+    def create_job(self, file_path: str, hash: str | None = None) -> Job:
+        pass
+
+    @abstractmethod
+    def get_job(self, id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    def list_jobs(self, status: str | None = None, limit: int = 50, offset: int = 0) -> List[Job]:
+        pass
+
+    @abstractmethod
+    def claim_next(self) -> Optional[Job]:
+        """Marca como en curso el trabajo pendiente más antiguo y lo devuelve."""
+        pass
+
+    @abstractmethod
+    def mark_done(self, id: str, photo_id: str | None, timings: Dict[str, float]) -> None:
+        pass
+
+    @abstractmethod
+    def mark_failed(self, id: str, error: str, timings: Dict[str, float]) -> None:
+        pass
+
+    @abstractmethod
+    def mark_retry(self, id: str, error: str, timings: Dict[str, float]) -> None:
+        """Devuelve a la cola un trabajo fallido que aún tiene intentos."""
+        pass
+
+    @abstractmethod
+    def requeue_running(self, started_before: datetime) -> int:
+        """
+        Vuelve a dejar pendientes los trabajos en curso reclamados antes de
+        `started_before`: los dejó a medias un proceso que se cayó. Los más
+        recientes pueden ser de otro proceso que sigue vivo.
+        """
+        pass
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import List
 from app.domain.repositories.base_repository import BaseRepository
 from app.domain.models.people import People
 
@@ -9,4 +10,12 @@ class PeopleRepository(BaseRepository[People]):
 
     @abstractmethod
     def create_people(self, obj: People) -> People:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def create_people_bulk(self, objects: List[People]) -> List[People]:
+        pass
+
+    @abstractmethod
+    def delete_people_bulk(self, ids: List[str]) -> None:
+        pass
@@ -1,3 +1,4 @@
+from typing import List
 from app.domain.repositories.base_repository import BaseRepository
 from app.domain.models.photo_people import PhotoPeople
 from abc import abstractmethod
@@ -7,3 +8,14 @@ class PhotoPeopleRepository(BaseRepository[PhotoPeople]):
     def create_photo_people(self, obj: PhotoPeople) -> PhotoPeople:
         pass
 
+    @abstractmethod
+    def create_photo_people_bulk(self, objects: List[PhotoPeople]) -> List[PhotoPeople]:
+        pass
+
+    @abstractmethod
+    def get_all_photo_people(self) -> List[PhotoPeople]:
+        pass
+
+    @abstractmethod
+    def replace_photo_people(self, objects: List[PhotoPeople]) -> None:
+        pass
@@ -1,14 +1,58 @@
-from typing import Optional
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 from app.domain.models.photo import Photo
 from app.domain.repositories.base_repository import BaseRepository
 from abc import abstractmethod
 
+
+class PhotoAlreadyExists(Exception):
+    """Ya hay una foto guardada con ese hash (la ha importado otro proceso)."""
+
+    def __init__(self, hash: str):
+        super().__init__(f"Ya existe una foto con el hash {hash}")
+        self.hash = hash
+
 class PhotoRepository(BaseRepository[Photo]):
     @abstractmethod
     def get_by_hash(self, hash: str) -> Optional[Photo]:
         pass
 
+    @abstractmethod
+    def get_photo(self, id: str) -> Optional[Photo]:
+        """Devuelve la foto con sus personas."""
+        pass
+
+    @abstractmethod
+    def get_photos(self, ids: List[str]) -> List[Photo]:
+        """Fotos (con sus personas) en el orden de `ids`; las que no existen se omiten."""
+        pass
+
+    @abstractmethod
+    def list_photos(self, after_id: str | None = None, limit: int = 50) -> List[Photo]:
+        """Página de fotos (con sus personas) ordenada por id, a partir de la siguiente a `after_id`."""
+        pass
+
+    @abstractmethod
+    def list_people_photos(self, people_id: str, after_id: str | None = None, limit: int = 50) -> List[Photo]:
+        pass
+
+    @abstractmethod
+    def get_duplicates(self, photo_id: str) -> List[Photo]:
+        """Fotos marcadas como duplicadas de la foto, o de las que ella es duplicada."""
+        pass
+
     @abstractmethod
     def create_photo(self, obj: Photo) -> Photo:
+        """Lanza PhotoAlreadyExists si ya hay una foto con el mismo hash."""
+        pass
+
+    @abstractmethod
+    def get_all_hashes(self, since: datetime | None = None) -> Iterator[str]:
+        """Hashes de todas las fotos o, con `since`, de las importadas desde ese momento (UTC)."""
+        pass
+
+    @abstractmethod
+    def get_all_phashes(self) -> Iterator[Tuple[str, str]]:
+        """Devuelve (id, phash) de las fotos que tienen hash perceptual."""
         pass
         
\ No newline at end of file
@@ -1,11 +1,38 @@
 from abc import ABC, abstractmethod
+from mmap import mmap
+from typing import BinaryIO, List
+
+from app.domain.models.storage_object import StorageObject
 
 
 class StorageRepository(ABC):
     @abstractmethod
-    def upload_file(self, file_bytes: bytes, extension: str, content_type: str = "image/jpeg") -> tuple[ bool, str, str]:
+    def upload_file(self, file_bytes: bytes | mmap | BinaryIO, extension: str, content_type: str = "image/jpeg", object_name: str | None = None, skip_if_exists: bool = False) -> tuple[bool, str, str, bool]:
+        """
+        Sube el archivo con un nombre aleatorio, o con `object_name` si se indica.
+        Con `skip_if_exists` no se sube si ya hay un objeto con ese nombre.
+
+        Devuelve (resultado, nombre, error, escrito); `escrito` es False si el
+        objeto ya existía y no se ha subido. Solo los objetos escritos se
+        pueden borrar al deshacer: los demás pertenecen a otra foto.
+        """
+        pass
+
+    def upload_files(self, files: List[StorageObject]) -> List[tuple[bool, str, str, bool]]:
+        """Sube varios archivos; las implementaciones pueden hacerlo en paralelo."""
+        return [
+            self.upload_file(file.data, file.extension, file.content_type, file.object_name, file.skip_if_exists)
+            for file in files
+        ]
+
+    @abstractmethod
+    def exists(self, path_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    def get_file(self, path_name: str) -> tuple[bool, bytes | None, str]:
         pass
 
     @abstractmethod
     def delete_file(self, path_name) ->tuple[bool, str]:
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,25 @@
+from abc import ABC, abstractmethod
+from typing import Callable
+
+
+class UnitOfWork(ABC):
+    """
+    Agrupa las escrituras de los repositorios en una sola transacción.
+
+    Se puede anidar: el bloque más externo confirma o deshace la transacción y
+    cada bloque interno queda aislado en un savepoint. Las acciones registradas
+    con `on_rollback` deshacen efectos fuera de la base de datos (storage,
+    vectores) si el bloque en el que se registraron se deshace.
+    """
+
+    @abstractmethod
+    def __enter__(self) -> "UnitOfWork":
+        pass
+
+    @abstractmethod
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        pass
+
+    @abstractmethod
+    def on_rollback(self, callback: Callable[[], object]):
+        pass
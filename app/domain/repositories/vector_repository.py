@@ -8,10 +8,31 @@ class VectorRepository(ABC):
     def add_vector(self, vector: List[float],id: str):
         pass
 
+    @abstractmethod
+    def add_vectors(self, vectors: List[List[float]], ids: List[str]):
+        pass
+
     @abstractmethod
     def search_ids(self, vector: List[float])-> Tuple[bool, List[str] | None, str]:
         pass
 
+    @abstractmethod
+    def search_many(self, vectors: List[List[float]]) -> Tuple[bool, List[List[str]] | None, str]:
+        pass
+
+    @abstractmethod
+    def search_scored(self, vector: List[float], top_k: int = 10, offset: int = 0) -> Tuple[bool, List[Tuple[str, float]] | None, str]:
+        """
+        Resultados `offset`..`offset + top_k` ordenados de más a menos parecido,
+        con la puntuación de la colección (similitud, o distancia con Euclid).
+        No aplica el umbral de coincidencia de search_many/search_ids.
+        """
+        pass
+
     @abstractmethod
     def delete_by_id(self, id: str):
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def delete_many(self, ids: List[str]):
+        pass
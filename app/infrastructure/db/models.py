@@ -1,14 +1,20 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint, Boolean, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.sql import func
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 from typing import List, Optional
 
 # Crear la base para los modelos
 Base = declarative_base()
 
+
+def utc_now() -> datetime:
+    """Hora UTC sin zona horaria, como se guardan las columnas DateTime."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Photo(Base):
     """
     Modelo para la tabla 'photos'.
@@ -20,7 +26,13 @@ class Photo(Base):
     id = Column(String(36), primary_key=True)
     path = Column(Text)
     path_web = Column(Text)
-    hash = Column(String(64))
+    # Único: si dos procesos importan el mismo archivo a la vez, el segundo falla al insertar
+    hash = Column(String(64), index=True, unique=True)
+    phash = Column(String(64), nullable=True)
+    # JSON {lado largo: clave en el storage}
+    thumbnails = Column(Text, nullable=True)
+    # Hora UTC de la importación; los procesos la usan para refrescar su filtro de hashes conocidos
+    created_at = Column(DateTime, nullable=True, index=True, default=utc_now)
     
     # Relaciones
     people = relationship("PhotoPeople", back_populates="photo", cascade="all, delete-orphan")
@@ -83,6 +95,23 @@ class PhotoPeople(Base):
     def __repr__(self):
         return f"<PhotoPeople(photo_id={self.photo_id}, people_id={self.person_id})>"
 
+class Face(Base):
+    """
+    Modelo para la tabla 'faces'.
+    Cada cara detectada con su encoding (float32), para poder agrupar las
+    caras en personas sin depender del orden de importación.
+    """
+    __tablename__ = 'faces'
+
+    id = Column(String(36), primary_key=True)
+    photo_id = Column(String(36), ForeignKey('photo.id', ondelete='CASCADE'), nullable=False, index=True)
+    people_id = Column(String(36), ForeignKey('people.id', ondelete='SET NULL'), nullable=True, index=True)
+    embedding = Column(LargeBinary, nullable=False)
+    path_web = Column(Text)
+
+    def __repr__(self):
+        return f"<Face(id={self.id}, photo_id={self.photo_id}, people_id={self.people_id})>"
+
 class Duplicate(Base):
     """
     Modelo para la tabla 'duplicates'.
@@ -91,7 +120,7 @@ class Duplicate(Base):
     __tablename__ = 'duplicates'
     
     photo_id = Column(Text, ForeignKey('photo.id', ondelete='CASCADE'), nullable=False, primary_key=True)
-    duplicate_of_id = Column(Text, ForeignKey('photo.id', ondelete='CASCADE'), nullable=False, primary_key=True)
+    duplicate_of_id = Column(Text, ForeignKey('photo.id', ondelete='CASCADE'), nullable=False, primary_key=True, index=True)
      
     # Relaciones
     original_photo = relationship("Photo", foreign_keys=[duplicate_of_id], back_populates="duplicates_as_original")
@@ -111,3 +140,36 @@ class Duplicate(Base):
             'photo_id': self.photo_id,
             'duplicate_of_id': self.duplicate_of_id,
         }
+
+class Job(Base):
+    """
+    Modelo para la tabla 'jobs'.
+    Cola persistente de fotos subidas pendientes de procesar.
+    """
+    __tablename__ = 'jobs'
+
+    id = Column(String(36), primary_key=True)
+    status = Column(String(16), nullable=False, index=True)
+    file_path = Column(Text, nullable=False)
+    # SHA-256 calculado al recibir el archivo
+    hash = Column(String(64), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=utc_now, index=True)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    photo_id = Column(String(36))
+    error = Column(Text)
+    timings = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, status='{self.status}')>"
+
+    def to_dict(self):
+        """Convierte el modelo a diccionario."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'file_path': self.file_path,
+            'photo_id': self.photo_id,
+            'error': self.error,
+        }
@@ -0,0 +1,33 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.infrastructure.db.models import Base
+
+
+def ensure_schema(engine: Engine):
+    """
+    Crea las tablas que falten y añade las columnas nuevas (nullable) y los
+    índices nuevos a las tablas existentes, para que las bases de datos ya
+    creadas sigan funcionando al añadir campos a los modelos.
+
+    Un índice único que no se puede crear porque la tabla ya tiene filas
+    repetidas se avisa y se omite: hay que limpiar esas filas a mano.
+    """
+    Base.metadata.create_all(engine)
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as connection:
+                    index.create(connection, checkfirst=True)
+            except (IntegrityError, OperationalError) as e:
+                print(f"No se pudo crear el índice {index.name} de {table.name}, ¿hay filas repetidas?: {e}")
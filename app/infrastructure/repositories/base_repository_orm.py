@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from typing import TypeVar, Generic, Type, List, Optional
 
 from app.domain.repositories.base_repository import BaseRepository
+from app.infrastructure.repositories.unit_of_work_orm import in_unit_of_work
 
 T = TypeVar("T")
 
@@ -10,9 +11,15 @@ class BaseRepositoryORM(BaseRepository[T]):
         self._model:Type[T] = model
         self._session:Session = session
 
+    def _commit(self):
+        """Dentro de una unidad de trabajo solo se hace flush; el commit lo decide ella."""
+        if in_unit_of_work(self._session):
+            self._session.flush()
+        else:
+            self._session.commit()
     
     def get_by_id(self, id: str) -> T:
-        self._session.get(self._model, id)
+        return self._session.get(self._model, id)
 
     
     def get_all(self) -> List[T]:
@@ -21,7 +28,7 @@ class BaseRepositoryORM(BaseRepository[T]):
     
     def create(self, obj: T) -> T:
         self._session.add(obj)
-        self._session.commit()
+        self._commit()
         self._session.refresh(obj)
         return obj
   
@@ -35,8 +42,8 @@ class BaseRepositoryORM(BaseRepository[T]):
             if hasattr(instance, key):
                 setattr(instance, key, value)
 
-        self.session.commit()
-        self.session.refresh(instance)
+        self._commit()
+        self._session.refresh(instance)
         return instance
   
     
@@ -45,12 +52,12 @@ class BaseRepositoryORM(BaseRepository[T]):
         if not obj:
             return False
         self._session.delete(obj)
-        self._session.commit()
+        self._commit()
         return True
 
     def create_by_list(self, objects: List[T]) -> List[T]:
         self._session.add_all(objects)
-        self._session.commit()
+        self._commit()
         return objects
 
   
\ No newline at end of file
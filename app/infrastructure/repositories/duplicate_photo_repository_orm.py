@@ -3,6 +3,7 @@ from app.infrastructure.repositories.base_repository_orm import BaseRepositoryOR
 from app.domain.models.duplicate_photo import DuplicatePhoto as DuplicatePhotoModel
 from app.domain.repositories.duplicate_photo_repository import DuplicatePhotoRepository
 from app.infrastructure.db.models import Duplicate as DuplicateTable
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 
@@ -11,11 +12,13 @@ class DuplicatePhotoRepositoryORM(BaseRepositoryORM[DuplicatePhotoModel], Duplic
         super().__init__(DuplicateTable, session)
     
     def save_duplicate_photo(self, id: str, duplicate_of_ids: List[str]) -> List[DuplicatePhotoModel]:
-        duplicate_tables = [
-            DuplicateTable(
-                photo_id=id,
-                duplicate_of_id=duplicate_of_id,
-            )
-            for duplicate_of_id in duplicate_of_ids
-        ]
-        self.create_by_list(duplicate_tables)
\ No newline at end of file
+        duplicate_of_ids = list(dict.fromkeys(duplicate_of_ids))
+        if not duplicate_of_ids:
+            return []
+        # executemany en una sola sentencia en lugar de un objeto ORM por fila
+        self._session.execute(
+            insert(DuplicateTable),
+            [{"photo_id": id, "duplicate_of_id": duplicate_of_id} for duplicate_of_id in duplicate_of_ids],
+        )
+        self._commit()
+        return [DuplicatePhotoModel(photo_id=id, duplicate_of_id=duplicate_of_id) for duplicate_of_id in duplicate_of_ids]
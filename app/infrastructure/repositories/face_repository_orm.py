@@ -0,0 +1,67 @@
+import uuid
+from typing import Dict, Iterator, List
+
+import numpy as np
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from app.domain.models.face import Face as FaceModel
+from app.domain.repositories.face_repository import FaceRepository
+from app.infrastructure.db.models import Face as FaceTable
+from app.infrastructure.repositories.base_repository_orm import BaseRepositoryORM
+
+
+class FaceRepositoryORM(BaseRepositoryORM[FaceModel], FaceRepository):
+    def __init__(self, session: Session):
+        super().__init__(FaceTable, session)
+
+    def create_faces_bulk(self, faces: List[FaceModel]) -> List[FaceModel]:
+        faces = [
+            FaceModel(
+                id=face.id or str(uuid.uuid4()),
+                photo_id=face.photo_id,
+                people_id=face.people_id,
+                embedding=face.embedding,
+                web_path=face.web_path)
+            for face in faces
+        ]
+        if faces:
+            self._session.execute(
+                insert(FaceTable),
+                [
+                    {
+                        "id": face.id,
+                        "photo_id": face.photo_id,
+                        "people_id": face.people_id,
+                        "embedding": np.asarray(face.embedding, dtype=np.float32).tobytes(),
+                        "path_web": face.web_path,
+                    }
+                    for face in faces
+                ],
+            )
+            self._commit()
+        return faces
+
+    def iter_faces(self) -> Iterator[FaceModel]:
+        query = self._session.query(
+            FaceTable.id, FaceTable.photo_id, FaceTable.people_id, FaceTable.embedding, FaceTable.path_web)
+        for (id, photo_id, people_id, embedding, path_web) in query.yield_per(10000):
+            yield FaceModel(
+                id=id,
+                photo_id=photo_id,
+                people_id=people_id,
+                # Vista float32 de solo lectura sobre los bytes, sin pasar por listas de Python
+                embedding=np.frombuffer(embedding, dtype=np.float32),
+                web_path=path_web)
+
+    def assign_people_bulk(self, assignments: Dict[str, str | None]) -> None:
+        if not assignments:
+            return
+        # executemany de un UPDATE por id en lugar de cargar cada fila en el ORM
+        self._session.connection().execute(
+            update(FaceTable.__table__)
+            .where(FaceTable.__table__.c.id == bindparam("face_id"))
+            .values(people_id=bindparam("new_people_id")),
+            [{"face_id": id, "new_people_id": people_id} for id, people_id in assignments.items()],
+        )
+        self._commit()
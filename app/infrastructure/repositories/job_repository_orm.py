@@ -0,0 +1,117 @@
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.domain.models.job import Job as JobModel, JobStatus
+from app.domain.repositories.job_repository import JobRepository
+from app.infrastructure.db.models import Job as JobTable, utc_now
+from app.infrastructure.repositories.base_repository_orm import BaseRepositoryORM
+
+
+class JobRepositoryORM(BaseRepositoryORM[JobModel], JobRepository):
+    def __init__(self, session: Session):
+        super().__init__(JobTable, session)
+
+    @staticmethod
+    def _to_model(job_table: JobTable) -> JobModel:
+        return JobModel(
+            id=job_table.id,
+            status=job_table.status,
+            file_path=job_table.file_path,
+            created_at=job_table.created_at,
+            started_at=job_table.started_at,
+            finished_at=job_table.finished_at,
+            photo_id=job_table.photo_id,
+            error=job_table.error,
+            timings=json.loads(job_table.timings) if job_table.timings else {},
+            hash=job_table.hash,
+            attempts=job_table.attempts,
+        )
+
+    def create_job(self, file_path: str, hash: str | None = None) -> JobModel:
+        job_table = JobTable(
+            id=str(uuid.uuid4()),
+            status=JobStatus.PENDING,
+            file_path=file_path,
+            hash=hash,
+            created_at=utc_now(),
+            attempts=0,
+        )
+        self._session.add(job_table)
+        self._session.commit()
+        return self._to_model(job_table)
+
+    def get_job(self, id: str) -> Optional[JobModel]:
+        job_table = self._session.get(JobTable, id)
+        if job_table is None:
+            return None
+        return self._to_model(job_table)
+
+    def list_jobs(self, status: str | None = None, limit: int = 50, offset: int = 0) -> List[JobModel]:
+        query = self._session.query(JobTable)
+        if status is not None:
+            query = query.filter(JobTable.status == status)
+        query = query.order_by(JobTable.created_at.desc()).offset(offset).limit(limit)
+        return [self._to_model(job_table) for job_table in query.all()]
+
+    def claim_next(self) -> Optional[JobModel]:
+        while True:
+            candidate = (
+                self._session.query(JobTable.id)
+                .filter(JobTable.status == JobStatus.PENDING)
+                .order_by(JobTable.created_at)
+                .first()
+            )
+            if candidate is None:
+                self._session.commit()
+                return None
+            # El UPDATE condicionado evita que dos workers reclamen el mismo trabajo
+            result = self._session.execute(
+                update(JobTable)
+                .where(JobTable.id == candidate.id, JobTable.status == JobStatus.PENDING)
+                .values(status=JobStatus.RUNNING, started_at=utc_now(), attempts=JobTable.attempts + 1)
+            )
+            self._session.commit()
+            if result.rowcount == 1:
+                return self.get_job(candidate.id)
+
+    def _finish(self, id: str, status: str, photo_id: str | None, error: str | None, timings: Dict[str, float]):
+        self._session.execute(
+            update(JobTable)
+            .where(JobTable.id == id)
+            .values(
+                status=status,
+                finished_at=utc_now(),
+                photo_id=photo_id,
+                error=error,
+                timings=json.dumps(timings),
+            )
+        )
+        self._session.commit()
+
+    def mark_done(self, id: str, photo_id: str | None, timings: Dict[str, float]) -> None:
+        self._finish(id, JobStatus.DONE, photo_id, None, timings)
+
+    def mark_failed(self, id: str, error: str, timings: Dict[str, float]) -> None:
+        self._finish(id, JobStatus.FAILED, None, error, timings)
+
+    def mark_retry(self, id: str, error: str, timings: Dict[str, float]) -> None:
+        self._session.execute(
+            update(JobTable)
+            .where(JobTable.id == id)
+            .values(status=JobStatus.PENDING, started_at=None, error=error, timings=json.dumps(timings))
+        )
+        self._session.commit()
+
+    def requeue_running(self, started_before: datetime) -> int:
+        result = self._session.execute(
+            update(JobTable)
+            .where(JobTable.status == JobStatus.RUNNING, JobTable.started_at < started_before)
+            .values(status=JobStatus.PENDING, started_at=None)
+        )
+        self._session.commit()
+        return result.rowcount
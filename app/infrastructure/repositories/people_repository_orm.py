@@ -2,7 +2,9 @@ from app.domain.repositories.people_repository import PeopleRepository
 from app.infrastructure.repositories.base_repository_orm import BaseRepositoryORM
 from app.infrastructure.db.models import People as PeopleTable
 from app.domain.models.people import People as PeopleModel
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session
+from typing import List
 import uuid
 
 class PeopleRepositoryORM(BaseRepositoryORM[PeopleModel], PeopleRepository):
@@ -15,9 +17,27 @@ class PeopleRepositoryORM(BaseRepositoryORM[PeopleModel], PeopleRepository):
 	def create_people(self, obj: PeopleModel) -> PeopleModel:
 		people_table = PeopleTable(
 			id=str(uuid.uuid4()),
-			label=obj.label,
-			web_path=obj.web_path,
+			nombre=obj.label,
+			path_web=obj.web_path,
 		)
 		self._session.add(people_table)
-		self._session.commit()
-		return PeopleModel(id=people_table.id, label=people_table.label, web_path=people_table.web_path)
\ No newline at end of file
+		self._commit()
+		return PeopleModel(id=people_table.id, label=people_table.nombre, web_path=people_table.path_web)
+
+	def create_people_bulk(self, objects: List[PeopleModel]) -> List[PeopleModel]:
+		people = [PeopleModel(id=obj.id or str(uuid.uuid4()), label=obj.label, web_path=obj.web_path) for obj in objects]
+		if people:
+			self._session.execute(
+				insert(PeopleTable),
+				[{"id": obj.id, "nombre": obj.label, "path_web": obj.web_path} for obj in people],
+			)
+			self._commit()
+		return people
+
+	def delete_people_bulk(self, ids: List[str]) -> None:
+		if not ids:
+			return
+		# Por bloques para no superar el límite de parámetros de SQLite
+		for start in range(0, len(ids), 1000):
+			self._session.execute(delete(PeopleTable).where(PeopleTable.id.in_(ids[start:start + 1000])))
+		self._commit()
@@ -1,7 +1,9 @@
+from typing import List
 from app.infrastructure.repositories.base_repository_orm import BaseRepositoryORM
 from app.domain.repositories.photo_people_repository import PhotoPeopleRepository
 from app.domain.models.photo_people import PhotoPeople as PhotoPeopleModel
 from app.infrastructure.db.models import PhotoPeople as PhotoPeopleTable
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session
 
 class PhotoPeopleRepositoryORM(BaseRepositoryORM[PhotoPeopleModel], PhotoPeopleRepository):
@@ -14,5 +16,26 @@ class PhotoPeopleRepositoryORM(BaseRepositoryORM[PhotoPeopleModel], PhotoPeopleR
             people_id=obj.people_id,
         )
         self._session.add(photo_people_table)
-        self._session.commit()
-        return PhotoPeopleModel(photo_id=photo_people_table.photo_id, people_id=photo_people_table.people_id)
\ No newline at end of file
+        self._commit()
+        return PhotoPeopleModel(photo_id=photo_people_table.photo_id, people_id=photo_people_table.people_id)
+
+    def create_photo_people_bulk(self, objects: List[PhotoPeopleModel]) -> List[PhotoPeopleModel]:
+        # Una persona puede aparecer varias veces en la misma foto
+        rows = list({(obj.photo_id, obj.people_id): obj for obj in objects}.values())
+        if rows:
+            self._session.execute(
+                insert(PhotoPeopleTable),
+                [{"photo_id": obj.photo_id, "people_id": obj.people_id} for obj in rows],
+            )
+            self._commit()
+        return rows
+
+    def get_all_photo_people(self) -> List[PhotoPeopleModel]:
+        query = self._session.query(PhotoPeopleTable.photo_id, PhotoPeopleTable.people_id)
+        return [PhotoPeopleModel(photo_id=photo_id, people_id=people_id) for photo_id, people_id in query.yield_per(10000)]
+
+    def replace_photo_people(self, objects: List[PhotoPeopleModel]) -> None:
+        """Sustituye toda la tabla en la transacción actual (borrado + inserción masiva)."""
+        self._session.execute(delete(PhotoPeopleTable))
+        self.create_photo_people_bulk(objects)
+        self._commit()
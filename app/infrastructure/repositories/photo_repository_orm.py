@@ -1,32 +1,121 @@
-from typing import Optional
-from app.domain.repositories.photo_repository import PhotoRepository
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+from app.domain.repositories.photo_repository import PhotoAlreadyExists, PhotoRepository
 from app.infrastructure.repositories.base_repository_orm import BaseRepositoryORM
-from app.infrastructure.db.models import Photo as PhotoTable, People as PeopleTable
+from app.infrastructure.repositories.unit_of_work_orm import in_unit_of_work
+from app.infrastructure.db.models import Duplicate as DuplicateTable, Photo as PhotoTable, People as PeopleTable, PhotoPeople as PhotoPeopleTable
 from app.domain.models.photo import Photo as PhotoModel
 from app.domain.models.people import People as PeopleModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session, selectinload
 import uuid
 
 class PhotoRepositoryORM(BaseRepositoryORM[PhotoModel], PhotoRepository):
     def __init__(self, session: Session):
         super().__init__(PhotoTable, session)
 
+    @staticmethod
+    def _to_model(row: PhotoTable, with_people: bool = False) -> PhotoModel:
+        people = []
+        if with_people:
+            people = [
+                PeopleModel(id=photo_people.people.id, label=photo_people.people.nombre, web_path=photo_people.people.path_web)
+                for photo_people in row.people
+            ]
+        return PhotoModel(
+            id=row.id, hash=row.hash, path=row.path, path_web=row.path_web, phash=row.phash,
+            thumbnails=PhotoRepositoryORM._load_thumbnails(row.thumbnails), people=people)
+
+    def _query_with_people(self) -> Query:
+        # Dos consultas fijas por página (photo_people y people) en lugar de una por foto
+        return self._session.query(PhotoTable).options(
+            selectinload(PhotoTable.people).selectinload(PhotoPeopleTable.people))
+
+    @staticmethod
+    def _load_thumbnails(value: str | None) -> Dict[int, str]:
+        if not value:
+            return {}
+        return {int(size): key for size, key in json.loads(value).items()}
+
+    @staticmethod
+    def _dump_thumbnails(thumbnails: Dict[int, str]) -> str | None:
+        if not thumbnails:
+            return None
+        return json.dumps({str(size): key for size, key in sorted(thumbnails.items())})
+
     def get_by_hash(self, hash: str) -> Optional[PhotoModel]:
         result = self._session.query(PhotoTable).filter_by(hash=hash).first()
         if result:
-            return PhotoModel(id=result.id, hash=result.hash, path=result.path, path_web=result.path_web)
+            return self._to_model(result)
+        return None
+
+    def get_photo(self, id: str) -> Optional[PhotoModel]:
+        result = self._query_with_people().filter(PhotoTable.id == id).first()
+        if result:
+            return self._to_model(result, with_people=True)
         return None
 
+    def get_photos(self, ids: List[str]) -> List[PhotoModel]:
+        if not ids:
+            return []
+        rows = {row.id: row for row in self._query_with_people().filter(PhotoTable.id.in_(ids))}
+        return [self._to_model(rows[id], with_people=True) for id in ids if id in rows]
+
+    def list_photos(self, after_id: str | None = None, limit: int = 50) -> List[PhotoModel]:
+        # Paginación por clave: el coste de una página no depende de lo lejos que esté
+        query = self._query_with_people()
+        if after_id is not None:
+            query = query.filter(PhotoTable.id > after_id)
+        return [self._to_model(row, with_people=True) for row in query.order_by(PhotoTable.id).limit(limit)]
+
+    def list_people_photos(self, people_id: str, after_id: str | None = None, limit: int = 50) -> List[PhotoModel]:
+        query = self._query_with_people().join(PhotoPeopleTable, PhotoPeopleTable.photo_id == PhotoTable.id).filter(
+            PhotoPeopleTable.people_id == people_id)
+        if after_id is not None:
+            query = query.filter(PhotoTable.id > after_id)
+        return [self._to_model(row, with_people=True) for row in query.order_by(PhotoTable.id).limit(limit)]
+
+    def get_duplicates(self, photo_id: str) -> List[PhotoModel]:
+        duplicate_ids = union(
+            select(DuplicateTable.duplicate_of_id).where(DuplicateTable.photo_id == photo_id),
+            select(DuplicateTable.photo_id).where(DuplicateTable.duplicate_of_id == photo_id),
+        )
+        query = self._query_with_people().filter(PhotoTable.id.in_(duplicate_ids)).order_by(PhotoTable.id)
+        return [self._to_model(row, with_people=True) for row in query]
+
+    def get_all_hashes(self, since: datetime | None = None) -> Iterator[str]:
+        query = self._session.query(PhotoTable.hash)
+        if since is not None:
+            query = query.filter(PhotoTable.created_at >= since)
+        for (hash,) in query.yield_per(10000):
+            yield hash
+
+    def get_all_phashes(self) -> Iterator[Tuple[str, str]]:
+        query = self._session.query(PhotoTable.id, PhotoTable.phash).filter(PhotoTable.phash.isnot(None))
+        for (id, phash) in query.yield_per(10000):
+            yield id, phash
+
     def create_photo(self, obj: PhotoModel) -> PhotoModel:
         print("a crear foto")
         photo_table = PhotoTable(
             hash=obj.hash,
             path=obj.path,
             path_web=obj.path_web,
+            phash=obj.phash,
+            thumbnails=self._dump_thumbnails(obj.thumbnails),
             id=str(uuid.uuid4()),
         )
         self._session.add(photo_table)
-        self._session.commit()
+        try:
+            self._commit()
+        except IntegrityError as e:
+            # Dentro de una unidad de trabajo es ella quien deshace el savepoint
+            if not in_unit_of_work(self._session):
+                self._session.rollback()
+            raise PhotoAlreadyExists(obj.hash) from e
         return PhotoModel(
             id=photo_table.id,
-            hash=photo_table.hash, path=photo_table.path, path_web=photo_table.path_web, people=[])
\ No newline at end of file
+            hash=photo_table.hash, path=photo_table.path, path_web=photo_table.path_web, people=[],
+            phash=photo_table.phash, thumbnails=dict(obj.thumbnails))
\ No newline at end of file
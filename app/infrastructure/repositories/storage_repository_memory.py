@@ -0,0 +1,50 @@
+import mmap
+import threading
+import uuid
+from typing import BinaryIO, Dict
+
+from app.domain.repositories.storage_repository import StorageRepository
+
+
+class StorageRepositoryMemory(StorageRepository):
+    """
+    Storage en memoria del proceso, sin MinIO. Pensado para benchmarks y
+    pruebas locales: los objetos se pierden al terminar el proceso.
+    """
+
+    def __init__(self):
+        self._objects: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def upload_file(self, file_bytes: bytes | mmap.mmap | BinaryIO, extension: str, content_type: str = "image/jpeg", object_name: str | None = None, skip_if_exists: bool = False) -> tuple[bool, str, str, bool]:
+        object_name = object_name or f"{uuid.uuid4()}.{extension}"
+        if isinstance(file_bytes, mmap.mmap):
+            data = file_bytes[:]
+        elif hasattr(file_bytes, "read"):
+            data = file_bytes.read()
+        else:
+            data = bytes(file_bytes)
+        with self._lock:
+            if skip_if_exists and object_name in self._objects:
+                return True, object_name, "", False
+            self._objects[object_name] = data
+        return True, object_name, "", True
+
+    def exists(self, path_name: str) -> bool:
+        with self._lock:
+            return path_name in self._objects
+
+    def get_file(self, path_name: str) -> tuple[bool, bytes | None, str]:
+        with self._lock:
+            data = self._objects.get(path_name)
+        if data is None:
+            return False, None, f"No existe el archivo {path_name}"
+        return True, data, ""
+
+    def delete_file(self, path_name):
+        with self._lock:
+            self._objects.pop(path_name, None)
+        return True, ""
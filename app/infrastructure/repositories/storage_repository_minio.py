@@ -1,63 +1,167 @@
+from app.domain.models.storage_object import StorageObject
 from app.domain.repositories.storage_repository import StorageRepository
 import io
+import mmap
+import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Set, Tuple
+
+import certifi
+import urllib3
 from minio import Minio
+from minio.error import S3Error
 from app.config.settings import Settings
 
+# Buckets ya comprobados en este proceso, compartido entre instancias del repositorio
+_ready_buckets: Set[Tuple[str, str]] = set()
+_ready_buckets_lock = threading.Lock()
+
+
 class StorageRepositoryMinio(StorageRepository):
     """Repositorio para manejar operaciones con MinIO bucket"""
-    
-    def __init__(self, endpoint: str = None, 
-                 access_key: str = None, 
-                 secret_key: str = None, 
+
+    def __init__(self, endpoint: str = None,
+                 access_key: str = None,
+                 secret_key: str = None,
                  bucket_name: str = None,
-                 secure: bool = None):
+                 secure: bool = None,
+                 max_connections: int = None,
+                 upload_workers: int = None,
+                 part_size: int = None):
         """
-        Inicializa el repositorio y crea el bucket si no existe
-        
+        Inicializa el repositorio. El bucket se comprueba (y se crea si no
+        existe) con la primera subida, una sola vez por proceso.
+
         Args:
             endpoint: Endpoint del servidor MinIO (opcional, usa settings si no se proporciona)
             access_key: Clave de acceso (opcional, usa settings si no se proporciona)
             secret_key: Clave secreta (opcional, usa settings si no se proporciona)
             bucket_name: Nombre del bucket (opcional, usa settings si no se proporciona)
             secure: Si usar HTTPS (opcional, usa settings si no se proporciona)
+            max_connections: Conexiones HTTP del pool compartido por todas las peticiones
+            upload_workers: Subidas simultáneas en `upload_files`
+            part_size: Tamaño a partir del cual se sube por partes en paralelo
         """
         settings = Settings()
+        self.endpoint = endpoint or settings.minio_endpoint
+        self.max_connections = max_connections or settings.minio_max_connections
+        self.upload_workers = upload_workers or settings.minio_upload_workers
+        self.part_size = max(part_size or settings.minio_part_size, 5 * 1024 * 1024)
         self.client = Minio(
-            endpoint or settings.minio_endpoint,
+            self.endpoint,
             access_key=access_key or settings.minio_access_key,
             secret_key=secret_key or settings.minio_secret_key,
-            secure=secure if secure is not None else settings.minio_secure
+            secure=secure if secure is not None else settings.minio_secure,
+            http_client=self._http_client()
         )
         self.bucket_name = bucket_name or settings.minio_bucket_name
-        self._init_bucket()
-    
+        self._upload_pool: ThreadPoolExecutor | None = None
+        self._upload_pool_lock = threading.Lock()
+
+    def _http_client(self) -> urllib3.PoolManager:
+        """Mismo cliente que crea Minio por defecto, pero con un pool del tamaño de las subidas simultáneas."""
+        return urllib3.PoolManager(
+            maxsize=self.max_connections,
+            timeout=urllib3.Timeout(connect=300, read=300),
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+            retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]))
+
     def _init_bucket(self):
         """Crea el bucket si no existe"""
-        if not self.client.bucket_exists(self.bucket_name):
-            self.client.make_bucket(self.bucket_name)
-            print(f"✅ Bucket '{self.bucket_name}' creado")
-        else:
-            print(f"ℹ️  Bucket '{self.bucket_name}' ya existe")
-    
-    def upload_file(self, file_bytes: bytes, extension: str, content_type: str = "image/jpeg") -> tuple[bool, str, str]:
+        key = (self.endpoint, self.bucket_name)
+        if key in _ready_buckets:
+            return
+        with _ready_buckets_lock:
+            if key in _ready_buckets:
+                return
+            if not self.client.bucket_exists(self.bucket_name):
+                self.client.make_bucket(self.bucket_name)
+                print(f"✅ Bucket '{self.bucket_name}' creado")
+            _ready_buckets.add(key)
+
+    @staticmethod
+    def _stream(file_bytes: bytes | mmap.mmap | BinaryIO) -> Tuple[BinaryIO, int]:
+        """Devuelve el archivo listo para put_object y su tamaño (-1 si no se conoce)."""
+        if isinstance(file_bytes, (bytes, memoryview)):
+            # BytesIO comparte el buffer de un bytes inmutable, no lo copia
+            return io.BytesIO(file_bytes), len(file_bytes)
+        if isinstance(file_bytes, mmap.mmap):
+            # Un archivo proyectado se sube entero, como si fuera bytes
+            file_bytes.seek(0)
+            return file_bytes, len(file_bytes)
+        try:
+            position = file_bytes.tell()
+            length = file_bytes.seek(0, os.SEEK_END) - position
+            file_bytes.seek(position)
+            return file_bytes, length
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return file_bytes, -1
+
+    def upload_file(self, file_bytes: bytes | mmap.mmap | BinaryIO, extension: str, content_type: str = "image/jpeg", object_name: str | None = None, skip_if_exists: bool = False) -> tuple[bool, str, str, bool]:
         try:
-            object_name = f"{uuid.uuid4()}.{extension}"
-            file_stream = io.BytesIO(file_bytes) 
+            self._init_bucket()
+            object_name = object_name or f"{uuid.uuid4()}.{extension}"
+            if skip_if_exists and self.exists(object_name):
+                return True, object_name, "", False
+            file_stream, length = self._stream(file_bytes)
+            # Por encima de part_size Minio sube por partes en paralelo
             self.client.put_object(
                 self.bucket_name,
                 object_name,
                 data=file_stream,
-                length=len(file_bytes),
-                content_type=content_type
+                length=length,
+                content_type=content_type,
+                part_size=self.part_size
             )
-            return True, object_name, ""
+            return True, object_name, "", True
         except Exception as e:
-            return False, "", f"No se pudo subir el archivo a MinIO {e}"
-    
+            return False, "", f"No se pudo subir el archivo a MinIO {e}", False
+
+    def _uploader(self) -> ThreadPoolExecutor:
+        with self._upload_pool_lock:
+            if self._upload_pool is None:
+                self._upload_pool = ThreadPoolExecutor(max_workers=self.upload_workers, thread_name_prefix="minio-upload")
+            return self._upload_pool
+
+    def upload_files(self, files: List[StorageObject]) -> List[tuple[bool, str, str, bool]]:
+        """Sube los archivos a la vez: el tiempo total es el del archivo más grande, no la suma."""
+        if len(files) <= 1:
+            return super().upload_files(files)
+        futures = [
+            self._uploader().submit(
+                self.upload_file, file.data, file.extension, file.content_type, file.object_name, file.skip_if_exists)
+            for file in files
+        ]
+        return [future.result() for future in futures]
+
+    def exists(self, path_name: str) -> bool:
+        """Comprobación con HEAD: no descarga el objeto."""
+        try:
+            self.client.stat_object(self.bucket_name, path_name)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject", "NotFound"):
+                return False
+            raise
+
+    def get_file(self, path_name: str) -> tuple[bool, bytes | None, str]:
+        response = None
+        try:
+            response = self.client.get_object(self.bucket_name, path_name)
+            return True, response.read(), ""
+        except Exception as e:
+            return False, None, f"No se pudo leer el archivo {path_name} de MinIO {e}"
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+
     def delete_file(self, path_name):
         try:
             self.client.remove_object(self.bucket_name, path_name)
             return True, ""
         except Exception as e:
-            return False, f"no se pudo eliminar el archivo {path_name}, del bucket: {self.bucket_name}, {e}"
\ No newline at end of file
+            return False, f"no se pudo eliminar el archivo {path_name}, del bucket: {self.bucket_name}, {e}"
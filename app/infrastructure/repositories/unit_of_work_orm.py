@@ -0,0 +1,67 @@
+from typing import Callable, List
+
+from sqlalchemy.exc import ResourceClosedError
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.domain.repositories.unit_of_work import UnitOfWork
+
+_DEPTH_KEY = "unit_of_work_depth"
+
+
+def in_unit_of_work(session: Session) -> bool:
+    """Los repositorios solo hacen flush (no commit) dentro de una unidad de trabajo."""
+    return session.info.get(_DEPTH_KEY, 0) > 0
+
+
+class UnitOfWorkORM(UnitOfWork):
+    def __init__(self, session: Session):
+        self._session = session
+        self._savepoints: List[SessionTransaction | None] = []
+        self._callbacks: List[List[Callable[[], object]]] = []
+
+    def __enter__(self) -> "UnitOfWorkORM":
+        nested = in_unit_of_work(self._session)
+        self._savepoints.append(self._session.begin_nested() if nested else None)
+        self._callbacks.append([])
+        self._session.info[_DEPTH_KEY] = self._session.info.get(_DEPTH_KEY, 0) + 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        savepoint = self._savepoints.pop()
+        callbacks = self._callbacks.pop()
+        self._session.info[_DEPTH_KEY] -= 1
+        try:
+            if exc_type is None:
+                if savepoint is not None:
+                    savepoint.commit()
+                else:
+                    self._session.commit()
+                if self._callbacks:
+                    # Si el bloque externo se deshace, también hay que deshacer este
+                    self._callbacks[-1].extend(callbacks)
+                return False
+        except Exception:
+            self._rollback(savepoint, callbacks)
+            raise
+        self._rollback(savepoint, callbacks)
+        return False
+
+    def _rollback(self, savepoint: SessionTransaction | None, callbacks: List[Callable[[], object]]):
+        if savepoint is not None:
+            # Tras un flush fallido el savepoint queda inactivo pero sin cerrar: hay que deshacerlo igual
+            try:
+                savepoint.rollback()
+            except ResourceClosedError:
+                pass
+        else:
+            self._session.rollback()
+        for callback in reversed(callbacks):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error al deshacer una operación: {e}")
+
+    def on_rollback(self, callback: Callable[[], object]):
+        if not self._callbacks:
+            raise RuntimeError("on_rollback solo se puede usar dentro de la unidad de trabajo")
+        self._callbacks[-1].append(callback)
@@ -0,0 +1,441 @@
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.domain.repositories.vector_repository import VectorRepository
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+
+class VectorDBLocal(VectorRepository):
+    """
+    Base vectorial embebida para instalaciones de una sola máquina y pruebas sin Qdrant.
+
+    Los vectores se guardan en una matriz float32/float16 mapeada en memoria y
+    los ids en un journal de solo añadido, así que cada escritura se persiste
+    de forma incremental. La búsqueda es un producto matricial por bloques
+    sobre toda la colección. Las filas borradas se reutilizan en las
+    siguientes escrituras y, cuando el journal acumula más entradas muertas
+    que vivas, la colección se compacta.
+
+    Con `approximate=True` y a partir de `approximate_min_size` vectores se
+    usa un índice IVF: los vectores se reparten entre centroides k-means y cada
+    búsqueda solo recorre las `probes` listas más cercanas a la consulta. El
+    índice se entrena al escribir (o con `apply_collection_config`) y se guarda
+    junto a la colección; las búsquedas nunca entrenan.
+
+    Varios procesos (el pool de `ingest`) pueden compartir la colección: las
+    escrituras se serializan con un lock de fichero y cada proceso lee del
+    journal las filas que han añadido los demás antes de operar.
+    """
+    GROWTH = 1024
+    SEARCH_CHUNK = 65536
+
+    def __init__(self,
+        collection_name: str,
+        vector_size: int,
+        data_dir: str,
+        distance: str = "Cosine",
+        dtype: str = "float32",
+        approximate: bool = False,
+        approximate_min_size: int = 50000,
+        lists: int = 0,
+        probes: int = 8,
+        score_threshold: float | None = None):
+        if distance not in ("Cosine", "Dot", "Euclid"):
+            raise ValueError(f"Distancia no soportada: {distance}")
+        self.collection_name = collection_name
+        self.vector_size = vector_size
+        self.distance = distance
+        self.dtype = np.dtype(dtype)
+        self.approximate = approximate
+        self.approximate_min_size = approximate_min_size
+        self.lists = lists
+        self.probes = probes
+        # Mismo significado que en Qdrant: similitud mínima, o distancia máxima con Euclid.
+        # Solo filtra las coincidencias (search_many/search_ids), no el ranking de search_scored
+        self.score_threshold = score_threshold
+
+        self.path = os.path.join(data_dir, collection_name)
+        os.makedirs(self.path, exist_ok=True)
+        self._matrix_path = os.path.join(self.path, f"vectors.{self.dtype.name}")
+        self._journal_path = os.path.join(self.path, "ids.log")
+        self._index_path = os.path.join(self.path, "ivf.npz")
+        self._assignments_path = os.path.join(self.path, "ivf.i32")
+        self._lock_path = os.path.join(self.path, ".lock")
+
+        self._lock = threading.RLock()
+        self._matrix: np.memmap | None = None
+        self._journal_header = b""
+        self._reset()
+        self._centroids: np.ndarray | None = None
+        self._assignments: np.memmap | None = None
+        self._index_stamp: Tuple[int, int, int] | None = None
+        self._trained_size = 0
+        # Carga la colección existente
+        with self._locked(exclusive=False):
+            pass
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._lock:
+            if fcntl is None:
+                self._refresh()
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reset(self):
+        self._ids: List[str | None] = []
+        self._rows: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    def _capacity(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    @staticmethod
+    def _resize(path: str, size: int):
+        with open(path, "ab") as file:
+            file.truncate(size)
+
+    @staticmethod
+    def _mapped(current: np.memmap | None, path: str, dtype: np.dtype, width: int | None) -> np.memmap | None:
+        """`current` si sigue teniendo el tamaño del fichero; si no, un mapa nuevo."""
+        row_bytes = dtype.itemsize * (width or 1)
+        rows = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+        if current is not None and current.shape[0] == rows:
+            return current
+        if rows == 0:
+            return None
+        return np.memmap(path, dtype=dtype, mode="r+", shape=(rows, width) if width else (rows,))
+
+    def _map(self):
+        self._matrix = self._mapped(self._matrix, self._matrix_path, self.dtype, self.vector_size)
+        self._assignments = None if self._centroids is None else self._mapped(
+            self._assignments, self._assignments_path, np.dtype(np.int32), None)
+
+    def _grow(self, rows: int):
+        if rows <= self._capacity():
+            return
+        capacity = max(rows, self._capacity() * 2, self.GROWTH)
+        self._resize(self._matrix_path, capacity * self.vector_size * self.dtype.itemsize)
+        if self._centroids is not None:
+            self._resize(self._assignments_path, capacity * 4)
+        self._map()
+
+    def _refresh(self):
+        """Aplica las entradas del journal escritas desde la última lectura (por este u otro proceso)."""
+        if os.path.exists(self._journal_path):
+            with open(self._journal_path, "rb") as journal:
+                # Cada compactación empieza el journal con otra cabecera: hay que leerlo desde el principio
+                header = journal.readline()
+                header = header if header.startswith(b"#") else b""
+                if header != self._journal_header:
+                    self._reset()
+                    self._journal_header = header
+                journal.seek(self._journal_offset)
+                entries = journal.read()
+            # Una línea sin terminar es una escritura en curso; se leerá en el siguiente refresh
+            complete = entries[:entries.rfind(b"\n") + 1]
+            self._journal_offset += len(complete)
+            self._apply([line.split("\t", 1) for line in complete.decode("utf-8").splitlines()
+                         if not line.startswith("#")])
+        self._load_index()
+        self._map()
+
+    def _apply(self, entries: List[List[str]]):
+        if not entries:
+            return
+        self._journal_entries += len(entries)
+        written = [int(row) for row, _ in entries if row != "-"]
+        if written and max(written) >= len(self._ids):
+            size = max(written) + 1
+            self._ids.extend([None] * (size - len(self._ids)))
+            self._alive = np.concatenate([self._alive, np.zeros(size - len(self._alive), dtype=bool)])
+        for row, id in entries:
+            if row == "-":
+                self._forget(id)
+            else:
+                self._remember(int(row), id)
+
+    def _load_index(self):
+        """Lee el índice IVF del disco si otro proceso (o este) lo ha cambiado."""
+        try:
+            stat = os.stat(self._index_path)
+        except FileNotFoundError:
+            self._centroids, self._assignments, self._index_stamp, self._trained_size = None, None, None, 0
+            return
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._index_stamp:
+            return
+        with np.load(self._index_path) as index:
+            self._centroids = index["centroids"]
+            self._trained_size = int(index["trained_size"])
+        self._assignments = None
+        self._index_stamp = stamp
+
+    def _remember(self, row: int, id: str):
+        previous = self._rows.get(id)
+        if previous is not None and previous != row:
+            self._alive[previous] = False
+            self._ids[previous] = None
+        self._ids[row] = id
+        self._rows[id] = row
+        self._alive[row] = True
+
+    def _forget(self, id: str):
+        row = self._rows.pop(id, None)
+        if row is not None:
+            self._alive[row] = False
+            self._ids[row] = None
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        if self.distance != "Cosine":
+            return vectors
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _append_journal(self, lines: List[str]):
+        with open(self._journal_path, "a", encoding="utf-8") as journal:
+            journal.write("".join(lines))
+
+    def add_vector(self, vector: List[float], id: str):
+        self.add_vectors([vector], [id])
+
+    def add_vectors(self, vectors: List[List[float]], ids: List[str]):
+        if len(ids) == 0:
+            return
+        values = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.vector_size))
+        with self._locked(exclusive=True):
+            # Un id existente se sobrescribe en su fila, como el upsert de Qdrant; uno nuevo
+            # ocupa la primera fila borrada y, si no hay, una al final
+            free = iter(np.flatnonzero(~self._alive).tolist())
+            rows, placed = [], {}
+            next_row = len(self._ids)
+            for id in ids:
+                row = self._rows.get(id, placed.get(id))
+                if row is None:
+                    row = next(free, None)
+                    if row is None:
+                        row = next_row
+                        next_row += 1
+                    placed[id] = row
+                rows.append(row)
+            self._grow(next_row)
+            self._matrix[rows] = values.astype(self.dtype)
+            self._matrix.flush()
+            if self._centroids is not None:
+                self._assignments[rows] = np.argmax(self._centroid_scores(values, self._centroids), axis=1)
+                self._assignments.flush()
+            # El journal se escribe después de los vectores: una fila solo es visible cuando ya está en disco
+            self._append_journal([f"{row}\t{id}\n" for row, id in zip(rows, ids)])
+            self._refresh()
+            self._train_if_needed()
+            self._compact_if_needed()
+
+    def search_ids(self, vector: List[float], top_k: int = 10) -> Tuple[bool, List[str] | None, str]:
+        result, ids, error = self.search_many([vector], top_k=top_k)
+        if not result:
+            return False, None, error
+        return True, ids[0], ""
+
+    def search_many(self, vectors: List[List[float]], top_k: int = 10) -> Tuple[bool, List[List[str]] | None, str]:
+        if len(vectors) == 0:
+            return True, [], ""
+        try:
+            queries = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), self.vector_size))
+            with self._locked(exclusive=False):
+                if self._indexed():
+                    return True, [self._search_approximate(query, top_k) for query in queries], ""
+                return True, self._search_exact(queries, np.flatnonzero(self._alive), top_k), ""
+        except Exception as e:
+            return False, None, f"Error al buscar los IDs: {e}"
+
+    def search_scored(self, vector: List[float], top_k: int = 10, offset: int = 0) -> Tuple[bool, List[Tuple[str, float]] | None, str]:
+        try:
+            query = self._normalize(np.asarray(vector, dtype=np.float32).reshape(1, self.vector_size))
+            with self._locked(exclusive=False):
+                rows = self._candidates(query[0]) if self._indexed() else np.flatnonzero(self._alive)
+                best, scores = self._best(query, rows, offset + top_k, threshold=None)[0]
+                # Misma escala que Qdrant: con Euclid la puntuación es la distancia
+                if self.distance == "Euclid":
+                    scores = np.sqrt(np.maximum(-scores, 0))
+                return True, [(self._ids[row], float(score)) for row, score in zip(best, scores)][offset:], ""
+        except Exception as e:
+            return False, None, f"Error al buscar los IDs: {e}"
+
+    def _scores(self, rows: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Puntuación (mayor es mejor) de cada fila frente a cada consulta, por bloques."""
+        scores = np.empty((len(rows), len(queries)), dtype=np.float32)
+        for start in range(0, len(rows), self.SEARCH_CHUNK):
+            chunk_rows = rows[start:start + self.SEARCH_CHUNK]
+            chunk = np.asarray(self._matrix[chunk_rows], dtype=np.float32)
+            chunk_scores = chunk @ queries.T
+            if self.distance == "Euclid":
+                chunk_scores = 2 * chunk_scores - np.sum(chunk * chunk, axis=1, keepdims=True) - np.sum(queries * queries, axis=1)
+            scores[start:start + len(chunk_rows)] = chunk_scores
+        return scores
+
+    def _best(self,
+        queries: np.ndarray,
+        rows: np.ndarray,
+        top_k: int,
+        threshold: float | None = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Para cada consulta, las mejores filas de `rows` que pasan `threshold` y sus puntuaciones, de mayor a menor."""
+        if len(rows) == 0 or top_k <= 0:
+            return [(rows[:0], np.zeros(0, dtype=np.float32)) for _ in queries]
+        scores = self._scores(rows, queries)
+        k = min(top_k, len(rows))
+        results = []
+        for column in range(len(queries)):
+            column_scores = scores[:, column]
+            best = np.argpartition(-column_scores, k - 1)[:k]
+            best = best[np.argsort(-column_scores[best])]
+            if threshold is not None:
+                minimum = -threshold ** 2 if self.distance == "Euclid" else threshold
+                best = best[column_scores[best] >= minimum]
+            results.append((rows[best], column_scores[best]))
+        return results
+
+    def _search_exact(self, queries: np.ndarray, rows: np.ndarray, top_k: int) -> List[List[str]]:
+        return [[self._ids[row] for row in best] for best, _ in self._best(queries, rows, top_k, self.score_threshold)]
+
+    def _indexed(self) -> bool:
+        return self.approximate and self._centroids is not None
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        """Filas de las `probes` listas IVF más cercanas a la consulta."""
+        selected = np.zeros(len(self._centroids), dtype=bool)
+        selected[np.argsort(-(self._centroid_scores(query[None, :], self._centroids)[0]))[:self.probes]] = True
+        return np.flatnonzero(self._alive & selected[self._assignments[:len(self._alive)]])
+
+    def _search_approximate(self, query: np.ndarray, top_k: int) -> List[str]:
+        return self._search_exact(query[None, :], self._candidates(query), top_k)[0]
+
+    def _centroid_scores(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        if self.distance == "Euclid":
+            return -(np.sum(vectors * vectors, axis=1, keepdims=True)
+                     - 2 * vectors @ centroids.T
+                     + np.sum(centroids * centroids, axis=1))
+        return vectors @ centroids.T
+
+    def _train_if_needed(self):
+        """(Re)entrena los centroides cuando la colección dobla el tamaño del último entrenamiento."""
+        size = int(self._alive.sum())
+        if not self.approximate or size < self.approximate_min_size or size < 2 * self._trained_size:
+            return
+        self._train()
+
+    def _train(self):
+        """
+        Entrena los centroides con k-means sobre una muestra y asigna cada fila.
+        Mientras se reconstruye no hay índice en disco, así que si el proceso
+        muere a medias las búsquedas vuelven a ser exactas y no usan listas a medio escribir.
+        """
+        rows = np.flatnonzero(self._alive)
+        if len(rows) == 0:
+            return
+        if os.path.exists(self._index_path):
+            os.remove(self._index_path)
+        self._load_index()
+        lists = min(self.lists or max(1, int(np.sqrt(len(rows)))), len(rows))
+        sample = np.random.default_rng(0).choice(rows, size=min(len(rows), lists * 32), replace=False)
+        sample.sort()
+        data = np.asarray(self._matrix[sample], dtype=np.float32)
+        centroids = data[np.random.default_rng(1).choice(len(data), size=lists, replace=False)]
+        for _ in range(10):
+            labels = np.argmax(self._centroid_scores(data, centroids), axis=1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=lists)[:, None]
+            starts = np.concatenate([[0], np.cumsum(counts[:-1, 0])])
+            sums = np.zeros_like(centroids)
+            present = counts[:, 0] > 0
+            sums[present] = np.add.reduceat(data[order], starts[present], axis=0)
+            centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+            centroids = self._normalize(centroids)
+
+        self._resize(self._assignments_path, self._capacity() * 4)
+        assignments = np.memmap(self._assignments_path, dtype=np.int32, mode="r+", shape=(self._capacity(),))
+        for start in range(0, len(rows), self.SEARCH_CHUNK):
+            chunk_rows = rows[start:start + self.SEARCH_CHUNK]
+            chunk = np.asarray(self._matrix[chunk_rows], dtype=np.float32)
+            assignments[chunk_rows] = np.argmax(self._centroid_scores(chunk, centroids), axis=1)
+        assignments.flush()
+        del assignments
+        # Las asignaciones ya están en disco: el índice solo aparece cuando está completo
+        temporary_path = f"{self._index_path}.tmp"
+        with open(temporary_path, "wb") as index:
+            np.savez(index, centroids=centroids.astype(np.float32), trained_size=len(rows))
+        os.replace(temporary_path, self._index_path)
+        self._load_index()
+        self._map()
+
+    def _compact_if_needed(self):
+        if self._journal_entries > 2 * int(self._alive.sum()) + self.GROWTH:
+            self._compact()
+
+    def _compact(self):
+        """
+        Reescribe el journal solo con las filas vivas y mueve las del final a los
+        huecos para recortar la matriz. Los vectores se copian a filas libres
+        antes de sustituir el journal, así que un corte a medias deja la colección anterior intacta.
+        """
+        live = np.flatnonzero(self._alive)
+        size = len(live)
+        holes = np.flatnonzero(~self._alive[:size])
+        movers = live[live >= size]
+        if len(movers):
+            self._matrix[holes] = self._matrix[movers]
+            self._matrix.flush()
+            if self._assignments is not None:
+                self._assignments[holes] = self._assignments[movers]
+                self._assignments.flush()
+        targets = dict(zip(movers.tolist(), holes.tolist()))
+        temporary_path = f"{self._journal_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as journal:
+            journal.write(f"# {uuid.uuid4().hex}\n")
+            journal.write("".join(f"{targets.get(row, row)}\t{self._ids[row]}\n" for row in live.tolist()))
+        os.replace(temporary_path, self._journal_path)
+
+        # Suelta los mapas antes de recortar los ficheros
+        capacity = max(size, self.GROWTH)
+        self._matrix, self._assignments = None, None
+        if os.path.exists(self._matrix_path) and \
+                capacity * self.vector_size * self.dtype.itemsize < os.path.getsize(self._matrix_path):
+            self._resize(self._matrix_path, capacity * self.vector_size * self.dtype.itemsize)
+            if self._centroids is not None:
+                self._resize(self._assignments_path, capacity * 4)
+        self._refresh()
+
+    def apply_collection_config(self):
+        """Compacta la colección y, con `approximate`, reconstruye el índice IVF (`vectors migrate`)."""
+        with self._locked(exclusive=True):
+            self._compact()
+            if self.approximate and int(self._alive.sum()) >= self.approximate_min_size:
+                self._train()
+
+    def delete_by_id(self, id: str):
+        self.delete_many([id])
+
+    def delete_many(self, ids: List[str]):
+        if not ids:
+            return
+        with self._locked(exclusive=True):
+            self._append_journal([f"-\t{id}\n" for id in ids])
+            self._refresh()
+            self._compact_if_needed()
@@ -1,6 +1,81 @@
+from dataclasses import dataclass
 from typing import List, Tuple
 from app.domain.repositories.vector_repository import VectorRepository
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, models
+
+
+@dataclass(frozen=True)
+class QdrantCollectionConfig:
+    """
+    Ajustes de memoria y de índice de las colecciones.
+
+    `quantization` puede ser "none", "scalar" (int8) o "binary". Con
+    `on_disk` los vectores originales se quedan en disco y solo los
+    cuantizados en RAM; las búsquedas los usan para reordenar (`rescore`)
+    los `oversampling` × top_k mejores candidatos. Los valores a 0 dejan el
+    valor por defecto de Qdrant.
+    """
+    quantization: str = "none"
+    quantile: float = 0.99
+    always_ram: bool = True
+    on_disk: bool = False
+    rescore: bool = True
+    oversampling: float = 2.0
+    hnsw_m: int = 0
+    hnsw_ef_construct: int = 0
+    hnsw_ef: int = 0
+    hnsw_on_disk: bool = False
+    indexing_threshold: int = 0
+    memmap_threshold: int = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "QdrantCollectionConfig":
+        return cls(
+            quantization=settings.qdrant_quantization,
+            quantile=settings.qdrant_quantization_quantile,
+            always_ram=settings.qdrant_quantization_always_ram,
+            on_disk=settings.qdrant_on_disk,
+            rescore=settings.qdrant_rescore,
+            oversampling=settings.qdrant_oversampling,
+            hnsw_m=settings.qdrant_hnsw_m,
+            hnsw_ef_construct=settings.qdrant_hnsw_ef_construct,
+            hnsw_ef=settings.qdrant_hnsw_ef,
+            hnsw_on_disk=settings.qdrant_hnsw_on_disk,
+            indexing_threshold=settings.qdrant_indexing_threshold,
+            memmap_threshold=settings.qdrant_memmap_threshold,
+        )
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=self.quantile, always_ram=self.always_ram))
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=self.always_ram))
+        if self.quantization == "none":
+            return None
+        raise ValueError(f"Cuantización no soportada: {self.quantization}")
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(
+            m=self.hnsw_m or None,
+            ef_construct=self.hnsw_ef_construct or None,
+            on_disk=self.hnsw_on_disk)
+
+    def optimizers_config(self) -> models.OptimizersConfigDiff:
+        return models.OptimizersConfigDiff(
+            indexing_threshold=self.indexing_threshold or None,
+            memmap_threshold=self.memmap_threshold or None)
+
+    def search_params(self, hnsw_ef: int | None = None, rescore: bool | None = None, exact: bool = False) -> models.SearchParams:
+        quantization = None
+        if self.quantization != "none":
+            quantization = models.QuantizationSearchParams(
+                rescore=self.rescore if rescore is None else rescore,
+                oversampling=self.oversampling)
+        return models.SearchParams(
+            hnsw_ef=hnsw_ef or self.hnsw_ef or None,
+            exact=exact,
+            quantization=quantization)
 
 
 class VectorDBQdrant(VectorRepository):
@@ -9,46 +84,122 @@ class VectorDBQdrant(VectorRepository):
         vector_size: int,
         url: str = "http://localhost:6333",
         api_key: str = "super_secret_api_key",
-        distance: str = "Cosine"):
-        self.client: QdrantClient = QdrantClient(
+        distance: str = "Cosine",
+        collection_config: QdrantCollectionConfig | None = None,
+        client: QdrantClient | None = None,
+        score_threshold: float | None = None):
+        self.client: QdrantClient = client or QdrantClient(
           url=url,
           api_key=api_key
       )
         self.collection_name: str = collection_name
         self.vector_size: int = vector_size
         self.distance: str = distance
+        self.collection_config = collection_config or QdrantCollectionConfig()
+        # Los puntos menos parecidos que este umbral no cuentan como coincidencia
+        # en search_many/search_ids; search_scored devuelve el ranking completo
+        self.score_threshold = score_threshold
         self._create_collection()
     
     def _create_collection(self):
         if not self.client.collection_exists(self.collection_name):
             self.client.create_collection(self.collection_name,
-            vectors_config={
-                "size": self.vector_size,
-                "distance": self.distance
-            }
+            vectors_config=models.VectorParams(
+                size=self.vector_size,
+                distance=self.distance,
+                on_disk=self.collection_config.on_disk),
+            hnsw_config=self.collection_config.hnsw_config(),
+            quantization_config=self.collection_config.quantization_config(),
+            optimizers_config=self.collection_config.optimizers_config(),
             )
 
+    def apply_collection_config(self):
+        """
+        Aplica la configuración actual a una colección ya creada. Qdrant
+        reconstruye los segmentos en segundo plano; la colección sigue
+        disponible mientras tanto.
+        """
+        quantization_config = self.collection_config.quantization_config() or models.Disabled.DISABLED
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=self.collection_config.on_disk)},
+            hnsw_config=self.collection_config.hnsw_config(),
+            quantization_config=quantization_config,
+            optimizers_config=self.collection_config.optimizers_config(),
+        )
+
+    def sample_vectors(self, limit: int) -> List[List[float]]:
+        """Primeros `limit` vectores de la colección, para los benchmarks."""
+        points, _ = self.client.scroll(
+            collection_name=self.collection_name,
+            limit=limit,
+            with_vectors=True,
+            with_payload=False,
+        )
+        return [point.vector for point in points]
+
     def add_vector(self, vector: List[float], id: str):
+        self.add_vectors([vector], [id])
+
+    def add_vectors(self, vectors: List[List[float]], ids: List[str]):
+        """Inserta todos los puntos con un solo upsert."""
+        if not ids:
+            return
         self.client.upsert(
             collection_name=self.collection_name,
-            points=[{"id": id, "vector": vector}],
+            points=[models.PointStruct(id=id, vector=list(vector)) for vector, id in zip(vectors, ids)],
         )
-        self.client.add(self.collection_name, vector)
 
     def search_ids(self, vector: List[float],top_k: int=10) ->Tuple[bool, List[str] | None, str]:
+        result, ids, error = self.search_many([vector], top_k=top_k)
+        if not result:
+            return False, None, error
+        return True, ids[0], ""
+
+    def search_many(self,
+        vectors: List[List[float]],
+        top_k: int = 10,
+        hnsw_ef: int | None = None,
+        rescore: bool | None = None,
+        exact: bool = False) -> Tuple[bool, List[List[str]] | None, str]:
+        """Busca todos los vectores en una sola petición de búsqueda por lotes."""
+        if not vectors:
+            return True, [], ""
         try:
-            results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=vector,
-                    limit=top_k,
-                )
-            ids = [str(r.id)for r in results]
+            params = self.collection_config.search_params(hnsw_ef=hnsw_ef, rescore=rescore, exact=exact)
+            batch_results = self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=[
+                    models.SearchRequest(vector=list(vector), limit=top_k, params=params, score_threshold=self.score_threshold)
+                    for vector in vectors
+                ],
+            )
+            ids = [[str(r.id) for r in results] for results in batch_results]
             return True, ids, ""
         except Exception as e:
-            return False, None, f"Error al buscar los IDs:"
+            return False, None, f"Error al buscar los IDs: {e}"
     
+    def search_scored(self, vector: List[float], top_k: int = 10, offset: int = 0) -> Tuple[bool, List[Tuple[str, float]] | None, str]:
+        try:
+            results = self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=[models.SearchRequest(
+                    vector=list(vector),
+                    limit=top_k,
+                    offset=offset,
+                    params=self.collection_config.search_params())],
+            )[0]
+            return True, [(str(r.id), r.score) for r in results], ""
+        except Exception as e:
+            return False, None, f"Error al buscar los IDs: {e}"
+
     def delete_by_id(self, id: str):
+        self.delete_many([id])
+
+    def delete_many(self, ids: List[str]):
+        if not ids:
+            return
         self.client.delete(
             collection_name=self.collection_name,
-            points_selector=[id]
-        )
\ No newline at end of file
+            points_selector=models.PointIdsList(points=list(ids))
+        )
@@ -0,0 +1,85 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from app.domain.interfaces.embedding_cache import EmbeddingCache
+from app.domain.interfaces.embedding_service import EmbeddingService
+from app.domain.models.decoded_image import DecodedImage
+
+
+class CachedEmbeddingServiceImpl(EmbeddingService):
+    """
+    Consulta la caché de embeddings antes de pasar las imágenes al modelo.
+
+    Solo se cachean las imágenes con `content_hash` (las de las fotos
+    importadas): reimportar una foto, reintentar una importación fallida o
+    reconstruir la base vectorial pasa a ser una lectura del disco. Las
+    consultas de búsqueda y el texto van siempre al modelo.
+    """
+
+    def __init__(self,
+        embedding_service: EmbeddingService,
+        embedding_cache: EmbeddingCache,
+        model_name: str,
+        model_version: str):
+        self.embedding_service = embedding_service
+        self.embedding_cache = embedding_cache
+        self.model_name = model_name
+        self.model_version = model_version
+
+    def _lookup(self, images: List[DecodedImage]) -> List[List[float] | None]:
+        hashes = [image.content_hash for image in images if image.content_hash]
+        if not hashes:
+            return [None] * len(images)
+        try:
+            cached = iter(self.embedding_cache.get_many(hashes, self.model_name, self.model_version))
+        except Exception as e:
+            print(f"No se pudo leer la caché de embeddings: {e}")
+            return [None] * len(images)
+        embeddings: List[List[float] | None] = []
+        for image in images:
+            rows = next(cached) if image.content_hash else None
+            embeddings.append(rows[0].tolist() if rows is not None and len(rows) else None)
+        return embeddings
+
+    def _store(self, images: List[DecodedImage], embeddings: List[List[float]]):
+        for image, embedding in zip(images, embeddings):
+            if not image.content_hash or embedding is None:
+                continue
+            try:
+                self.embedding_cache.put(
+                    image.content_hash, self.model_name, self.model_version, np.asarray([embedding], dtype=np.float32))
+            except Exception as e:
+                print(f"No se pudo guardar el embedding en la caché: {e}")
+
+    def get_image_embedding(self, image: DecodedImage) -> Tuple[bool, List[float] | None, str]:
+        result, embeddings, error = self.get_image_embeddings([image])
+        return result, embeddings[0] if result else None, error
+
+    def get_image_embeddings(self, images: List[DecodedImage]) -> Tuple[bool, List[List[float]] | None, str]:
+        embeddings = self._lookup(images)
+        missing = [position for position, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return True, embeddings, ""
+
+        pending = [images[position] for position in missing]
+        if len(pending) == 1:
+            result, embedding, error = self.embedding_service.get_image_embedding(pending[0])
+            computed = [embedding]
+        else:
+            result, computed, error = self.embedding_service.get_image_embeddings(pending)
+        if not result:
+            return False, None, error
+        self._store(pending, computed)
+        for position, embedding in zip(missing, computed):
+            embeddings[position] = embedding
+        return True, embeddings, ""
+
+    def get_embedding(self, file_content: bytes) -> Tuple[bool, List[float] | None, str]:
+        return self.embedding_service.get_embedding(file_content)
+
+    def get_embeddings(self, files_content: List[bytes]) -> Tuple[bool, List[List[float] | None] | None, str]:
+        return self.embedding_service.get_embeddings(files_content)
+
+    def get_text_embedding(self, text: str) -> Tuple[bool, List[float] | None, str]:
+        return self.embedding_service.get_text_embedding(text)
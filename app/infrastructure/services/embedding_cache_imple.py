@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from app.domain.interfaces.embedding_cache import EmbeddingCache
+
+
+class MmapEmbeddingCacheImpl(EmbeddingCache):
+    """
+    Caché de embeddings en disco. Cada (modelo, versión) tiene un archivo de
+    filas float32 de tamaño fijo que se lee proyectado en memoria (mmap); un
+    índice SQLite guarda qué filas ocupa cada hash y cuándo se usó por última
+    vez.
+
+    Al pasar de `max_bytes` se descartan las entradas usadas hace más tiempo
+    y sus filas se reutilizan en las siguientes escrituras, así que los
+    archivos no crecen más allá del límite. Varios procesos pueden compartir
+    el mismo directorio: cada lectura o escritura es una transacción
+    `BEGIN IMMEDIATE` del índice.
+    """
+    INDEX_NAME = "index.sqlite"
+    # Entradas descartadas de una vez al superar el límite
+    EVICTION_BATCH = 256
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (archivo proyectado, filas proyectadas) por espacio de nombres
+        self._maps: Dict[int, Tuple[np.memmap, int]] = {}
+        self._connection = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        self._pid = os.getpid()
+        connection = sqlite3.connect(
+            os.path.join(self.directory, self.INDEX_NAME),
+            timeout=60,
+            isolation_level=None,
+            check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS namespaces (
+                id INTEGER PRIMARY KEY,
+                model TEXT NOT NULL,
+                version TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                slots INTEGER NOT NULL DEFAULT 0,
+                live INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (model, version)
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                hash TEXT NOT NULL,
+                namespace INTEGER NOT NULL,
+                slots BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (hash, namespace)
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            CREATE TABLE IF NOT EXISTS free_slots (
+                namespace INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                PRIMARY KEY (namespace, slot)
+            );
+        """)
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Proceso hijo creado con fork: la conexión del padre no se puede compartir
+                self._maps.clear()
+                self._connection = self._connect()
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def _path(self, namespace: int) -> str:
+        return os.path.join(self.directory, f"{namespace}.f32")
+
+    def _rows(self, namespace: int, dim: int, slots: np.ndarray) -> np.ndarray:
+        if len(slots) == 0:
+            return np.empty((0, dim), dtype=np.float32)
+        mapped, mapped_rows = self._maps.get(namespace, (None, 0))
+        if int(slots.max()) >= mapped_rows:
+            # Otro proceso ha hecho crecer el archivo: se vuelve a proyectar entero
+            mapped_rows = os.path.getsize(self._path(namespace)) // (dim * 4)
+            mapped = np.memmap(self._path(namespace), dtype=np.float32, mode="r", shape=(mapped_rows, dim))
+            self._maps[namespace] = (mapped, mapped_rows)
+        return np.array(mapped[slots])
+
+    def get_many(self, hashes: List[str], model: str, version: str) -> List[np.ndarray | None]:
+        results: List[np.ndarray | None] = [None] * len(hashes)
+        with self._transaction() as db:
+            namespace = db.execute(
+                "SELECT id, dim FROM namespaces WHERE model = ? AND version = ?", (model, version)).fetchone()
+            if namespace is None:
+                return results
+            namespace_id, dim = namespace
+            now = time.time()
+            for position, hash in enumerate(hashes):
+                entry = db.execute(
+                    "SELECT slots FROM entries WHERE hash = ? AND namespace = ?", (hash, namespace_id)).fetchone()
+                if entry is None:
+                    continue
+                db.execute(
+                    "UPDATE entries SET last_used = ? WHERE hash = ? AND namespace = ?", (now, hash, namespace_id))
+                # Se lee dentro de la transacción: ningún proceso puede reutilizar estas filas mientras tanto
+                results[position] = self._rows(namespace_id, dim, np.frombuffer(entry[0], dtype=np.int64))
+        return results
+
+    def put(self, hash: str, model: str, version: str, rows: np.ndarray):
+        rows = np.ascontiguousarray(rows, dtype=np.float32)
+        if rows.ndim != 2:
+            raise ValueError(f"Se esperaba una matriz (n, dim), no {rows.shape}")
+        row_bytes = rows.shape[1] * 4
+        if len(rows) * row_bytes > self.max_bytes:
+            return
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR IGNORE INTO namespaces (model, version, dim) VALUES (?, ?, ?)", (model, version, rows.shape[1]))
+            namespace_id, dim = db.execute(
+                "SELECT id, dim FROM namespaces WHERE model = ? AND version = ?", (model, version)).fetchone()
+            if dim != rows.shape[1]:
+                raise ValueError(f"{model} {version} guarda vectores de {dim} dimensiones, no de {rows.shape[1]}")
+
+            previous = db.execute(
+                "SELECT slots FROM entries WHERE hash = ? AND namespace = ?", (hash, namespace_id)).fetchone()
+            if previous is not None:
+                self._release(db, namespace_id, hash, previous[0])
+
+            # Se libera sitio antes de reservar filas para reutilizar las descartadas
+            self._evict(db, incoming=len(rows) * row_bytes)
+            slots = self._allocate(db, namespace_id, len(rows))
+            self._write(namespace_id, row_bytes, slots, rows)
+            db.execute(
+                "INSERT INTO entries (hash, namespace, slots, last_used) VALUES (?, ?, ?, ?)",
+                (hash, namespace_id, slots.tobytes(), time.time()))
+            db.execute("UPDATE namespaces SET live = live + ? WHERE id = ?", (len(rows), namespace_id))
+
+    def _allocate(self, db: sqlite3.Connection, namespace: int, count: int) -> np.ndarray:
+        """Filas libres de entradas descartadas y, si no bastan, filas nuevas al final del archivo."""
+        reused = [slot for slot, in db.execute(
+            "SELECT slot FROM free_slots WHERE namespace = ? LIMIT ?", (namespace, count))]
+        db.executemany("DELETE FROM free_slots WHERE namespace = ? AND slot = ?", [(namespace, slot) for slot in reused])
+        missing = count - len(reused)
+        if missing > 0:
+            end, = db.execute("SELECT slots FROM namespaces WHERE id = ?", (namespace,)).fetchone()
+            db.execute("UPDATE namespaces SET slots = slots + ? WHERE id = ?", (missing, namespace))
+            reused.extend(range(end, end + missing))
+        return np.asarray(reused, dtype=np.int64)
+
+    def _write(self, namespace: int, row_bytes: int, slots: np.ndarray, rows: np.ndarray):
+        if len(slots) == 0:
+            return
+        descriptor = os.open(self._path(namespace), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            for slot, row in zip(slots, rows):
+                os.pwrite(descriptor, row.tobytes(), int(slot) * row_bytes)
+        finally:
+            os.close(descriptor)
+
+    def _release(self, db: sqlite3.Connection, namespace: int, hash: str, slots_blob: bytes):
+        slots = np.frombuffer(slots_blob, dtype=np.int64)
+        db.executemany(
+            "INSERT OR IGNORE INTO free_slots (namespace, slot) VALUES (?, ?)", [(namespace, int(slot)) for slot in slots])
+        db.execute("DELETE FROM entries WHERE hash = ? AND namespace = ?", (hash, namespace))
+        db.execute("UPDATE namespaces SET live = live - ? WHERE id = ?", (len(slots), namespace))
+
+    def _evict(self, db: sqlite3.Connection, incoming: int = 0):
+        """Descarta las entradas usadas hace más tiempo hasta que quepan `incoming` bytes más."""
+        used, = db.execute("SELECT COALESCE(SUM(live * dim * 4), 0) FROM namespaces").fetchone()
+        used += incoming
+        while used > self.max_bytes:
+            oldest = db.execute(
+                "SELECT e.hash, e.namespace, e.slots, n.dim FROM entries e JOIN namespaces n ON n.id = e.namespace "
+                "ORDER BY e.last_used LIMIT ?", (self.EVICTION_BATCH,)).fetchall()
+            if not oldest:
+                return
+            for hash, namespace, slots_blob, dim in oldest:
+                self._release(db, namespace, hash, slots_blob)
+                used -= len(slots_blob) // 8 * dim * 4
+                if used <= self.max_bytes:
+                    return
+
+    def close(self):
+        with self._lock:
+            self._maps.clear()
+            self._connection.close()
@@ -1,5 +1,5 @@
 from app.domain.interfaces.embedding_service import EmbeddingService
-from sentence_transformers import SentenceTransformer
+from app.domain.models.decoded_image import DecodedImage
 from PIL import Image
 import io
 
@@ -8,14 +8,60 @@ from typing import List, Tuple
 
 class EmbeddingServiceImpl(EmbeddingService):
 
-  def __init__(self, model_name: str = "clip-ViT-B-32"):
+  def __init__(self, model_name: str = "clip-ViT-B-32", batch_size: int = 32):
+        # sentence_transformers carga torch: se importa al crear el servicio, no al arrancar
+        from sentence_transformers import SentenceTransformer
+
         self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
 
   def get_embedding(self, file_content: bytes) -> Tuple[bool, List[float] | None, str]:
     try:
-        print(f"type(file_content): {type(file_content)}")
         image = Image.open(io.BytesIO(file_content)).convert("RGB")
         embedding = self.model.encode(image, convert_to_numpy=True)
         return True, embedding.tolist(), ""
     except Exception as e:
-        return False, None, f"Error al obtener el embedding: {e}"
\ No newline at end of file
+        return False, None, f"Error al obtener el embedding: {e}"
+
+  def get_embeddings(self, files_content: List[bytes]) -> Tuple[bool, List[List[float] | None] | None, str]:
+    try:
+        images = []
+        positions = []
+        for position, file_content in enumerate(files_content):
+            try:
+                images.append(Image.open(io.BytesIO(file_content)).convert("RGB"))
+                positions.append(position)
+            except Exception as e:
+                print(f"No se pudo decodificar la imagen {position}: {e}")
+
+        embeddings: List[List[float] | None] = [None] * len(files_content)
+        if images:
+            encoded = self.model.encode(images, batch_size=self.batch_size, convert_to_numpy=True)
+            for position, embedding in zip(positions, encoded):
+                embeddings[position] = embedding.tolist()
+        return True, embeddings, ""
+    except Exception as e:
+        return False, None, f"Error al obtener los embeddings: {e}"
+
+
+  def get_image_embedding(self, image: DecodedImage) -> Tuple[bool, List[float] | None, str]:
+    try:
+        embedding = self.model.encode(image.image, convert_to_numpy=True)
+        return True, embedding.tolist(), ""
+    except Exception as e:
+        return False, None, f"Error al obtener el embedding: {e}"
+
+  def get_image_embeddings(self, images: List[DecodedImage]) -> Tuple[bool, List[List[float]] | None, str]:
+    try:
+        encoded = self.model.encode([image.image for image in images], batch_size=self.batch_size, convert_to_numpy=True)
+        return True, encoded.tolist(), ""
+    except Exception as e:
+        return False, None, f"Error al obtener los embeddings: {e}"
+
+  def get_text_embedding(self, text: str) -> Tuple[bool, List[float] | None, str]:
+    try:
+        # Los modelos CLIP de sentence-transformers codifican el texto con su encoder de texto
+        embedding = self.model.encode(text, convert_to_numpy=True)
+        return True, embedding.tolist(), ""
+    except Exception as e:
+        return False, None, f"Error al obtener el embedding del texto: {e}"
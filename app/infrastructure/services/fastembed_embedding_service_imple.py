@@ -0,0 +1,155 @@
+import io
+import os
+import shutil
+import threading
+from typing import Any, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.domain.interfaces.embedding_service import EmbeddingService
+from app.domain.models.decoded_image import DecodedImage
+
+
+class FastEmbedEmbeddingServiceImpl(EmbeddingService):
+    """
+    Embeddings CLIP con fastembed (ONNX Runtime) en lugar de PyTorch: mismo
+    modelo y mismos pesos que sentence-transformers, con menos latencia y
+    mucha menos memoria residente en nodos sin GPU.
+
+    Los vectores se devuelven normalizados (L2): fastembed normaliza los de
+    imagen pero no los de texto de CLIP. Con DISTANCE=Cosine son
+    intercambiables con los ya guardados por el backend de PyTorch.
+
+    Con `quantize` los pesos se cuantizan a int8 la primera vez y la copia se
+    guarda junto al modelo descargado. `threads` fija los hilos de ONNX
+    Runtime de cada modelo (0 = uno por núcleo). El modelo de texto solo se
+    carga con la primera búsqueda por texto.
+    """
+
+    # Exportaciones ONNX (imagen, texto) de los modelos de sentence-transformers
+    MODELS = {
+        "clip-ViT-B-32": ("Qdrant/clip-ViT-B-32-vision", "Qdrant/clip-ViT-B-32-text"),
+    }
+
+    def __init__(self,
+        model_name: str = "clip-ViT-B-32",
+        batch_size: int = 32,
+        threads: int = 0,
+        quantize: bool = False,
+        cache_dir: str | None = None):
+        if model_name not in self.MODELS:
+            raise ValueError(f"El modelo {model_name} no tiene versión ONNX para fastembed")
+        self.image_model_name, self.text_model_name = self.MODELS[model_name]
+        self.batch_size = batch_size
+        self.threads = threads or None
+        self.quantize = quantize
+        self.cache_dir = cache_dir
+        self.model = self._load(self._image_embedding_class(), self.image_model_name)
+        self._text_model: Any | None = None
+        self._text_model_lock = threading.Lock()
+
+    @staticmethod
+    def _image_embedding_class():
+        from fastembed import ImageEmbedding
+
+        return ImageEmbedding
+
+    @staticmethod
+    def _text_embedding_class():
+        from fastembed import TextEmbedding
+
+        return TextEmbedding
+
+    def _load(self, model_class, model_name: str):
+        specific_model_path = self._quantized_model_path(model_class, model_name) if self.quantize else None
+        return model_class(
+            model_name,
+            cache_dir=self.cache_dir,
+            threads=self.threads,
+            providers=["CPUExecutionProvider"],
+            specific_model_path=specific_model_path)
+
+    def _quantized_model_path(self, model_class, model_name: str) -> str:
+        """Copia del modelo con los pesos en int8; se genera una sola vez."""
+        from huggingface_hub import snapshot_download
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        description = next(
+            (description for description in model_class.list_supported_models() if description["model"] == model_name),
+            None)
+        if description is None:
+            raise ValueError(f"fastembed no soporta el modelo {model_name}")
+        model_file = description["model_file"]
+        source = snapshot_download(repo_id=description["sources"]["hf"], cache_dir=self.cache_dir)
+        # models--<org>--<modelo>/int8, junto a snapshots/ de la descarga original
+        target = os.path.join(os.path.dirname(os.path.dirname(source)), "int8")
+        if os.path.exists(os.path.join(target, model_file)):
+            return target
+
+        shutil.copytree(source, target, ignore=shutil.ignore_patterns(model_file), dirs_exist_ok=True)
+        partial = os.path.join(target, f"{model_file}.{os.getpid()}.partial")
+        quantize_dynamic(os.path.join(source, model_file), partial, weight_type=QuantType.QInt8)
+        # Otro proceso puede estar cuantizando a la vez: el archivo final aparece entero o no aparece
+        os.replace(partial, os.path.join(target, model_file))
+        return target
+
+    def _text(self):
+        with self._text_model_lock:
+            if self._text_model is None:
+                self._text_model = self._load(self._text_embedding_class(), self.text_model_name)
+            return self._text_model
+
+    @staticmethod
+    def _normalized(embeddings) -> List[List[float]]:
+        vectors = np.asarray(list(embeddings), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms == 0, 1, norms)).tolist()
+
+    def _encode(self, images: List[Image.Image]) -> List[List[float]]:
+        images = [image if image.mode == "RGB" else image.convert("RGB") for image in images]
+        return self._normalized(self.model.embed(images, batch_size=self.batch_size))
+
+    def get_embedding(self, file_content: bytes) -> Tuple[bool, List[float] | None, str]:
+        try:
+            image = Image.open(io.BytesIO(file_content)).convert("RGB")
+            return True, self._encode([image])[0], ""
+        except Exception as e:
+            return False, None, f"Error al obtener el embedding: {e}"
+
+    def get_embeddings(self, files_content: List[bytes]) -> Tuple[bool, List[List[float] | None] | None, str]:
+        try:
+            images = []
+            positions = []
+            for position, file_content in enumerate(files_content):
+                try:
+                    images.append(Image.open(io.BytesIO(file_content)).convert("RGB"))
+                    positions.append(position)
+                except Exception as e:
+                    print(f"No se pudo decodificar la imagen {position}: {e}")
+
+            embeddings: List[List[float] | None] = [None] * len(files_content)
+            if images:
+                for position, embedding in zip(positions, self._encode(images)):
+                    embeddings[position] = embedding
+            return True, embeddings, ""
+        except Exception as e:
+            return False, None, f"Error al obtener los embeddings: {e}"
+
+    def get_image_embedding(self, image: DecodedImage) -> Tuple[bool, List[float] | None, str]:
+        try:
+            return True, self._encode([image.image])[0], ""
+        except Exception as e:
+            return False, None, f"Error al obtener el embedding: {e}"
+
+    def get_image_embeddings(self, images: List[DecodedImage]) -> Tuple[bool, List[List[float]] | None, str]:
+        try:
+            return True, self._encode([image.image for image in images]), ""
+        except Exception as e:
+            return False, None, f"Error al obtener los embeddings: {e}"
+
+    def get_text_embedding(self, text: str) -> Tuple[bool, List[float] | None, str]:
+        try:
+            return True, self._normalized(self._text().embed([text]))[0], ""
+        except Exception as e:
+            return False, None, f"Error al obtener el embedding del texto: {e}"
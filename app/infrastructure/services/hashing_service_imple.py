@@ -1,9 +1,33 @@
 import hashlib
+from mmap import mmap
+from typing import BinaryIO
 from app.domain.interfaces.hashing_service import HashingService
 
 
 class HashingServiceImpl(HashingService):
-  def calculate_file_hash(self, file_content: bytes) -> str:
+  def __init__(self, chunk_size: int = 1024 * 1024):
+    self.chunk_size = chunk_size
+
+  def calculate_file_hash(self, file_content: bytes | mmap) -> str:
     """Calcula el hash SHA-256 de un archivo."""
     hash_obj = hashlib.sha256(file_content)
-    return hash_obj.hexdigest()
\ No newline at end of file
+    return hash_obj.hexdigest()
+
+  def calculate_stream_hash(self, stream: BinaryIO) -> str:
+    """Calcula el hash SHA-256 leyendo el stream por bloques, sin cargarlo entero en memoria."""
+    hash_obj = hashlib.sha256()
+    if hasattr(stream, "readinto"):
+      # Reutilizamos el mismo buffer para no crear un bytes nuevo por bloque
+      buffer = bytearray(self.chunk_size)
+      view = memoryview(buffer)
+      while read := stream.readinto(view):
+        hash_obj.update(view[:read])
+    else:
+      while chunk := stream.read(self.chunk_size):
+        hash_obj.update(chunk)
+    return hash_obj.hexdigest()
+
+  def calculate_path_hash(self, path: str) -> str:
+    """Calcula el hash SHA-256 de un archivo en disco por bloques."""
+    with open(path, "rb", buffering=0) as file:
+      return self.calculate_stream_hash(file)
@@ -0,0 +1,48 @@
+from io import BytesIO
+from mmap import mmap
+from typing import Tuple
+
+from PIL import Image
+
+from app.domain.interfaces.extension_service import ExtensionService
+from app.domain.interfaces.image_decoder_service import ImageDecoderService
+from app.domain.models.decoded_image import DecodedImage
+
+
+class ImageDecoderServiceImpl(ImageDecoderService):
+
+    def __init__(self, extension_service: ExtensionService):
+        self.extension_service = extension_service
+
+    def decode(self, file_content: bytes | mmap) -> Tuple[bool, DecodedImage | None, str]:
+        try:
+            extension = self.extension_service.get_file_extension_from_bytes(file_content)
+            mime_type = self.extension_service.get_mime_type_from_bytes(file_content)
+            if extension is None or mime_type is None:
+                return False, None, "Error al obtener la extensión o el tipo MIME del archivo"
+
+            if extension in {'heic', 'heif'}:
+                import pillow_heif
+
+                heif_file = pillow_heif.read_heif(file_content)
+                if not heif_file.data:
+                    return False, None, "HEIF file no tiene datos de imagen válidos"
+                image = Image.frombytes(
+                    heif_file.mode,
+                    heif_file.size,
+                    heif_file.data,
+                    "raw"
+                )
+            else:
+                # Un archivo proyectado se lee directamente, sin copiarlo a un BytesIO
+                stream = file_content if isinstance(file_content, mmap) else BytesIO(file_content)
+                stream.seek(0)
+                image = Image.open(stream)
+
+            # Todas las etapas trabajan en RGB, convertimos una sola vez
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.load()
+            return True, DecodedImage(image=image, extension=extension, mime_type=mime_type), ""
+        except Exception as e:
+            return False, None, f"Error al decodificar la imagen: {e}"
@@ -0,0 +1,97 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Set
+
+import numpy as np
+
+from app.domain.interfaces.known_hash_filter import KnownHashFilter
+
+
+class KnownHashFilterImpl(KnownHashFilter):
+    """
+    Guarda los primeros 64 bits de cada SHA-256 en un array ordenado de uint64
+    (8 bytes por foto). Los hashes nuevos se acumulan en un set y se mezclan
+    con el array cuando superan `merge_threshold`.
+
+    Una coincidencia de prefijo es un "puede que exista" que se confirma en la
+    base de datos; un fallo descarta la consulta por completo.
+
+    Cada proceso (API, cola de trabajos, CLI) tiene su propio filtro. Con
+    `source`, ante un fallo se leen los hashes importados por los demás
+    procesos desde la última lectura, como mucho una vez cada
+    `refresh_interval` segundos. Las lecturas se solapan `overlap` segundos
+    para no perder fotos de transacciones que confirmaron tarde; si aun así
+    se escapa alguna, la restricción única de `photo.hash` la rechaza al guardar.
+    """
+
+    def __init__(self,
+        merge_threshold: int = 4096,
+        source: Callable[[datetime | None], Iterable[str]] | None = None,
+        refresh_interval: float = 1.0,
+        overlap: float = 60.0):
+        self.merge_threshold = merge_threshold
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._prefixes: np.ndarray = np.empty(0, dtype=np.uint64)
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # Hora UTC de la última lectura de `source` (None: aún no se ha leído nada)
+        self._synced_at: datetime | None = None
+        self._refreshed_at = 0.0
+
+    @staticmethod
+    def _prefix(hash: str) -> int:
+        return int(hash[:16], 16)
+
+    def might_contain(self, hash: str) -> bool:
+        if self._contains(hash):
+            return True
+        if self.source is None or time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return False
+        return self.refresh() and self._contains(hash)
+
+    def refresh(self) -> bool:
+        """Añade los hashes que `source` conoce desde la última lectura. Devuelve False si otro hilo ya está leyendo."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            since = self._synced_at - self.overlap if self._synced_at is not None else None
+            self.load(self.source(since))
+            self._synced_at = started_at
+            self._refreshed_at = time.monotonic()
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _contains(self, hash: str) -> bool:
+        prefix = self._prefix(hash)
+        with self._lock:
+            if prefix in self._pending:
+                return True
+            prefixes = self._prefixes
+        position = np.searchsorted(prefixes, np.uint64(prefix))
+        return bool(position < len(prefixes) and prefixes[position] == prefix)
+
+    def add(self, hash: str):
+        with self._lock:
+            self._pending.add(self._prefix(hash))
+            if len(self._pending) >= self.merge_threshold:
+                self._merge()
+
+    def load(self, hashes: Iterable[str]):
+        prefixes = np.fromiter((self._prefix(hash) for hash in hashes if hash), dtype=np.uint64)
+        with self._lock:
+            self._prefixes = np.union1d(self._prefixes, prefixes)
+
+    def _merge(self):
+        pending = np.fromiter(self._pending, dtype=np.uint64, count=len(self._pending))
+        self._prefixes = np.union1d(self._prefixes, pending)
+        self._pending.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._prefixes) + len(self._pending)
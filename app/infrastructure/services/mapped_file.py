@@ -0,0 +1,19 @@
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[bytes | mmap.mmap]:
+    """
+    Proyecta el archivo en memoria en solo lectura. Las etapas leen las páginas
+    del disco bajo demanda en lugar de copiar el archivo entero al heap.
+    """
+    with open(path, "rb") as file:
+        # mmap no admite archivos vacíos
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
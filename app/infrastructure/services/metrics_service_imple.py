@@ -0,0 +1,160 @@
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.domain.interfaces.metrics_service import MetricsService
+
+LabelSet = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, LabelSet]
+
+SECONDS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PrometheusMetricsServiceImpl(MetricsService):
+    """
+    Registro de métricas en memoria con salida en el formato de texto de
+    Prometheus, sin dependencias. Los histogramas tienen cubos fijos, así que
+    cada muestra es una búsqueda binaria y tres sumas bajo un lock: el coste
+    es de microsegundos y puede quedarse activo en producción.
+
+    Cada proceso tiene su propio registro; los procesos hijos envían el suyo
+    con `drain` y el padre lo acumula con `merge`.
+    """
+
+    # name -> (tipo, ayuda, cubos); los nombres no listados son histogramas de segundos o contadores
+    METRICS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+        "stage_seconds": ("histogram", "Time spent in each photo processing stage", SECONDS_BUCKETS),
+        "faces_per_photo": ("histogram", "Faces detected in each saved photo", (0, 1, 2, 3, 5, 10, 20, 50)),
+        "photos_saved_total": ("counter", "Photos saved", ()),
+        "duplicates_total": ("counter", "Duplicate photos detected, by detection method", ()),
+        "failures_total": ("counter", "Photos that failed, by stage", ()),
+    }
+
+    def __init__(self, namespace: str = "home_photo"):
+        self.namespace = namespace
+        self._histograms: Dict[MetricKey, List[Any]] = {}
+        self._counters: Dict[MetricKey, float] = {}
+        self._lock = threading.Lock()
+
+    def _buckets(self, name: str) -> Tuple[float, ...]:
+        definition = self.METRICS.get(name)
+        return definition[2] if definition and definition[0] == "histogram" else SECONDS_BUCKETS
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = self._buckets(name)
+        # Primer cubo con límite >= value (los cubos de Prometheus son "le")
+        position = bisect.bisect_left(buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            histogram[0][position] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def _copy(self, reset: bool = False) -> Tuple[Dict[MetricKey, Tuple[List[int], float, int]], Dict[MetricKey, float]]:
+        with self._lock:
+            histograms = {key: (list(counts), total, count) for key, (counts, total, count) in self._histograms.items()}
+            counters = dict(self._counters)
+            if reset:
+                self._histograms.clear()
+                self._counters.clear()
+        return histograms, counters
+
+    def drain(self) -> Dict[str, Any]:
+        histograms, counters = self._copy(reset=True)
+        return {"histograms": histograms, "counters": counters}
+
+    def merge(self, snapshot: Dict[str, Any]):
+        with self._lock:
+            for key, (counts, total, count) in snapshot.get("histograms", {}).items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    self._histograms[key] = [list(counts), total, count]
+                    continue
+                if len(histogram[0]) != len(counts):
+                    continue
+                histogram[0] = [own + other for own, other in zip(histogram[0], counts)]
+                histogram[1] += total
+                histogram[2] += count
+            for key, value in snapshot.get("counters", {}).items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    @staticmethod
+    def _labels(labels: LabelSet, le: str | None = None) -> str:
+        if le is not None:
+            labels = (*labels, ("le", le))
+        if not labels:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+    def _header(self, lines: List[str], name: str, kind: str):
+        definition = self.METRICS.get(name)
+        lines.append(f"# HELP {self.namespace}_{name} {definition[1] if definition else name}")
+        lines.append(f"# TYPE {self.namespace}_{name} {kind}")
+
+    def render(self) -> str:
+        histograms, counters = self._copy()
+
+        lines: List[str] = []
+        described = set()
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            if name not in described:
+                self._header(lines, name, "histogram")
+                described.add(name)
+            metric = f"{self.namespace}_{name}"
+            cumulative = 0
+            for bound, bucket_count in zip(self._buckets(name), counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{self._labels(labels, f'{bound:g}')} {cumulative}")
+            lines.append(f"{metric}_bucket{self._labels(labels, '+Inf')} {count}")
+            lines.append(f"{metric}_sum{self._labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{self._labels(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            if name not in described:
+                self._header(lines, name, "counter")
+                described.add(name)
+            lines.append(f"{self.namespace}_{name}{self._labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _quantile(quantile: float, buckets: Tuple[float, ...], counts: List[int], count: int) -> float:
+        """Estimación por interpolación lineal dentro del cubo, como `histogram_quantile` de Prometheus."""
+        if count == 0:
+            return 0.0
+        rank = quantile * count
+        cumulative = 0
+        for position, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                if position == len(buckets):
+                    return buckets[-1]
+                lower = buckets[position - 1] if position > 0 else 0.0
+                return lower + (buckets[position] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return buckets[-1]
+
+    def summary_lines(self) -> Iterable[str]:
+        histograms, counters = self._copy()
+
+        stages = sorted(
+            ((labels, values) for (name, labels), values in histograms.items() if name == "stage_seconds"),
+            key=lambda item: item[1][1], reverse=True)
+        if stages:
+            yield f"{'etapa':<14}{'n':>7}{'media ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}"
+            for labels, (counts, total, count) in stages:
+                stage = dict(labels).get("stage", "")
+                p50 = self._quantile(0.5, SECONDS_BUCKETS, counts, count) * 1000
+                p95 = self._quantile(0.95, SECONDS_BUCKETS, counts, count) * 1000
+                yield f"{stage:<14}{count:>7}{total / count * 1000:>10.1f}{p50:>10.1f}{p95:>10.1f}{total:>10.1f}"
+        for (name, labels), (_, total, count) in sorted(histograms.items()):
+            if name != "stage_seconds" and count:
+                yield f"{name}{self._labels(labels)}: media {total / count:.2f} ({count} muestras)"
+        for (name, labels), value in sorted(counters.items()):
+            yield f"{name}{self._labels(labels)}: {value:g}"
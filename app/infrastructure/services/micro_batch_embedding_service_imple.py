@@ -0,0 +1,110 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import List, Tuple
+
+from app.domain.interfaces.embedding_service import EmbeddingService
+from app.domain.models.decoded_image import DecodedImage
+
+
+class MicroBatchEmbeddingServiceImpl(EmbeddingService):
+    """
+    Agrupa las peticiones concurrentes de embeddings de imágenes ya decodificadas
+    en una sola llamada a encode.
+
+    Cada petición espera como máximo `max_wait_ms` a que lleguen otras para
+    completar un lote de hasta `batch_size` imágenes.
+
+    Tras `close()` las peticiones nuevas se rechazan y las que ya estaban en
+    cola reciben un error; ninguna espera más de `timeout` segundos.
+    """
+    CLOSED_ERROR = "El servicio de embeddings está cerrado"
+
+    def __init__(self,
+        embedding_service: EmbeddingService,
+        batch_size: int = 32,
+        max_wait_ms: float = 10,
+        timeout: float = 120):
+        self.embedding_service = embedding_service
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = threading.Event()
+        # Comprobar que está abierto y encolar es atómico frente a close()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="embedding-micro-batch", daemon=True)
+        self._worker.start()
+
+    def get_image_embedding(self, image: DecodedImage) -> Tuple[bool, List[float] | None, str]:
+        future: Future = Future()
+        with self._lock:
+            if self._closed.is_set():
+                return False, None, self.CLOSED_ERROR
+            self._queue.put((image, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            return False, None, f"El embedding no llegó en {self.timeout} s"
+
+    # Los lotes ya formados y las imágenes sin decodificar no necesitan esperar a otras peticiones
+    def get_image_embeddings(self, images: List[DecodedImage]) -> Tuple[bool, List[List[float]] | None, str]:
+        return self.embedding_service.get_image_embeddings(images)
+
+    def get_embedding(self, file_content: bytes) -> Tuple[bool, List[float] | None, str]:
+        return self.embedding_service.get_embedding(file_content)
+
+    def get_embeddings(self, files_content: List[bytes]) -> Tuple[bool, List[List[float] | None] | None, str]:
+        return self.embedding_service.get_embeddings(files_content)
+
+    def get_text_embedding(self, text: str) -> Tuple[bool, List[float] | None, str]:
+        return self.embedding_service.get_text_embedding(text)
+
+    def close(self):
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            # Después del marcador de cierre ya no se encola nada
+            self._queue.put(None)
+        self._worker.join()
+
+    def _collect_batch(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect_batch(first)
+            try:
+                result, embeddings, error = self.embedding_service.get_image_embeddings([image for image, _ in batch])
+            except Exception as e:
+                result, embeddings, error = False, None, f"Error al obtener los embeddings: {e}"
+            for position, (_, future) in enumerate(batch):
+                if not result:
+                    future.set_result((False, None, error))
+                else:
+                    future.set_result((True, embeddings[position], ""))
+
+        # Responder a las peticiones que quedaron en cola al cerrar
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                item[1].set_result((False, None, self.CLOSED_ERROR))
@@ -0,0 +1,79 @@
+import threading
+from typing import Dict, Iterable, List, Set, Tuple
+
+from app.domain.interfaces.perceptual_hash_index import PerceptualHashIndex
+
+
+class _Node:
+    __slots__ = ("hash", "ids", "children")
+
+    def __init__(self, hash: int, id: str):
+        self.hash = hash
+        self.ids: List[str] = [id]
+        self.children: Dict[int, "_Node"] = {}
+
+
+class BKTreePerceptualHashIndex(PerceptualHashIndex):
+    """
+    BK-tree en memoria sobre la distancia de Hamming.
+
+    Cada búsqueda solo visita las ramas cuya distancia al nodo está dentro de
+    [d - umbral, d + umbral], por lo que con umbrales pequeños recorre una
+    fracción mínima del árbol. Los hashes se persisten en la columna `phash`
+    de la tabla de fotos y el árbol se reconstruye al arrancar.
+    """
+
+    def __init__(self, max_distance: int = 10):
+        self.max_distance = max_distance
+        self._root: _Node | None = None
+        self._removed: Set[str] = set()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _distance(a: int, b: int) -> int:
+        return (a ^ b).bit_count()
+
+    def add(self, id: str, hash: str):
+        value = int(hash, 16)
+        with self._lock:
+            self._removed.discard(id)
+            if self._root is None:
+                self._root = _Node(value, id)
+                return
+            node = self._root
+            while True:
+                distance = self._distance(value, node.hash)
+                if distance == 0:
+                    node.ids.append(id)
+                    return
+                child = node.children.get(distance)
+                if child is None:
+                    node.children[distance] = _Node(value, id)
+                    return
+                node = child
+
+    def remove(self, id: str):
+        # Borrar nodos de un BK-tree obliga a reconstruirlo; marcamos el id como eliminado
+        with self._lock:
+            self._removed.add(id)
+
+    def load(self, items: Iterable[Tuple[str, str]]):
+        for id, hash in items:
+            self.add(id, hash)
+
+    def search(self, hash: str) -> List[str]:
+        value = int(hash, 16)
+        matches: List[Tuple[int, str]] = []
+        with self._lock:
+            if self._root is None:
+                return []
+            pending = [self._root]
+            while pending:
+                node = pending.pop()
+                distance = self._distance(value, node.hash)
+                if distance <= self.max_distance:
+                    matches.extend((distance, id) for id in node.ids if id not in self._removed)
+                low, high = distance - self.max_distance, distance + self.max_distance
+                pending.extend(child for edge, child in node.children.items() if low <= edge <= high)
+        matches.sort()
+        return [id for _, id in matches]
@@ -0,0 +1,14 @@
+from app.domain.interfaces.perceptual_hash_service import PerceptualHashService
+from app.domain.models.decoded_image import DecodedImage
+
+
+class PerceptualHashServiceImpl(PerceptualHashService):
+
+    def __init__(self, hash_size: int = 8):
+        self.hash_size = hash_size
+
+    def calculate_hash(self, image: DecodedImage) -> str:
+        # imagehash importa scipy; solo se carga al analizar la primera foto
+        import imagehash
+
+        return str(imagehash.phash(image.image, hash_size=self.hash_size))
@@ -1,92 +1,217 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import Any, Dict, List
-from app.domain.interfaces.extension_service import ExtensionService
+from typing import Any, Dict, List, Tuple
+from app.domain.interfaces.embedding_cache import EmbeddingCache
 from app.domain.interfaces.photo_recogniction_service import PhotoRecognictionService
+from app.domain.models.decoded_image import DecodedImage
 import numpy as np
-import pillow_heif
-from PIL import Image
-import face_recognition
+
+FaceLocation = Tuple[int, int, int, int]
 
 
 class PhotoRecognictionServiceImpl(PhotoRecognictionService):
+    """
+    Detecta las caras sobre una copia reducida (lado largo de `detection_size`
+    px) y traslada las cajas a la resolución original para calcular los
+    encodings y recortar las caras. `detection_size=0` detecta sobre la
+    imagen completa.
+
+    Con el modelo "cnn" y `batch_size > 1`, `recognize_faces_many` detecta
+    las caras de varias fotos en una sola llamada a la red.
+
+    Las miniaturas se codifican en paralelo en un pool de `encoding_workers`
+    hilos (Pillow libera el GIL al codificar WebP).
+
+    face_recognition (dlib) se importa la primera vez que se detectan caras:
+    convertir a WebP y generar miniaturas no lo necesitan.
+
+    Con `embedding_cache`, las cajas y los encodings de las fotos con
+    `content_hash` se guardan en la caché (una fila por cara: la caja y los
+    128 valores del encoding); al volver a procesar la foto solo se recortan
+    las caras. La clave incluye el modelo de detección y los parámetros que
+    cambian el resultado.
+    """
 
     def __init__(self,
-    file_content: bytes,
-    extension_service: ExtensionService):
-        self.file_content = file_content
-        self.extension_service = extension_service
-    
-    def recognize_faces(self) -> List[Dict[str, Any]]:
+        model: str = "hog",
+        detection_size: int = 1600,
+        upsample: int = 1,
+        num_jitters: int = 1,
+        batch_size: int = 0,
+        encoding_workers: int = 4,
+        embedding_cache: EmbeddingCache | None = None):
+        self.model = model
+        self.detection_size = detection_size
+        self.upsample = upsample
+        self.num_jitters = num_jitters
+        self.batch_size = batch_size
+        self.encoding_workers = encoding_workers
+        self._encoding_pool: ThreadPoolExecutor | None = None
+        self._encoding_pool_lock = threading.Lock()
+        self.embedding_cache = embedding_cache
+        self.cache_model = f"face_recognition-{model}"
+        self.cache_version = f"{detection_size}-{upsample}-{num_jitters}"
+
+    def _detection_image(self, image: DecodedImage) -> Tuple[DecodedImage, float]:
+        """Imagen sobre la que se detecta y factor para volver a la original."""
+        if not self.detection_size:
+            return image, 1.0
+        small = image.fitted(self.detection_size)
+        return small, image.size[0] / small.size[0]
+
+    @staticmethod
+    def _scale_locations(locations: List[FaceLocation], scale: float, size: Tuple[int, int]) -> List[FaceLocation]:
+        width, height = size
+        return [
+            (
+                max(0, round(top * scale)),
+                min(width, round(right * scale)),
+                min(height, round(bottom * scale)),
+                max(0, round(left * scale)),
+            )
+            for top, right, bottom, left in locations
+        ]
+
+    def face_locations(self, image: DecodedImage) -> List[FaceLocation]:
+        import face_recognition
+
+        small, scale = self._detection_image(image)
+        locations = face_recognition.face_locations(
+            small.array, number_of_times_to_upsample=self.upsample, model=self.model)
+        return self._scale_locations(locations, scale, image.size)
+
+    def _batch_face_locations(self, images: List[DecodedImage]) -> List[List[FaceLocation]]:
+        import face_recognition
+
+        # La CNN por lotes necesita arrays del mismo tamaño: cada copia reducida
+        # se pega en un lienzo común y las cajas quedan en sus coordenadas
+        detections = [self._detection_image(image) for image in images]
+        height = max(small.size[1] for small, _ in detections)
+        width = max(small.size[0] for small, _ in detections)
+        canvases = []
+        for small, _ in detections:
+            canvas = np.zeros((height, width, 3), dtype=np.uint8)
+            canvas[:small.size[1], :small.size[0]] = small.array
+            canvases.append(canvas)
+        batch_locations = face_recognition.batch_face_locations(
+            canvases, number_of_times_to_upsample=self.upsample, batch_size=self.batch_size)
+        return [
+            self._scale_locations(locations, scale, image.size)
+            for locations, (_, scale), image in zip(batch_locations, detections, images)
+        ]
+
+    def _encode_faces(self, image: DecodedImage, face_locations: List[FaceLocation]) -> List[Dict[str, Any]]:
+        if not face_locations:
+            return []
+        import face_recognition
+
+        face_encodings = face_recognition.face_encodings(image.array, face_locations, num_jitters=self.num_jitters)
+        return self._crop_faces(image, face_locations, face_encodings)
+
+    @staticmethod
+    def _crop_faces(image: DecodedImage, face_locations: List[FaceLocation], face_encodings) -> List[Dict[str, Any]]:
+        results = []
+        for (location, encoding ) in zip(face_locations, face_encodings):
+            top, right, bottom, left = location
+            # Recortar la cara
+            face_image = image.image.crop((left, top, right, bottom))
+
+            # Guardar la cara recortada en memoria como bytes
+            buffer = BytesIO()
+            face_image.save(buffer, format="WEBP")
+            
+            results.append({
+                "location": location,               # (top, right, bottom, left)
+                "embedding": encoding.tolist() ,    # Convertimos NumPy array a lista
+                "face_image": buffer.getvalue()
+            })
+
+        return results
+
+    def _cached_faces(self, images: List[DecodedImage]) -> List[List[Dict[str, Any]] | None]:
+        """Caras guardadas en la caché de cada imagen, o None si hay que detectarlas."""
+        hashes = [image.content_hash for image in images if image.content_hash]
+        if self.embedding_cache is None or not hashes:
+            return [None] * len(images)
+        try:
+            cached = iter(self.embedding_cache.get_many(hashes, self.cache_model, self.cache_version))
+        except Exception as e:
+            print(f"No se pudo leer la caché de caras: {e}")
+            return [None] * len(images)
+        results = []
+        for image in images:
+            rows = next(cached) if image.content_hash else None
+            if rows is None:
+                results.append(None)
+                continue
+            face_locations = [tuple(int(value) for value in row[:4]) for row in rows]
+            results.append(self._crop_faces(image, face_locations, rows[:, 4:].astype(np.float64)))
+        return results
+
+    def _store_faces(self, image: DecodedImage, faces: List[Dict[str, Any]]):
+        if self.embedding_cache is None or not image.content_hash:
+            return
+        if faces:
+            rows = np.array([[*face["location"], *face["embedding"]] for face in faces], dtype=np.float32)
+        else:
+            # Una foto sin caras también se guarda: la próxima vez no se vuelve a buscar
+            rows = np.empty((0, 4 + 128), dtype=np.float32)
         try:
-            extension = self.extension_service.get_file_extension_from_bytes(self.file_content)
-            if extension is None:
-                return []
-            if extension in {'heic', 'heif'}:
-                # Procesar archivo HEIC/HEIF
-                heif_file = pillow_heif.read_heif(self.file_content)
-                if not heif_file.data:
-                    print(f"Error: No se pudo leer el archivo HEIC ")
-                    return []
-                
-                image = Image.frombytes(
-                    heif_file.mode,
-                    heif_file.size,
-                    heif_file.data,
-                    "raw"
-                )
-                # Convertir a RGB si es necesario
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                
-                # Convertir a numpy array para face_recognition
-                image_array = np.array(image)
-            else:
-                # Procesar otros formatos
-                file_like = BytesIO(self.file_content)
-                image = face_recognition.load_image_file(file_like)
-                image_array = face_recognition.load_image_file(file_like)
-            face_locations = face_recognition.face_locations(image_array)
-            face_encodings = face_recognition.face_encodings(image_array, face_locations)
-
-            results = []
-            pil_image = Image.fromarray(image)
-            for (location, encoding ) in zip(face_locations, face_encodings):
-                top, right, bottom, left = face_locations
-                buffer = BytesIO()
-                # Recortar la cara
-                face_image = pil_image.crop((left, top, right, bottom))
-
-                # Guardar la cara recortada en memoria como bytes
-                buffer = BytesIO()
-                face_image.save(buffer, format="WEBP")
-                
-                results.append({
-                    "location": location,               # (top, right, bottom, left)
-                    "embedding": encoding.tolist() ,
-                    "face_image": buffer.getvalue()    # Convertimos NumPy array a lista
-                })
-
-            return results
+            self.embedding_cache.put(image.content_hash, self.cache_model, self.cache_version, rows)
+        except Exception as e:
+            print(f"No se pudieron guardar las caras en la caché: {e}")
+
+    def _recognize_faces(self, image: DecodedImage, face_locations: List[FaceLocation]) -> List[Dict[str, Any]]:
+        faces = self._encode_faces(image, face_locations)
+        self._store_faces(image, faces)
+        return faces
+
+    def _detect_faces(self, image: DecodedImage) -> List[Dict[str, Any]]:
+        try:
+            return self._recognize_faces(image, self.face_locations(image))
         except Exception as e:
             print(f"Error procesando archivo: {e}")
             return []
 
-    def get_faces_images(self) -> List[bytes]:
-        
-        # Cargar la imagen desde bytes
-        image = face_recognition.load_image_file(BytesIO(self.file_content))
+    def recognize_faces(self, image: DecodedImage) -> List[Dict[str, Any]]:
+        return self.recognize_faces_many([image])[0]
 
-        # Detectar las ubicaciones de las caras
-        face_locations = face_recognition.face_locations(image)
+    def recognize_faces_many(self, images: List[DecodedImage]) -> List[List[Dict[str, Any]]]:
+        results = self._cached_faces(images)
+        missing = [position for position, faces in enumerate(results) if faces is None]
+        pending = [images[position] for position in missing]
+        for position, faces in zip(missing, self._detect_faces_many(pending)):
+            results[position] = faces
+        return results
 
-        # Convertir a objeto PIL para recortar
-        pil_image = Image.fromarray(image)
+    def _detect_faces_many(self, images: List[DecodedImage]) -> List[List[Dict[str, Any]]]:
+        if self.model != "cnn" or self.batch_size <= 1 or len(images) < 2:
+            return [self._detect_faces(image) for image in images]
+        try:
+            batch_locations = self._batch_face_locations(images)
+        except Exception as e:
+            print(f"Error en la detección por lotes, se procesa foto a foto: {e}")
+            return [self._detect_faces(image) for image in images]
+        results = []
+        for image, face_locations in zip(images, batch_locations):
+            try:
+                results.append(self._recognize_faces(image, face_locations))
+            except Exception as e:
+                print(f"Error procesando archivo: {e}")
+                results.append([])
+        return results
+
+    def get_faces_images(self, image: DecodedImage) -> List[bytes]:
+
+        # Detectar las ubicaciones de las caras
+        face_locations = self.face_locations(image)
 
         faces_bytes = []
 
         for (top, right, bottom, left) in face_locations:
             # Recortar la cara
-            face_image = pil_image.crop((left, top, right, bottom))
+            face_image = image.image.crop((left, top, right, bottom))
 
             # Guardar la cara recortada en memoria como bytes
             buffer = BytesIO()
@@ -95,34 +220,39 @@ class PhotoRecognictionServiceImpl(PhotoRecognictionService):
 
         return faces_bytes
 
-    def to_webp(self, quality: int = 90) -> tuple[bool, BytesIO | None, str ]:
-        try:
-            # Verificar si es un archivo HEIC/HEIF por los primeros bytes
-            extension = self.extension_service.get_file_extension_from_bytes(self.file_content)
-            if extension in {'heic', 'heif'}:
-                # Es un archivo HEIC/HEIF
-                heif_file = pillow_heif.read_heif(self.file_content)
-                if not heif_file.data:
-                    return False, None, "HEIF file no tiene datos de imagen válidos"
-                
-                img = Image.frombytes(
-                    heif_file.mode,
-                    heif_file.size,
-                    heif_file.data,
-                    "raw"
-                )
-            else:
-                # Es un formato estándar (JPEG, PNG, etc.)
-                img = Image.open(BytesIO(self.file_content))
-            
-            # Normalizamos a RGB si la imagen tiene transparencia o paleta
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
+    def _encoder(self) -> ThreadPoolExecutor:
+        with self._encoding_pool_lock:
+            if self._encoding_pool is None:
+                self._encoding_pool = ThreadPoolExecutor(
+                    max_workers=max(1, self.encoding_workers), thread_name_prefix="thumbnail")
+            return self._encoding_pool
+
+    @staticmethod
+    def _encode_webp(image: DecodedImage, quality: int) -> bytes:
+        output = BytesIO()
+        image.image.save(output, format="WEBP", quality=quality)
+        return output.getvalue()
 
+    def render_thumbnails(self, image: DecodedImage, sizes: Dict[int, int]) -> Dict[int, bytes]:
+        """Miniaturas WebP por lado largo (tamaño -> calidad)."""
+        # De mayor a menor: cada tamaño se reduce desde el anterior y no desde el original
+        renditions = []
+        source = image
+        for size in sorted(sizes, reverse=True):
+            source = source.fitted(size)
+            renditions.append((size, source))
+        futures = {
+            size: self._encoder().submit(self._encode_webp, rendition, sizes[size])
+            for size, rendition in renditions
+        }
+        return {size: future.result() for size, future in futures.items()}
+
+    def to_webp(self, image: DecodedImage, quality: int = 90) -> tuple[bool, BytesIO | None, str ]:
+        try:
             output = BytesIO()
-            img.save(output, format="WEBP", quality=quality)
+            image.image.save(output, format="WEBP", quality=quality)
             output.seek(0)
             return True, output, ""
             
         except Exception as e:
-            return False, None, f"Error al convertir a WebP ${e}"
\ No newline at end of file
+            return False, None, f"Error al convertir a WebP ${e}"
@@ -1,16 +1,202 @@
-from fastapi import  FastAPI, UploadFile, File
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Hashable
+
+from fastapi import  FastAPI, UploadFile, File, HTTPException, Request, Response, status
+from app.application.use_cases.analyze_photo import init_analysis_worker
+from app.application.use_cases.browse_photos import BrowsePhotos
 from app.application.use_cases.call_process_photo import CallProcessPhoto
+from app.application.use_cases.get_thumbnail import GetThumbnail
+from app.application.use_cases.search_photos import SearchPage, SearchPhotos
+from app.application.use_cases.ingest_job_queue import IngestJobQueue
+from app.config.container import get_container, is_ready, shutdown, warm_up
+from app.infrastructure.repositories.photo_repository_orm import PhotoRepositoryORM
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    container = get_container()
+    settings = container.config()
+    # "spawn" para no heredar los hilos de torch del proceso principal
+    app.state.cpu_executor = ProcessPoolExecutor(
+        max_workers=settings.api_cpu_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_analysis_worker)
+    app.state.io_executor = ThreadPoolExecutor(
+        max_workers=settings.api_io_workers,
+        thread_name_prefix="upload-io")
+    # Carga el modelo y los clientes antes de aceptar peticiones
+    await asyncio.to_thread(warm_up, container)
+    container.micro_batch_embedding_service()
+    app.state.job_queue = IngestJobQueue(
+        container,
+        spool_dir=settings.upload_spool_dir,
+        workers=settings.job_workers,
+        cpu_executor=app.state.cpu_executor,
+        max_attempts=settings.job_max_attempts,
+        lease_seconds=settings.job_lease_seconds)
+    app.state.job_queue.start()
+    yield
+    await asyncio.to_thread(app.state.job_queue.stop)
+    app.state.cpu_executor.shutdown(cancel_futures=True)
+    app.state.io_executor.shutdown(wait=True)
+    shutdown()
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def _spool_upload(archivo: UploadFile, file_path: str, io_executor: ThreadPoolExecutor) -> str:
+    """
+    Copia el archivo subido a disco por bloques calculando su SHA-256 a la vez,
+    sin tenerlo nunca entero en memoria. Devuelve el hash.
+    """
+    loop = asyncio.get_running_loop()
+    hash_obj = hashlib.sha256()
+    try:
+        with open(file_path, "wb") as file:
+            while chunk := await archivo.read(UPLOAD_CHUNK_SIZE):
+                hash_obj.update(chunk)
+                await loop.run_in_executor(io_executor, file.write, chunk)
+    except Exception:
+        os.remove(file_path)
+        raise
+    return hash_obj.hexdigest()
+
+
+async def _read_upload(archivo: UploadFile, max_bytes: int) -> bytes:
+    """Lee el archivo subido por bloques y lo rechaza (413) en cuanto pasa de `max_bytes`."""
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"La imagen supera el máximo de {max_bytes} bytes")
+    if archivo.size is not None and archivo.size > max_bytes:
+        raise too_large
+    chunks, size = [], 0
+    while chunk := await archivo.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _browse(action: Callable[[BrowsePhotos], Any]) -> Any:
+    container = get_container()
+    session = container.session_factory()()
+    try:
+        return action(BrowsePhotos(PhotoRepositoryORM(session)))
+    finally:
+        session.close()
+
+
+def _search(action: Callable[[SearchPhotos], tuple[bool, SearchPage | None, str]]) -> dict:
+    container = get_container()
+    session = container.session_factory()()
+    try:
+        search_photos = SearchPhotos(
+            embedding_service=container.micro_batch_embedding_service(),
+            image_decoder_service=container.image_decoder_service(),
+            photo_vector_repository=container.photo_vector_repository(),
+            photo_repository=PhotoRepositoryORM(session),
+            embedding_cache=container.query_embedding_cache())
+        result, page, error = action(search_photos)
+        if not result:
+            raise HTTPException(status_code=400, detail=error)
+        return page.to_dict()
+    finally:
+        session.close()
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Compara el ETag con la lista de If-None-Match (separada por comas) según
+    la comparación débil: se ignora el prefijo `W/` y cada etiqueta tiene que
+    coincidir entera. `*` coincide con cualquier recurso que exista.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+async def _cached_json(request: Request, key: Hashable, loader: Callable[[], Any], not_found: str) -> Response:
+    """
+    Respuesta JSON cacheada en memoria con su ETag. `loader` se ejecuta en el
+    pool de E/S solo si la respuesta no está en la caché y devuelve None si el
+    recurso no existe. Un If-None-Match que coincide responde 304 sin cuerpo.
+    """
+    cache = get_container().read_cache()
+    entry = cache.get(key)
+    if entry is None:
+        loop = asyncio.get_running_loop()
+        payload = await loop.run_in_executor(request.app.state.io_executor, loader)
+        if payload is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        entry = (f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body)
+        cache.set(key, entry)
+    etag, body = entry
+    if _etag_matches(etag, request.headers.get("if-none-match", "")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
 
 def api_main():
-    app = FastAPI()
-
-    @app.post("/upload")
-    async def subir_archivo(archivo: UploadFile = File(...)):
-        call_process_photo = CallProcessPhoto()
-        contenido = await archivo.read()  # Leer contenido del archivo
-    
-        result, photo, error = call_process_photo.process_photo(contenido)
+    app = FastAPI(lifespan=lifespan)
+
+    @app.post("/upload", status_code=status.HTTP_202_ACCEPTED)
+    async def subir_archivo(request: Request, response: Response, archivo: UploadFile = File(...), wait: bool = False):
+        loop = asyncio.get_running_loop()
+        io_executor = request.app.state.io_executor
+        job_queue = request.app.state.job_queue
+        file_path = (
+            os.path.join(job_queue.spool_dir, f"{uuid.uuid4()}.wait")
+            if wait
+            else job_queue.spool_path())
+        hash = await _spool_upload(archivo, file_path, io_executor)
+
+        # Las fotos repetidas se descartan antes de decodificarlas
+        call_process_photo = CallProcessPhoto(get_container(), micro_batching=True)
+        photo = await loop.run_in_executor(io_executor, call_process_photo.find_by_hash, hash)
+        if photo:
+            await loop.run_in_executor(io_executor, os.remove, file_path)
+            response.status_code = status.HTTP_200_OK
+            return {
+                "photo": photo,
+                "error": " foto ya procesada"
+            }
+
+        if not wait:
+            # Se procesa en segundo plano a partir del archivo ya guardado
+            job = await asyncio.to_thread(job_queue.enqueue, file_path, hash)
+            return {
+                "job_id": job.id,
+                "status": job.status
+            }
+
+        response.status_code = status.HTTP_200_OK
+        try:
+            result, photo, error = await call_process_photo.process_photo_async(
+                file_path,
+                cpu_executor=request.app.state.cpu_executor,
+                io_executor=io_executor,
+                hash=hash)
+        finally:
+            await loop.run_in_executor(io_executor, os.remove, file_path)
         if (result):
+            # Las listas cacheadas ya no incluyen la foto nueva
+            get_container().read_cache().clear()
             return {
                 "photo": photo
             }
@@ -18,12 +204,107 @@ def api_main():
             return {
                 "error": error
             }
-    
+
+    @app.get("/photos")
+    async def listar_fotos(request: Request, cursor: str | None = None, limit: int = 50):
+        return await _cached_json(
+            request, ("photos", cursor, limit),
+            lambda: _browse(lambda browse: browse.list_photos(cursor, limit).to_dict()),
+            "Foto no encontrada")
+
+    @app.get("/photos/{photo_id}")
+    async def obtener_foto(request: Request, photo_id: str):
+        def load():
+            photo = _browse(lambda browse: browse.get_photo(photo_id))
+            return photo.to_dict() if photo else None
+        return await _cached_json(request, ("photo", photo_id), load, "Foto no encontrada")
+
+    @app.get("/photos/{photo_id}/duplicates")
+    async def listar_duplicados(request: Request, photo_id: str):
+        def load():
+            photos = _browse(lambda browse: browse.get_duplicates(photo_id))
+            return None if photos is None else {"photos": [photo.to_dict() for photo in photos]}
+        return await _cached_json(request, ("duplicates", photo_id), load, "Foto no encontrada")
+
+    @app.get("/people/{people_id}/photos")
+    async def listar_fotos_persona(request: Request, people_id: str, cursor: str | None = None, limit: int = 50):
+        return await _cached_json(
+            request, ("people_photos", people_id, cursor, limit),
+            lambda: _browse(lambda browse: browse.list_people_photos(people_id, cursor, limit).to_dict()),
+            "Persona no encontrada")
+
+    @app.get("/search")
+    async def buscar_por_texto(request: Request, q: str, offset: int = 0, limit: int = 20):
+        query = SearchPhotos.normalize_query(q)
+        return await _cached_json(
+            request, ("search_text", query, offset, limit),
+            lambda: _search(lambda search_photos: search_photos.search_text(query, offset, limit)),
+            "Sin resultados")
+
+    @app.post("/search/image")
+    async def buscar_por_imagen(request: Request, archivo: UploadFile = File(...), offset: int = 0, limit: int = 20):
+        # La imagen de consulta no se guarda: se lee en memoria, hasta SEARCH_IMAGE_MAX_BYTES
+        contenido = await _read_upload(archivo, get_container().config().search_image_max_bytes)
+        hash = hashlib.sha256(contenido).hexdigest()
+        return await _cached_json(
+            request, ("search_image", hash, offset, limit),
+            lambda: _search(lambda search_photos: search_photos.search_image(contenido, hash, offset, limit)),
+            "Sin resultados")
+
+    @app.get("/jobs")
+    async def listar_trabajos(request: Request, status: str | None = None, limit: int = 50, offset: int = 0):
+        jobs = await asyncio.to_thread(request.app.state.job_queue.list_jobs, status, min(limit, 500), offset)
+        return {
+            "jobs": [job.to_dict() for job in jobs]
+        }
+
+    @app.get("/jobs/{job_id}")
+    async def obtener_trabajo(request: Request, job_id: str):
+        job = await asyncio.to_thread(request.app.state.job_queue.get_job, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+        return job.to_dict()
+
+    def _get_thumbnail(photo_id: str, size: int, cpu_executor: ProcessPoolExecutor) -> tuple[bool, bytes | None, str]:
+        container = get_container()
+        session = container.session_factory()()
+        try:
+            get_thumbnail = GetThumbnail(
+                photo_repository=PhotoRepositoryORM(session),
+                storage_repository=container.storage_repository(),
+                image_decoder_service=container.image_decoder_service(),
+                photo_recogniction_service=container.photo_recogniction_service(),
+                thumbnail_sizes=container.config().thumbnail_sizes,
+                cpu_executor=cpu_executor)
+            return get_thumbnail.execute(photo_id, size)
+        finally:
+            session.close()
+
+    @app.get("/photos/{photo_id}/thumbnails/{size}")
+    async def obtener_miniatura(request: Request, photo_id: str, size: int):
+        loop = asyncio.get_running_loop()
+        # Las lecturas y la subida van en el pool de E/S; si hay que generarla, el renderizado en el de CPU
+        result, thumbnail, error = await loop.run_in_executor(
+            request.app.state.io_executor, _get_thumbnail, photo_id, size, request.app.state.cpu_executor)
+        if not result:
+            raise HTTPException(status_code=404, detail=error)
+        return Response(content=thumbnail, media_type="image/webp")
+
+    @app.get("/metrics")
+    def metricas():
+        # Tiempos por etapa y contadores de este proceso, en el formato de Prometheus
+        return Response(
+            content=get_container().metrics_service().render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8")
+
     @app.get("/ping")
     def ping():
         return "pong"
-    return app
 
-        
-
-        
\ No newline at end of file
+    @app.get("/ready")
+    def ready(response: Response):
+        if not is_ready():
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+            return "warming up"
+        return "ready"
+    return app
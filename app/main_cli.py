@@ -1,6 +1,192 @@
-from app.application.use_cases.call_process_photo import CallProcessPhoto
+import argparse
+import sys
+
+from app.config.settings import Settings
+
 
 def cli_main(file_path: str):
-    call_process_photo = CallProcessPhoto()
-    call_process_photo.process_photo(file_path)
-    
\ No newline at end of file
+    from app.application.use_cases.call_process_photo import CallProcessPhoto
+    from app.config.container import shutdown
+
+    try:
+        call_process_photo = CallProcessPhoto()
+        result, photo, error = call_process_photo.process_photo(file_path)
+        print(photo.to_dict() if result else error)
+        for line in call_process_photo.container.metrics_service().summary_lines():
+            print(line)
+    finally:
+        shutdown()
+
+
+def ingest_main(folder: str, workers: int | None = None, journal: str | None = None):
+    from app.application.use_cases.ingest_folder import IngestFolder, iter_report_lines
+    from app.infrastructure.services.metrics_service_imple import PrometheusMetricsServiceImpl
+
+    metrics_service = PrometheusMetricsServiceImpl()
+    ingest_folder = IngestFolder(workers=workers, journal_path=journal, metrics_service=metrics_service)
+    try:
+        report = ingest_folder.execute(folder)
+    except KeyboardInterrupt:
+        print("\nImportación interrumpida, ejecuta el mismo comando para reanudarla")
+        sys.exit(130)
+    for line in iter_report_lines(report):
+        print(line)
+    for line in metrics_service.summary_lines():
+        print(line)
+
+
+def vectors_main(action: str, collection: str, queries: int = 100, top_k: int = 10, ef_values: list[int] | None = None):
+    from app.application.use_cases.benchmark_vector_search import BenchmarkVectorSearch, iter_benchmark_lines
+    from app.config.container import get_container, shutdown
+
+    container = get_container()
+    try:
+        backend = container.config().vector_backend
+        if action == "benchmark" and backend != "qdrant":
+            print("El benchmark solo aplica al backend qdrant")
+            return
+        repositories = {
+            "photo_vectors": container.photo_vector_repository,
+            "people_vectors": container.people_vector_repository,
+        }
+        if action == "migrate":
+            for name, repository in repositories.items():
+                if collection in (name, "all"):
+                    repository().apply_collection_config()
+                    if backend == "qdrant":
+                        print(f"✅ {name}: configuración aplicada, Qdrant reindexa en segundo plano")
+                    else:
+                        print(f"✅ {name}: colección compactada e índice reconstruido")
+        elif action == "benchmark":
+            names = list(repositories) if collection == "all" else [collection]
+            for name in names:
+                print(name)
+                rows = BenchmarkVectorSearch(repositories[name]()).execute(
+                    queries=queries, top_k=top_k, ef_values=ef_values)
+                for line in iter_benchmark_lines(rows, top_k):
+                    print(line)
+    finally:
+        shutdown()
+
+
+def cluster_faces_main():
+    from app.application.use_cases.cluster_faces import ClusterFaces, iter_cluster_report_lines
+    from app.config.container import get_container, shutdown
+    from app.infrastructure.repositories.face_repository_orm import FaceRepositoryORM
+    from app.infrastructure.repositories.people_repository_orm import PeopleRepositoryORM
+    from app.infrastructure.repositories.photo_people_repository_orm import PhotoPeopleRepositoryORM
+    from app.infrastructure.repositories.unit_of_work_orm import UnitOfWorkORM
+
+    container = get_container()
+    session = container.session_factory()()
+    try:
+        settings = container.config()
+        cluster_faces = ClusterFaces(
+            face_repository=FaceRepositoryORM(session),
+            people_repository=PeopleRepositoryORM(session),
+            photo_people_repository=PhotoPeopleRepositoryORM(session),
+            people_vector_repository=container.people_vector_repository(),
+            unit_of_work=UnitOfWorkORM(session),
+            tolerance=settings.face_recognition_tolerance,
+            min_samples=settings.face_cluster_min_samples)
+        for line in iter_cluster_report_lines(cluster_faces.execute()):
+            print(line)
+    finally:
+        session.close()
+        shutdown()
+
+
+def benchmark_main(images: int, resolutions: list[int], formats: list[str], repeat: int,
+                   baseline: str | None = None, save_baseline: bool = False, tolerance: float = 0.2):
+    import tempfile
+
+    from app.application.use_cases.benchmark_pipeline import (
+        BenchmarkPipeline, PipelineBenchmarkReport, benchmark_container, compare_with_baseline,
+        generate_corpus, iter_pipeline_benchmark_lines)
+
+    corpus = generate_corpus(images, resolutions, formats)
+    if not corpus:
+        print("No se ha podido generar ninguna imagen")
+        sys.exit(1)
+    with tempfile.TemporaryDirectory(prefix="home-photo-benchmark-") as work_dir:
+        container = benchmark_container(work_dir)
+        try:
+            report = BenchmarkPipeline(container, repeat=repeat).execute(corpus)
+        finally:
+            container.shutdown_resources()
+
+    comparisons = None
+    if baseline and not save_baseline:
+        comparisons = compare_with_baseline(report, PipelineBenchmarkReport.load(baseline), tolerance)
+    for line in iter_pipeline_benchmark_lines(report, comparisons):
+        print(line)
+    if baseline and save_baseline:
+        report.save(baseline)
+        print(f"✅ Referencia guardada en {baseline}")
+    if comparisons and any(comparison.regression for comparison in comparisons):
+        sys.exit(1)
+
+
+def main(argv: list[str] | None = None):
+    settings = Settings()
+    parser = argparse.ArgumentParser(prog="home-photo")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    process_parser = subparsers.add_parser("process", help="Procesa una sola foto")
+    process_parser.add_argument("file_path")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Importa todas las fotos de una carpeta")
+    ingest_parser.add_argument("folder", nargs="?", default=settings.image_folder)
+    ingest_parser.add_argument("--workers", type=int, default=None,
+        help="Número de procesos (por defecto, uno por núcleo)")
+    ingest_parser.add_argument("--journal", default=None,
+        help="Ruta del journal para reanudar (por defecto, dentro de la carpeta)")
+
+    vectors_parser = subparsers.add_parser("vectors", help="Mantenimiento de las colecciones de vectores")
+    vectors_parser.add_argument("action", choices=["migrate", "benchmark"],
+        help="migrate aplica la configuración QDRANT_* a las colecciones existentes (con el backend "
+             "local, las compacta y reconstruye el índice IVF); benchmark mide recall frente a latencia en Qdrant")
+    vectors_parser.add_argument("--collection", choices=["photo_vectors", "people_vectors", "all"], default="all")
+    vectors_parser.add_argument("--queries", type=int, default=100)
+    vectors_parser.add_argument("--top-k", type=int, default=10)
+    vectors_parser.add_argument("--ef", default="",
+        help="Valores de hnsw_ef separados por comas (por ejemplo 16,32,64,128)")
+
+    subparsers.add_parser("cluster-faces",
+        help="Agrupa todas las caras en personas y fusiona las identidades duplicadas")
+
+    benchmark_parser = subparsers.add_parser("benchmark",
+        help="Mide cada etapa del pipeline con imágenes generadas, sin MinIO ni Qdrant")
+    benchmark_parser.add_argument("--images", type=int, default=3,
+        help="Imágenes por resolución y formato")
+    benchmark_parser.add_argument("--resolutions", default="640,1600,4000",
+        help="Lado largo en píxeles, separado por comas")
+    benchmark_parser.add_argument("--formats", default="jpeg,png,heic")
+    benchmark_parser.add_argument("--repeat", type=int, default=3,
+        help="Repeticiones de cada etapa aislada por imagen")
+    benchmark_parser.add_argument("--baseline", default=None,
+        help="JSON de referencia con el que comparar (termina con código 1 si hay regresiones)")
+    benchmark_parser.add_argument("--save-baseline", action="store_true",
+        help="Guarda el resultado en --baseline en vez de compararlo")
+    benchmark_parser.add_argument("--tolerance", type=float, default=0.2,
+        help="Aumento del p50 admitido frente a la referencia (0.2 = 20%%)")
+
+    args = parser.parse_args(argv)
+    if args.command == "process":
+        cli_main(args.file_path)
+    elif args.command == "ingest":
+        ingest_main(args.folder, workers=args.workers, journal=args.journal)
+    elif args.command == "cluster-faces":
+        cluster_faces_main()
+    elif args.command == "benchmark":
+        benchmark_main(
+            args.images,
+            [int(value) for value in args.resolutions.split(",") if value.strip()],
+            [value.strip().lower() for value in args.formats.split(",") if value.strip()],
+            args.repeat,
+            baseline=args.baseline,
+            save_baseline=args.save_baseline,
+            tolerance=args.tolerance)
+    elif args.command == "vectors":
+        ef_values = [int(value) for value in args.ef.split(",") if value.strip()] or None
+        vectors_main(args.action, args.collection, queries=args.queries, top_k=args.top_k, ef_values=ef_values)
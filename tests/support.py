@@ -0,0 +1,90 @@
+import hashlib
+import io
+from typing import List, Tuple
+
+import numpy as np
+from dependency_injector import providers
+from PIL import Image
+
+from app.config.container import Container
+from app.domain.interfaces.embedding_service import EmbeddingService
+from app.domain.models.decoded_image import DecodedImage
+from app.domain.models.photo_analysis import PhotoAnalysis
+
+
+class FakeEmbeddingService(EmbeddingService):
+    """
+    CLIP de mentira: cada imagen distinta recibe un vector aleatorio (casi
+    ortogonal a los demás) derivado de sus píxeles, y la misma imagen siempre
+    el mismo vector. Cuenta cuántas imágenes pasan por el "modelo".
+    """
+
+    def __init__(self, size: int = 512, fail: bool = False):
+        self.size = size
+        self.fail = fail
+        self.calls = 0
+
+    def _vector(self, image: Image.Image) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(image.tobytes()).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.size)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def get_image_embedding(self, image: DecodedImage) -> Tuple[bool, List[float] | None, str]:
+        result, embeddings, error = self.get_image_embeddings([image])
+        return result, embeddings[0] if result else None, error
+
+    def get_image_embeddings(self, images: List[DecodedImage]) -> Tuple[bool, List[List[float]] | None, str]:
+        if self.fail:
+            return False, None, "fallo simulado"
+        self.calls += len(images)
+        return True, [self._vector(image.image) for image in images], ""
+
+    def get_embedding(self, file_content: bytes) -> Tuple[bool, List[float] | None, str]:
+        return True, self._vector(Image.open(io.BytesIO(file_content)).convert("RGB")), ""
+
+    def get_embeddings(self, files_content: List[bytes]) -> Tuple[bool, List[List[float] | None] | None, str]:
+        return True, [self.get_embedding(file_content)[1] for file_content in files_content], ""
+
+    def get_text_embedding(self, text: str) -> Tuple[bool, List[float] | None, str]:
+        return True, self._vector(Image.new("RGB", (1, 1), (len(text) % 256, 0, 0))), ""
+
+
+def isolated_container(work_dir: str, embedding_service: EmbeddingService | None = None, **settings) -> Container:
+    """
+    Contenedor con SQLite, base vectorial embebida y storage en memoria dentro
+    de `work_dir`; `settings` sustituye valores de la configuración.
+    """
+    from app.application.use_cases.benchmark_pipeline import benchmark_container
+
+    container = benchmark_container(work_dir)
+    config = container.config().model_copy(update=settings)
+    container.config.override(providers.Object(config))
+    container.embedding_service.override(providers.Object(embedding_service or FakeEmbeddingService()))
+    return container
+
+
+def photo_bytes(seed: int, size: Tuple[int, int] = (320, 240)) -> bytes:
+    """JPEG de ruido aleatorio: cada semilla da una foto con otro pHash y otro vector."""
+    pixels = np.random.default_rng(seed).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, format="JPEG")
+    return output.getvalue()
+
+
+def fake_analysis(seed: int, faces: List[List[float]] = ()) -> PhotoAnalysis:
+    """Análisis ya hecho de una foto de ruido, sin pasar por face_recognition."""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    preview = DecodedImage(Image.fromarray(pixels), "jpg", "image/jpeg")
+    return PhotoAnalysis(
+        extension="jpg",
+        mime_type="image/jpeg",
+        # 64 bits aleatorios: dos semillas quedan lejos en distancia de Hamming
+        phash=f"{int(rng.integers(0, 2 ** 63)):016x}",
+        webp=b"webp",
+        preview=preview,
+        faces=[
+            {"location": (0, 10, 10, 0), "embedding": list(embedding), "face_image": b"face"}
+            for embedding in faces
+        ],
+        thumbnails={256: b"thumbnail"})
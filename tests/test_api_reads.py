@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import io
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from app import main_api
+from app.application.use_cases import analyze_photo
+from app.application.use_cases.call_process_photo import CallProcessPhoto
+from app.infrastructure.services import lru_cache_service_imple
+from tests.support import fake_analysis, isolated_container, photo_bytes
+
+
+def _save_photos(container, seeds, faces=()) -> list:
+    """Guarda las fotos como lo haría otro proceso (CLI o ingest), sin pasar por la API."""
+    session = container.session_factory()()
+    try:
+        process_photo = CallProcessPhoto(container)._build_process_photo(session)
+        photos = []
+        for seed in seeds:
+            content = photo_bytes(seed)
+            result, photo, error = process_photo.save(
+                content, hashlib.sha256(content).hexdigest(), fake_analysis(seed, faces if seed == seeds[0] else ()))
+            assert result, error
+            photos.append(photo)
+        return photos
+    finally:
+        session.close()
+
+
+def _client(container) -> tuple[TestClient, ThreadPoolExecutor]:
+    with mock.patch.object(main_api, "get_container", return_value=container):
+        app = main_api.api_main()
+    io_executor = ThreadPoolExecutor(max_workers=2)
+    app.state.io_executor = io_executor
+    return TestClient(app), io_executor
+
+
+class ApiReadsTest(unittest.TestCase):
+    """Lecturas de la API (sin el lifespan, que carga los modelos) sobre un contenedor aislado."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.TemporaryDirectory()
+        cls.container = isolated_container(cls.work_dir.name)
+        face = np.eye(128)[0].tolist()
+        photos = _save_photos(cls.container, range(5), faces=[face])
+        cls.photo_ids = {photo.id for photo in photos}
+        cls.photo_id = photos[0].id
+        cls.people_id = photos[0].people[0].id
+
+        cls.patcher = mock.patch.object(main_api, "get_container", return_value=cls.container)
+        cls.patcher.start()
+        cls.client, cls.io_executor = _client(cls.container)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        cls.patcher.stop()
+        cls.io_executor.shutdown()
+        cls.container.shutdown_resources()
+        cls.work_dir.cleanup()
+
+    def test_cursor_pagination_returns_every_photo_once(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            response = self.client.get("/photos", params=params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            seen.extend(photo["id"] for photo in page["photos"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), self.photo_ids)
+        self.assertEqual(pages, 3)
+
+    def test_if_none_match(self):
+        etag = self.client.get("/photos").headers["etag"]
+        other = '"00000000000000000000000000000000"'
+        cases = {
+            etag: 304,
+            f"W/{etag}": 304,
+            f"{other}, {etag}": 304,
+            f"{other},W/{etag}": 304,
+            "*": 304,
+            other: 200,
+            # Se parecen al ETag o lo contienen, pero no son el ETag
+            f'"x{etag[1:]}': 200,
+            f"{etag[:-1]}x\"": 200,
+            etag[1:-1]: 200,
+            f"{etag}x": 200,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get("/photos", headers={"If-None-Match": header})
+                self.assertEqual(response.status_code, expected)
+                self.assertEqual(response.headers["etag"], etag)
+                if expected == 304:
+                    self.assertEqual(response.content, b"")
+
+    def test_every_cached_endpoint_answers_304(self):
+        paths = [
+            f"/photos/{self.photo_id}",
+            f"/photos/{self.photo_id}/duplicates",
+            f"/people/{self.people_id}/photos",
+            "/search?q=playa",
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                etag = response.headers["etag"]
+                cached = self.client.get(path, headers={"If-None-Match": etag})
+                self.assertEqual((cached.status_code, cached.content, cached.headers["etag"]), (304, b"", etag))
+                self.assertEqual(self.client.get(path, headers={"If-None-Match": '"otro"'}).content, response.content)
+
+    def test_etags_differ_between_resources(self):
+        self.assertEqual(self.client.get(f"/people/{self.people_id}/photos").json()["photos"][0]["id"], self.photo_id)
+        etags = {self.client.get(f"/photos/{photo_id}").headers["etag"] for photo_id in self.photo_ids}
+        self.assertEqual(len(etags), len(self.photo_ids))
+
+    def test_search_image_rejects_uploads_over_the_limit(self):
+        content = photo_bytes(1)
+        files = {"archivo": ("consulta.jpg", content, "image/jpeg")}
+        with mock.patch.object(self.container.config(), "search_image_max_bytes", len(content) - 1):
+            self.assertEqual(self.client.post("/search/image", files=files).status_code, 413)
+        with mock.patch.object(self.container.config(), "search_image_max_bytes", len(content)):
+            response = self.client.post("/search/image", files=files)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), len(self.photo_ids))
+
+    def test_upload_without_declared_size_is_cut_while_reading(self):
+        def read(content: bytes, max_bytes: int) -> bytes:
+            return asyncio.run(main_api._read_upload(UploadFile(io.BytesIO(content)), max_bytes))
+
+        with mock.patch.object(main_api, "UPLOAD_CHUNK_SIZE", 4):
+            self.assertEqual(read(b"0123456789", 10), b"0123456789")
+            with self.assertRaises(HTTPException) as context:
+                read(b"0123456789", 9)
+        self.assertEqual(context.exception.status_code, 413)
+
+    def test_missing_photo_is_not_found(self):
+        response = self.client.get("/photos/no-existe", headers={"If-None-Match": "*"})
+        self.assertEqual(response.status_code, 404)
+
+
+class ApiReadCacheTest(unittest.TestCase):
+    """Lo que escriben otros procesos se ve como mucho READ_CACHE_TTL segundos después."""
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.container = isolated_container(self.work_dir.name, read_cache_ttl=30)
+        _save_photos(self.container, [1])
+        patcher = mock.patch.object(main_api, "get_container", return_value=self.container)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client, self.io_executor = _client(self.container)
+
+    def tearDown(self):
+        self.client.close()
+        self.io_executor.shutdown()
+        self.container.shutdown_resources()
+        self.work_dir.cleanup()
+
+    def test_other_processes_writes_show_up_after_the_ttl(self):
+        etag = self.client.get("/photos").headers["etag"]
+        _save_photos(self.container, [2])
+        response = self.client.get("/photos", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        now = time.monotonic()
+        clock = mock.Mock(monotonic=mock.Mock(return_value=now + 31))
+        with mock.patch.object(lru_cache_service_imple, "time", clock):
+            response = self.client.get("/photos", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["photos"]), 2)
+
+    def test_clearing_the_cache_shows_new_photos_at_once(self):
+        etag = self.client.get("/photos").headers["etag"]
+        _save_photos(self.container, [2])
+        # Es lo que hace la API al terminar una importación propia
+        self.container.read_cache().clear()
+        response = self.client.get("/photos", headers={"If-None-Match": etag})
+        self.assertEqual((response.status_code, len(response.json()["photos"])), (200, 2))
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """Pool de CPU en hilos que apunta las funciones que recibe."""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.functions = []
+
+    def submit(self, function, *args, **kwargs):
+        self.functions.append(function)
+        return super().submit(function, *args, **kwargs)
+
+
+class ApiThumbnailTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.container = isolated_container(
+            self.work_dir.name, thumbnail_sizes={256: 80, 512: 85}, thumbnail_lazy_sizes={512})
+        self.photo_id = _save_photos(self.container, [1])[0].id
+        for patcher in (
+                mock.patch.object(main_api, "get_container", return_value=self.container),
+                mock.patch("app.config.container.get_container", return_value=self.container),
+                mock.patch("app.config.container.preload_analysis_libraries"),
+                mock.patch.object(analyze_photo, "_analyze_photo", None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client, self.io_executor = _client(self.container)
+        self.cpu_executor = RecordingExecutor()
+        self.client.app.state.cpu_executor = self.cpu_executor
+
+    def tearDown(self):
+        self.client.close()
+        self.io_executor.shutdown()
+        self.cpu_executor.shutdown()
+        self.container.shutdown_resources()
+        self.work_dir.cleanup()
+
+    def test_lazy_thumbnails_are_rendered_on_the_cpu_pool_once(self):
+        response = self.client.get(f"/photos/{self.photo_id}/thumbnails/512")
+        self.assertEqual((response.status_code, response.headers["content-type"]), (200, "image/webp"))
+        self.assertEqual(self.cpu_executor.functions, [analyze_photo.render_thumbnail_in_worker])
+
+        # La segunda petición la sirve el storage sin volver a renderizar
+        self.assertEqual(self.client.get(f"/photos/{self.photo_id}/thumbnails/512").content, response.content)
+        self.assertEqual(len(self.cpu_executor.functions), 1)
+
+    def test_stored_thumbnails_never_reach_the_cpu_pool(self):
+        response = self.client.get(f"/photos/{self.photo_id}/thumbnails/256")
+        self.assertEqual((response.status_code, response.content), (200, b"thumbnail"))
+        self.assertEqual(self.client.get(f"/photos/{self.photo_id}/thumbnails/1024").status_code, 404)
+        self.assertEqual(self.cpu_executor.functions, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
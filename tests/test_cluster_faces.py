@@ -0,0 +1,123 @@
+import hashlib
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.application.use_cases.call_process_photo import CallProcessPhoto
+from app.application.use_cases.cluster_faces import ClusterFaces
+from app.infrastructure.db.models import People
+from app.infrastructure.repositories.face_repository_orm import FaceRepositoryORM
+from app.infrastructure.repositories.people_repository_orm import PeopleRepositoryORM
+from app.infrastructure.repositories.photo_people_repository_orm import PhotoPeopleRepositoryORM
+from app.infrastructure.repositories.unit_of_work_orm import UnitOfWorkORM
+from tests.support import fake_analysis, isolated_container, photo_bytes
+
+
+def _face(seed: int) -> np.ndarray:
+    vector = np.random.default_rng(seed).standard_normal(128)
+    return vector / np.linalg.norm(vector)
+
+
+def _near(face: np.ndarray, distance: float, seed: int) -> np.ndarray:
+    """Otra cara a `distance` de `face` en una dirección aleatoria."""
+    direction = np.random.default_rng(seed).standard_normal(128)
+    return face + distance * direction / np.linalg.norm(direction)
+
+
+class ClusterLabelsTest(unittest.TestCase):
+
+    def _labels(self, faces, **kwargs):
+        cluster_faces = ClusterFaces(None, None, None, None, None, tolerance=0.6, **kwargs)
+        return cluster_faces._cluster(np.asarray(faces, dtype=np.float32)).tolist()
+
+    def test_close_faces_share_a_label(self):
+        first, second = _face(1), _face(2)
+        labels = self._labels(
+            [first, _near(first, 0.11, 10), _near(first, 0.2, 11),
+             second, _near(second, 0.3, 12), _near(second, 0.1, 13)])
+        self.assertEqual(len(set(labels[:3])), 1)
+        self.assertEqual(len(set(labels[3:])), 1)
+        self.assertNotEqual(labels[0], labels[3])
+        self.assertNotIn(ClusterFaces.NOISE, labels)
+
+    def test_noise_is_not_attached_to_a_cluster(self):
+        center, axes = _face(1), np.eye(128)
+        core = [center, center + 0.4 * axes[0], center + 0.4 * axes[1]]
+        # Solo tiene un núcleo a menos de la tolerancia: queda en el borde del grupo
+        border = center + 0.5 * axes[2]
+        # Fuera del radio de cualquier núcleo, aunque a menos de la tolerancia del borde
+        close = center + 1.0 * axes[2]
+        labels = self._labels(core + [border, close], min_samples=4)
+        self.assertEqual(len(set(labels[:4])), 1)
+        self.assertEqual(labels[4], ClusterFaces.NOISE)
+
+    def test_unrelated_faces_are_noise(self):
+        labels = self._labels([_face(seed) for seed in range(4)])
+        self.assertEqual(labels, [ClusterFaces.NOISE] * 4)
+
+
+class ClusterRollbackTest(unittest.TestCase):
+    """Si la transacción falla, los vectores de personas vuelven a como estaban."""
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.container = isolated_container(self.work_dir.name, face_identity_mode="deferred")
+        self.session = self.container.session_factory()()
+        self.face = _face(1)
+        process_photo = CallProcessPhoto(self.container)._build_process_photo(self.session)
+        faces = [self.face, _near(self.face, 0.11, 10), _near(self.face, 0.2, 11), _face(2)]
+        for seed, face in enumerate(faces, start=1):
+            content = photo_bytes(seed)
+            result, _, error = process_photo.save(
+                content, hashlib.sha256(content).hexdigest(), fake_analysis(seed, faces=[face.tolist()]))
+            self.assertTrue(result, error)
+
+    def tearDown(self):
+        self.session.close()
+        self.container.shutdown_resources()
+        self.work_dir.cleanup()
+
+    def _cluster_faces(self) -> ClusterFaces:
+        return ClusterFaces(
+            face_repository=FaceRepositoryORM(self.session),
+            people_repository=PeopleRepositoryORM(self.session),
+            photo_people_repository=PhotoPeopleRepositoryORM(self.session),
+            people_vector_repository=self.container.people_vector_repository(),
+            unit_of_work=UnitOfWorkORM(self.session),
+            tolerance=0.6)
+
+    def _people_vectors(self):
+        result, ids, error = self.container.people_vector_repository().search_ids(self.face.tolist())
+        self.assertTrue(result, error)
+        return ids
+
+    def test_close_faces_become_one_person(self):
+        report = self._cluster_faces().execute()
+        self.assertEqual((report.faces, report.clusters, report.noise, report.people_created), (4, 1, 1, 1))
+        self.assertEqual(len(self._people_vectors()), 1)
+        # La cara suelta no crea una persona ni se une al grupo
+        people_ids = [face.people_id for face in FaceRepositoryORM(self.session).iter_faces()]
+        self.assertEqual(people_ids.count(None), 1)
+        self.assertEqual(len(set(people_ids) - {None}), 1)
+
+    def test_failed_clustering_removes_the_vectors_it_wrote(self):
+        vectors = self.container.people_vector_repository()
+        delete_many = vectors.delete_many
+        calls = []
+
+        def failing_delete_many(ids):
+            calls.append(ids)
+            if len(calls) == 1:
+                raise Exception("fallo simulado")
+            delete_many(ids)
+
+        vectors.delete_many = failing_delete_many
+        with self.assertRaises(Exception):
+            self._cluster_faces().execute()
+        self.assertEqual(self._people_vectors(), [])
+        self.assertEqual(self.session.query(People).count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import hashlib
+import tempfile
+import unittest
+
+from app.application.use_cases.call_process_photo import CallProcessPhoto
+from app.domain.models.photo import Photo
+from app.infrastructure.repositories.storage_repository_memory import StorageRepositoryMemory
+from tests.support import FakeEmbeddingService, fake_analysis, isolated_container, photo_bytes
+
+
+class ContentAddressedStorageTest(unittest.TestCase):
+    """
+    Con STORAGE_KEY_MODE=content las claves salen del SHA-256 y los objetos
+    que ya existen no se vuelven a subir. Deshacer una importación solo borra
+    los objetos con clave aleatoria: una clave derivada del hash puede ser de
+    otra importación del mismo archivo.
+    """
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.content = photo_bytes(1)
+        self.hash = hashlib.sha256(self.content).hexdigest()
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def _save(self,
+        embedding_service: FakeEmbeddingService,
+        storage: StorageRepositoryMemory | None = None,
+        analysis_seed: int = 1,
+        storage_key_mode: str = "content"):
+        container = isolated_container(
+            self.work_dir.name, embedding_service=embedding_service, storage_key_mode=storage_key_mode)
+        if storage is not None:
+            container.storage_repository.override(storage)
+        session = container.session_factory()()
+        try:
+            process_photo = CallProcessPhoto(container)._build_process_photo(session)
+            result = process_photo.save(
+                self.content, self.hash, fake_analysis(analysis_seed, faces=[[0.1] * 128]))
+            return result, container.storage_repository()
+        finally:
+            session.close()
+            container.shutdown_resources()
+
+    def test_keys_are_derived_from_the_hash(self):
+        (result, photo, error), storage = self._save(FakeEmbeddingService())
+        self.assertTrue(result, error)
+        self.assertEqual(photo.path, Photo.content_key("originals", self.hash, f"{self.hash}.jpg"))
+        self.assertEqual(photo.path_web, Photo.content_key("web", self.hash, f"{self.hash}.webp"))
+        self.assertEqual(storage.get_file(photo.path), (True, self.content, ""))
+
+    def test_failed_reimport_keeps_objects_of_the_committed_photo(self):
+        (result, photo, error), storage = self._save(FakeEmbeddingService())
+        self.assertTrue(result, error)
+        committed_objects = len(storage)
+
+        # Otro análisis del mismo archivo: no es un duplicado perceptual y llega a CLIP, que falla
+        (result, _, _), storage = self._save(FakeEmbeddingService(fail=True), storage, analysis_seed=2)
+        self.assertFalse(result)
+        self.assertEqual(len(storage), committed_objects)
+        self.assertTrue(storage.exists(photo.path))
+        self.assertTrue(storage.exists(photo.path_web))
+
+    def _reimport_keeps_every_object_of_the_saved_photo(self, storage_key_mode: str):
+        (result, photo, error), storage = self._save(FakeEmbeddingService(), storage_key_mode=storage_key_mode)
+        self.assertTrue(result, error)
+        # fake_analysis solo genera la miniatura de 256; las demás son perezosas
+        objects = [photo.path, photo.path_web, photo.thumbnails[256]]
+
+        # Otra importación del mismo hash choca con la restricción única y se deshace
+        (result, existing, error), storage = self._save(
+            FakeEmbeddingService(), storage, analysis_seed=2, storage_key_mode=storage_key_mode)
+        self.assertEqual((result, existing.id, error), (False, photo.id, " foto ya procesada"))
+        self.assertEqual([storage.exists(key) for key in objects], [True] * len(objects))
+
+    def test_reimport_keeps_every_object_of_the_saved_photo(self):
+        self._reimport_keeps_every_object_of_the_saved_photo("content")
+
+    def test_reimport_with_random_keys_keeps_every_object_of_the_saved_photo(self):
+        self._reimport_keeps_every_object_of_the_saved_photo("uuid")
+
+    def test_failed_import_removes_only_objects_with_random_keys(self):
+        (result, _, _), storage = self._save(FakeEmbeddingService(fail=True), storage_key_mode="uuid")
+        self.assertFalse(result)
+        # Solo queda la miniatura, cuya clave sale del hash
+        self.assertEqual(len(storage), 1)
+        self.assertTrue(storage.exists(Photo.thumbnail_key(self.hash, 256)))
+
+    def test_skipped_upload_is_reported_as_not_written(self):
+        storage = StorageRepositoryMemory()
+        self.assertEqual(storage.upload_file(b"a", "jpg", object_name="k", skip_if_exists=True), (True, "k", "", True))
+        self.assertEqual(storage.upload_file(b"b", "jpg", object_name="k", skip_if_exists=True), (True, "k", "", False))
+        self.assertEqual(storage.get_file("k"), (True, b"a", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import itertools
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+from app.domain.models.decoded_image import DecodedImage
+from app.infrastructure.services import embedding_cache_imple
+from app.infrastructure.services.cached_embedding_service_imple import CachedEmbeddingServiceImpl
+from app.infrastructure.services.embedding_cache_imple import MmapEmbeddingCacheImpl
+from tests.support import FakeEmbeddingService
+
+
+class MmapEmbeddingCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def _cache(self, max_bytes: int = 1024 * 1024) -> MmapEmbeddingCacheImpl:
+        cache = MmapEmbeddingCacheImpl(self.work_dir.name, max_bytes=max_bytes)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_entries_are_keyed_by_hash_model_and_version(self):
+        cache = self._cache()
+        rows = np.arange(8, dtype=np.float32).reshape(2, 4)
+        cache.put("a", "clip", "1", rows)
+
+        hit, missing_hash, other_model, other_version = (
+            cache.get_many(["a", "b"], "clip", "1")
+            + cache.get_many(["a"], "siglip", "1")
+            + cache.get_many(["a"], "clip", "2"))
+        np.testing.assert_array_equal(hit, rows)
+        self.assertIsNone(missing_hash)
+        self.assertIsNone(other_model)
+        self.assertIsNone(other_version)
+
+    def test_entries_survive_a_new_instance(self):
+        self._cache().put("a", "clip", "1", np.ones((1, 4), dtype=np.float32))
+        np.testing.assert_array_equal(self._cache().get_many(["a"], "clip", "1")[0], np.ones((1, 4)))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        # Filas de 16 bytes: caben tres
+        cache = self._cache(max_bytes=48)
+        clock = mock.Mock(time=mock.Mock(side_effect=itertools.count(1.0)))
+        with mock.patch.object(embedding_cache_imple, "time", clock):
+            for hash in "abc":
+                cache.put(hash, "clip", "1", np.full((1, 4), ord(hash), dtype=np.float32))
+            cache.get_many(["a"], "clip", "1")
+            cache.put("d", "clip", "1", np.full((1, 4), ord("d"), dtype=np.float32))
+
+            found = cache.get_many(list("abcd"), "clip", "1")
+        self.assertEqual([rows is not None for rows in found], [True, False, True, True])
+        self.assertEqual([int(rows[0, 0]) for rows in found if rows is not None], [ord("a"), ord("c"), ord("d")])
+        # La fila descartada se reutiliza: el archivo no crece
+        self.assertEqual(os.path.getsize(os.path.join(self.work_dir.name, "1.f32")), 48)
+
+
+class CachedEmbeddingServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.cache = MmapEmbeddingCacheImpl(self.work_dir.name)
+        self.model = FakeEmbeddingService()
+
+    def tearDown(self):
+        self.cache.close()
+        self.work_dir.cleanup()
+
+    def _service(self, model_name: str = "clip", model_version: str = "1") -> CachedEmbeddingServiceImpl:
+        return CachedEmbeddingServiceImpl(self.model, self.cache, model_name, model_version)
+
+    @staticmethod
+    def _image(color: int, content_hash: str | None) -> DecodedImage:
+        return DecodedImage(Image.new("RGB", (8, 8), (color, 0, 0)), "jpg", "image/jpeg", content_hash=content_hash)
+
+    def test_second_request_is_served_from_the_cache(self):
+        images = [self._image(1, "a"), self._image(2, "b")]
+        result, first, error = self._service().get_image_embeddings(images)
+        self.assertTrue(result, error)
+        self.assertEqual(self.model.calls, 2)
+
+        result, second, error = self._service().get_image_embeddings(images + [self._image(3, "c")])
+        self.assertTrue(result, error)
+        self.assertEqual(self.model.calls, 3)
+        np.testing.assert_allclose(second[:2], first, rtol=1e-6)
+
+    def test_another_model_or_version_misses(self):
+        image = self._image(1, "a")
+        self._service().get_image_embedding(image)
+        self._service(model_name="siglip").get_image_embedding(image)
+        self._service(model_version="2").get_image_embedding(image)
+        self.assertEqual(self.model.calls, 3)
+
+    def test_images_without_hash_are_not_cached(self):
+        image = self._image(1, None)
+        self._service().get_image_embedding(image)
+        self._service().get_image_embedding(image)
+        self.assertEqual(self.model.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
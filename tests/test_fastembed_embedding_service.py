@@ -0,0 +1,143 @@
+import importlib.util
+import io
+import unittest
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+from app.domain.models.decoded_image import DecodedImage
+from app.infrastructure.services.fastembed_embedding_service_imple import FastEmbedEmbeddingServiceImpl
+
+HAS_FASTEMBED = importlib.util.find_spec("fastembed") is not None
+
+# preprocessor_config.json de openai/clip-vit-base-patch32, el de las exportaciones ONNX de Qdrant
+CLIP_PREPROCESSOR = {
+    "image_processor_type": "CLIPImageProcessor",
+    "do_resize": True,
+    "size": {"shortest_edge": 224},
+    "resample": 3,
+    "do_center_crop": True,
+    "crop_size": 224,
+    "do_rescale": True,
+    "rescale_factor": 1 / 255,
+    "do_normalize": True,
+    "image_mean": [0.48145466, 0.4578275, 0.40821073],
+    "image_std": [0.26862954, 0.26130258, 0.27577711],
+}
+
+
+class FakeModel:
+    """Modelo de fastembed con salidas fijas y sin normalizar; apunta lo que recibe."""
+
+    OUTPUTS = np.array([[3, 4, 0, 0], [0, 0, 0, 2], [0, 0, 0, 0]], dtype=np.float32)
+    loads = 0
+
+    def __init__(self, model_name: str, **kwargs):
+        type(self).loads += 1
+        self.model_name = model_name
+        self.kwargs = kwargs
+        self.inputs = []
+        self.batch_sizes = []
+
+    def embed(self, inputs, batch_size: int | None = None):
+        inputs = list(inputs)
+        self.inputs.extend(inputs)
+        self.batch_sizes.append(batch_size)
+        for index in range(len(inputs)):
+            yield self.OUTPUTS[index % len(self.OUTPUTS)]
+
+
+class FakeTextModel(FakeModel):
+    OUTPUTS = np.array([[1, 1, 1, 1]], dtype=np.float32)
+    loads = 0
+
+
+def _png(mode: str, size=(40, 30)) -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, size).save(output, format="PNG")
+    return output.getvalue()
+
+
+def _gradient(width: int, height: int) -> Image.Image:
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([x * 255 // max(1, width - 1), y * 255 // max(1, height - 1), (x + y) % 256], axis=-1)
+    return Image.fromarray(pixels.astype(np.uint8))
+
+
+def _clip_reference(image: Image.Image) -> np.ndarray:
+    """Preprocesado de CLIPImageProcessor (el de sentence-transformers) escrito a mano."""
+    width, height = image.size
+    short, long = sorted((width, height))
+    size = (224, int(224 * long / short))
+    image = image.convert("RGB").resize(size if width <= height else size[::-1], Image.Resampling.BICUBIC)
+    pixels = np.asarray(image, dtype=np.float32) / 255
+    top, left = (pixels.shape[0] - 224) // 2, (pixels.shape[1] - 224) // 2
+    pixels = pixels[top:top + 224, left:left + 224]
+    mean, std = np.array(CLIP_PREPROCESSOR["image_mean"]), np.array(CLIP_PREPROCESSOR["image_std"])
+    return ((pixels - mean) / std).transpose(2, 0, 1)
+
+
+class FastEmbedEmbeddingServiceTest(unittest.TestCase):
+    """El servicio sobre un modelo de salidas fijas: no hace falta fastembed ni descargar nada."""
+
+    def setUp(self):
+        FakeModel.loads = FakeTextModel.loads = 0
+        for name, model_class in (("_image_embedding_class", FakeModel), ("_text_embedding_class", FakeTextModel)):
+            patcher = mock.patch.object(FastEmbedEmbeddingServiceImpl, name, return_value=model_class)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_image_vectors_are_unit_length(self):
+        service = FastEmbedEmbeddingServiceImpl()
+        images = [DecodedImage(Image.new("RGB", (8, 8)), "jpg", "image/jpeg") for _ in range(3)]
+        result, embeddings, error = service.get_image_embeddings(images)
+        self.assertTrue(result, error)
+        np.testing.assert_allclose(embeddings, [[0.6, 0.8, 0, 0], [0, 0, 0, 1], [0, 0, 0, 0]], atol=1e-6)
+
+    def test_images_reach_the_model_in_rgb_and_in_order(self):
+        service = FastEmbedEmbeddingServiceImpl(batch_size=2)
+        result, embeddings, error = service.get_embeddings([_png("L"), b"no es una imagen", _png("RGBA"), _png("P")])
+        self.assertTrue(result, error)
+        self.assertEqual([image.mode for image in service.model.inputs], ["RGB"] * 3)
+        self.assertEqual([image.size for image in service.model.inputs], [(40, 30)] * 3)
+        self.assertEqual(service.model.batch_sizes, [2])
+        self.assertIsNone(embeddings[1])
+        np.testing.assert_allclose(embeddings[0], [0.6, 0.8, 0, 0], atol=1e-6)
+        np.testing.assert_allclose(embeddings[2], [0, 0, 0, 1], atol=1e-6)
+
+        result, _, error = service.get_image_embedding(DecodedImage(Image.new("RGBA", (8, 8)), "png", "image/png"))
+        self.assertTrue(result, error)
+        self.assertEqual(service.model.inputs[-1].mode, "RGB")
+
+    def test_text_model_is_loaded_once_and_normalized(self):
+        service = FastEmbedEmbeddingServiceImpl()
+        self.assertEqual(FakeTextModel.loads, 0)
+        for _ in range(2):
+            result, embedding, error = service.get_text_embedding("una playa")
+            self.assertTrue(result, error)
+            np.testing.assert_allclose(embedding, [0.5] * 4, atol=1e-6)
+        self.assertEqual(FakeTextModel.loads, 1)
+        self.assertEqual(service.model.kwargs["providers"], ["CPUExecutionProvider"])
+        self.assertIsNone(service.model.kwargs["threads"])
+        self.assertIsNone(service.model.kwargs["specific_model_path"])
+
+
+@unittest.skipUnless(HAS_FASTEMBED, "fastembed no está instalado")
+class FastEmbedPreprocessingTest(unittest.TestCase):
+    """El preprocesado de fastembed con la configuración de CLIP da los mismos tensores que el de sentence-transformers."""
+
+    def test_matches_the_clip_image_processor(self):
+        from fastembed.image.transform.operators import Compose
+
+        processor = Compose.from_config(CLIP_PREPROCESSOR)
+        images = [_gradient(300, 200), _gradient(200, 300), _gradient(224, 224), _gradient(100, 80),
+                  _gradient(333, 250).convert("RGBA")]
+        for image, pixels in zip(images, processor(images)):
+            with self.subTest(size=image.size, mode=image.mode):
+                self.assertEqual(pixels.shape, (3, 224, 224))
+                np.testing.assert_allclose(pixels, _clip_reference(image), atol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
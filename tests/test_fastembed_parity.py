@@ -0,0 +1,78 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+HAS_BACKENDS = all(
+    importlib.util.find_spec(module) is not None
+    for module in ("fastembed", "sentence_transformers", "onnxruntime"))
+
+
+def _normalized(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@unittest.skipUnless(HAS_BACKENDS, "fastembed y sentence-transformers no están instalados")
+class FastEmbedParityTest(unittest.TestCase):
+    """
+    Los vectores de fastembed deben poder convivir con los que ya hay en
+    photo_vectors (sentence-transformers): misma dirección y, para cada foto,
+    el vecino más cercano entre los vectores de PyTorch es ella misma, que es
+    lo que usa la detección de duplicados.
+    """
+
+    MIN_COSINE = 0.98
+
+    @classmethod
+    def setUpClass(cls):
+        from app.application.use_cases.benchmark_pipeline import generate_corpus
+        from app.infrastructure.services.embedding_service_imple import EmbeddingServiceImpl
+        from app.infrastructure.services.extension_service_imple import ExtensionServiceImpl
+        from app.infrastructure.services.image_decoder_service_imple import ImageDecoderServiceImpl
+
+        decoder = ImageDecoderServiceImpl(ExtensionServiceImpl())
+        cls.previews = []
+        for item in generate_corpus(4, [480, 1200], ["jpeg", "png"], seed=7):
+            _, image, _ = decoder.decode(item.content)
+            cls.previews.append(image.resized(224))
+
+        result, embeddings, error = EmbeddingServiceImpl().get_image_embeddings(cls.previews)
+        if not result:
+            raise Exception(error)
+        cls.torch_vectors = _normalized(embeddings)
+
+    def _embed(self, **kwargs) -> np.ndarray:
+        from app.infrastructure.services.fastembed_embedding_service_imple import FastEmbedEmbeddingServiceImpl
+
+        result, embeddings, error = FastEmbedEmbeddingServiceImpl(**kwargs).get_image_embeddings(self.previews)
+        self.assertTrue(result, error)
+        return _normalized(embeddings)
+
+    def assert_same_neighbours(self, vectors: np.ndarray):
+        nearest = (vectors @ self.torch_vectors.T).argmax(axis=1)
+        np.testing.assert_array_equal(nearest, np.arange(len(vectors)))
+
+    def test_vectors_match_sentence_transformers(self):
+        vectors = self._embed()
+        self.assertEqual(vectors.shape, self.torch_vectors.shape)
+        cosines = (vectors * self.torch_vectors).sum(axis=1)
+        self.assertGreaterEqual(cosines.min(), self.MIN_COSINE)
+        self.assert_same_neighbours(vectors)
+
+    def test_int8_keeps_neighbours(self):
+        self.assert_same_neighbours(self._embed(quantize=True))
+
+    def test_text_embedding_shares_space(self):
+        from app.infrastructure.services.embedding_service_imple import EmbeddingServiceImpl
+        from app.infrastructure.services.fastembed_embedding_service_imple import FastEmbedEmbeddingServiceImpl
+
+        _, torch_text, _ = EmbeddingServiceImpl().get_text_embedding("una foto de una playa")
+        result, onnx_text, error = FastEmbedEmbeddingServiceImpl().get_text_embedding("una foto de una playa")
+        self.assertTrue(result, error)
+        cosine = (_normalized([torch_text]) * _normalized([onnx_text])).sum()
+        self.assertGreaterEqual(cosine, self.MIN_COSINE)
+
+
+if __name__ == "__main__":
+    unittest.main()
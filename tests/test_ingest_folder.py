@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app.application.use_cases import ingest_folder
+from app.application.use_cases.ingest_folder import IngestFolder
+from app.infrastructure.services.metrics_service_imple import PrometheusMetricsServiceImpl
+from tests.support import isolated_container, photo_bytes
+
+
+class InProcessPool:
+    """
+    Sustituye a multiprocessing.Pool: ejecuta el initializer y los lotes en
+    este proceso y simula un Ctrl+C tras `interrupt_after` lotes.
+    """
+    interrupt_after: int | None = None
+    batches: list = []
+
+    def __init__(self, processes: int, initializer):
+        initializer()
+
+    def imap_unordered(self, function, batches):
+        for batch in batches:
+            if self.interrupt_after is not None and len(self.batches) == self.interrupt_after:
+                raise KeyboardInterrupt
+            type(self).batches.append(batch)
+            yield function(batch)
+
+    def close(self):
+        pass
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
+class IngestFolderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.container = isolated_container(self.work_dir.name)
+        self.folder = os.path.join(self.work_dir.name, "fotos")
+        os.makedirs(os.path.join(self.folder, "2024"))
+        self.photos = []
+        for seed in range(8):
+            path = os.path.join(self.folder, "2024" if seed % 2 else "", f"{seed}.jpg")
+            with open(path, "wb") as file:
+                file.write(photo_bytes(seed))
+            self.photos.append(path)
+        self.broken = os.path.join(self.folder, "rota.jpg")
+        with open(self.broken, "wb") as file:
+            file.write(b"no es una foto")
+        with open(os.path.join(self.folder, "notas.txt"), "w") as file:
+            file.write("no se importa")
+
+        InProcessPool.batches = []
+        InProcessPool.interrupt_after = None
+        for patcher in (
+                mock.patch.object(ingest_folder.multiprocessing, "Pool", InProcessPool),
+                mock.patch("app.config.container.get_container", return_value=self.container),
+                mock.patch("app.config.container.preload_analysis_libraries"),
+                mock.patch.object(ingest_folder, "tqdm")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.container.shutdown_resources()
+        self.work_dir.cleanup()
+
+    def _ingest(self, metrics_service=None) -> ingest_folder.IngestReport:
+        return IngestFolder(settings=self.container.config(), workers=1, metrics_service=metrics_service).execute(self.folder)
+
+    def _journal(self) -> list:
+        with open(os.path.join(self.folder, IngestFolder.JOURNAL_NAME), encoding="utf-8") as journal:
+            return journal.read().splitlines()
+
+    def test_interrupted_run_resumes_from_the_journal(self):
+        metrics_service = PrometheusMetricsServiceImpl()
+        InProcessPool.interrupt_after = 2
+        with self.assertRaises(KeyboardInterrupt):
+            self._ingest(metrics_service)
+        first_run = [path for batch in InProcessPool.batches for path in batch]
+        journaled = self._journal()
+        self.assertEqual(len(InProcessPool.batches), 2)
+        self.assertEqual(sorted(journaled), sorted(path for path in first_run if path != self.broken))
+
+        InProcessPool.batches = []
+        InProcessPool.interrupt_after = None
+        report = self._ingest(metrics_service)
+        second_run = [path for batch in InProcessPool.batches for path in batch]
+
+        # Las fotos del journal no se vuelven a leer; la rota se reintenta
+        self.assertFalse(set(second_run) & set(journaled))
+        self.assertEqual(sorted(first_run + second_run), sorted(self.photos + [self.broken]))
+        self.assertEqual(sorted(self._journal()), sorted(self.photos))
+        self.assertEqual(
+            (report.total, report.resumed, report.processed, report.skipped, report.failed),
+            (9, len(journaled), len(second_run) - 1, 0, 1))
+
+        # Las métricas de los lotes de las dos ejecuciones se acumulan en el proceso padre
+        self.assertIn(f"photos_saved_total: {len(self.photos)}", list(metrics_service.summary_lines()))
+
+    def test_photos_already_saved_are_skipped_by_hash(self):
+        self._ingest()
+        os.remove(os.path.join(self.folder, IngestFolder.JOURNAL_NAME))
+        report = self._ingest()
+        self.assertEqual((report.resumed, report.processed, report.skipped, report.failed), (0, 0, 8, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
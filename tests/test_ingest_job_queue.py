@@ -0,0 +1,131 @@
+import hashlib
+import os
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from sqlalchemy import update
+
+from app.application.use_cases.call_process_photo import CallProcessPhoto
+from app.application.use_cases.ingest_job_queue import IngestJobQueue
+from app.application.use_cases.process_photo import ProcessPhoto
+from app.domain.models.job import JobStatus
+from app.infrastructure.db.models import Job, utc_now
+from app.infrastructure.repositories.job_repository_orm import JobRepositoryORM
+from tests.support import FakeEmbeddingService, isolated_container, photo_bytes
+
+
+class IngestJobQueueTest(unittest.TestCase):
+    """Los trabajos se procesan a mano, sin arrancar los hilos de la cola."""
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.embedding_service = FakeEmbeddingService()
+        self.container = isolated_container(self.work_dir.name, embedding_service=self.embedding_service)
+        self.queue = IngestJobQueue(
+            self.container, os.path.join(self.work_dir.name, "spool"), max_attempts=2, lease_seconds=60)
+
+    def tearDown(self):
+        self.container.shutdown_resources()
+        self.work_dir.cleanup()
+
+    def _enqueue(self, seed: int, hash: str | None = None):
+        file_path = self.queue.spool_path()
+        with open(file_path, "wb") as file:
+            file.write(photo_bytes(seed))
+        return self.queue.enqueue(file_path, hash)
+
+    def _run_next(self):
+        job = self.queue._claim()
+        self.assertIsNotNone(job)
+        self.queue._process(CallProcessPhoto(self.container), job)
+        return self.queue.get_job(job.id)
+
+    def test_uses_the_hash_computed_on_upload(self):
+        content = photo_bytes(1)
+        job = self._enqueue(1, hashlib.sha256(content).hexdigest())
+        with mock.patch.object(ProcessPhoto, "calculate_hash", side_effect=AssertionError("hash repetido")):
+            job = self._run_next()
+        self.assertEqual(job.status, JobStatus.DONE, job.error)
+        self.assertFalse(os.path.exists(job.file_path))
+
+    def test_failed_job_is_retried_then_deleted(self):
+        self.embedding_service.fail = True
+        job = self._enqueue(1)
+
+        job = self._run_next()
+        self.assertEqual((job.status, job.attempts), (JobStatus.PENDING, 1))
+        self.assertTrue(os.path.exists(job.file_path))
+
+        job = self._run_next()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 2))
+        self.assertIn("fallo simulado", job.error)
+        self.assertFalse(os.path.exists(job.file_path))
+
+    def test_only_jobs_with_an_expired_lease_are_requeued(self):
+        abandoned, running = self._enqueue(1), self._enqueue(2)
+        self.queue._claim()
+        self.queue._claim()
+        session = self.container.session_factory()()
+        try:
+            session.execute(
+                update(Job)
+                .where(Job.id == abandoned.id)
+                .values(started_at=utc_now() - timedelta(seconds=120)))
+            session.commit()
+        finally:
+            session.close()
+
+        self.assertEqual(self.queue.requeue_abandoned(), 1)
+        self.assertEqual(self.queue.get_job(abandoned.id).status, JobStatus.PENDING)
+        self.assertEqual(self.queue.get_job(running.id).status, JobStatus.RUNNING)
+
+    def test_job_claimed_too_many_times_fails_without_processing(self):
+        job = self._enqueue(1)
+        for _ in range(2):
+            self.queue._claim()
+            self.queue.lease_seconds = 0
+            self.queue.requeue_abandoned()
+
+        job = self._run_next()
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(self.embedding_service.calls, 0)
+        self.assertFalse(os.path.exists(job.file_path))
+
+    def test_done_job_tolerates_a_missing_upload(self):
+        content = photo_bytes(1)
+        job = self._enqueue(1, hashlib.sha256(content).hexdigest())
+        self._run_next()
+        # El mismo archivo otra vez, ya borrado del spool cuando se marca como hecho
+        job = self._enqueue(1, hashlib.sha256(content).hexdigest())
+        os.remove(job.file_path)
+        self.assertEqual(self._run_next().status, JobStatus.DONE)
+
+    def test_worker_survives_an_error_while_finishing_a_job(self):
+        failing, next_job = self._enqueue(1), self._enqueue(2)
+        mark_done = JobRepositoryORM.mark_done
+        calls = []
+
+        def flaky_mark_done(repository, id, photo_id, timings):
+            calls.append(id)
+            if len(calls) == 1:
+                raise Exception("database is locked")
+            mark_done(repository, id, photo_id, timings)
+
+        queue = IngestJobQueue(self.container, self.queue.spool_dir, workers=1, poll_interval=0.01)
+        with mock.patch.object(JobRepositoryORM, "mark_done", flaky_mark_done):
+            queue.start()
+            try:
+                deadline = time.monotonic() + 10
+                while queue.get_job(next_job.id).status != JobStatus.DONE and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            finally:
+                queue.stop()
+        self.assertEqual(queue.get_job(next_job.id).status, JobStatus.DONE)
+        self.assertEqual(queue.get_job(failing.id).status, JobStatus.RUNNING)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import hashlib
+import tempfile
+import unittest
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import inspect
+
+from app.application.use_cases.call_process_photo import CallProcessPhoto
+from app.infrastructure.repositories.photo_repository_orm import PhotoRepositoryORM
+from app.infrastructure.services.known_hash_filter_imple import KnownHashFilterImpl
+from tests.support import fake_analysis, isolated_container, photo_bytes
+
+
+class KnownHashFilterRefreshTest(unittest.TestCase):
+
+    def test_miss_reads_hashes_added_by_other_processes(self):
+        database: List[str] = []
+        calls: List[datetime | None] = []
+
+        def source(since):
+            calls.append(since)
+            return list(database)
+
+        known_hash_filter = KnownHashFilterImpl(source=source, refresh_interval=0)
+        known_hash_filter.refresh()
+        self.assertFalse(known_hash_filter.might_contain("ab" * 32))
+
+        database.append("ab" * 32)
+        self.assertTrue(known_hash_filter.might_contain("ab" * 32))
+        # La primera lectura es completa; las siguientes, desde la anterior
+        self.assertIsNone(calls[0])
+        self.assertIsNotNone(calls[-1])
+
+    def test_refresh_is_rate_limited(self):
+        calls = []
+        known_hash_filter = KnownHashFilterImpl(source=lambda since: calls.append(since) or [], refresh_interval=3600)
+        known_hash_filter.refresh()
+        for _ in range(10):
+            self.assertFalse(known_hash_filter.might_contain("cd" * 32))
+        self.assertEqual(len(calls), 1)
+
+
+class CrossProcessDuplicateTest(unittest.TestCase):
+    """
+    Dos contenedores sobre la misma base de datos hacen de dos procesos
+    (API y CLI) con su propio filtro de hashes conocidos.
+    """
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.content = photo_bytes(5)
+        self.hash = hashlib.sha256(self.content).hexdigest()
+        self.first = isolated_container(self.work_dir.name)
+        self.second = isolated_container(self.work_dir.name)
+        # Los dos filtros se cargan antes de que exista la foto
+        self.first.known_hash_filter()
+        self.second.known_hash_filter()
+
+    def tearDown(self):
+        self.first.shutdown_resources()
+        self.second.shutdown_resources()
+        self.work_dir.cleanup()
+
+    def _save(self, container, seed: int):
+        session = container.session_factory()()
+        try:
+            process_photo = CallProcessPhoto(container)._build_process_photo(session)
+            return process_photo.save(self.content, self.hash, fake_analysis(seed))
+        finally:
+            session.close()
+
+    def _count_rows(self) -> int:
+        session = self.first.session_factory()()
+        try:
+            return list(PhotoRepositoryORM(session).get_all_hashes()).count(self.hash)
+        finally:
+            session.close()
+
+    def test_photo_imported_by_another_process_is_already_processed(self):
+        result, photo, error = self._save(self.first, seed=5)
+        self.assertTrue(result, error)
+
+        # El filtro del segundo proceso todavía no la conoce; la restricción única la rechaza
+        result, existing, error = self._save(self.second, seed=6)
+        self.assertFalse(result)
+        self.assertEqual(error, " foto ya procesada")
+        self.assertEqual(existing.id, photo.id)
+        self.assertEqual(self._count_rows(), 1)
+
+    def test_other_process_sees_the_photo_after_refreshing(self):
+        result, photo, error = self._save(self.first, seed=5)
+        self.assertTrue(result, error)
+
+        known_hash_filter = self.second.known_hash_filter()
+        known_hash_filter.refresh_interval = 0
+        self.assertTrue(known_hash_filter.might_contain(self.hash))
+        session = self.second.session_factory()()
+        try:
+            found = CallProcessPhoto(self.second)._build_process_photo(session).find_by_hash(self.hash)
+        finally:
+            session.close()
+        self.assertEqual(found.id, photo.id)
+
+    def test_photo_hash_is_unique(self):
+        indexes = inspect(self.first.engine()).get_indexes("photo")
+        self.assertTrue(any(index["column_names"] == ["hash"] and index["unique"] for index in indexes))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from app.domain.models.decoded_image import DecodedImage
+from app.infrastructure.services.micro_batch_embedding_service_imple import MicroBatchEmbeddingServiceImpl
+from tests.support import FakeEmbeddingService
+
+
+class RecordingEmbeddingService(FakeEmbeddingService):
+    """Apunta el tamaño de cada lote y puede quedarse bloqueado hasta `release`."""
+
+    def __init__(self, blocked: bool = False):
+        super().__init__()
+        self.batches = []
+        self.release = threading.Event()
+        if not blocked:
+            self.release.set()
+
+    def get_image_embeddings(self, images):
+        self.batches.append(len(images))
+        self.release.wait()
+        return super().get_image_embeddings(images)
+
+
+def _image(color: int) -> DecodedImage:
+    return DecodedImage(Image.new("RGB", (8, 8), (color, 0, 0)), "jpg", "image/jpeg")
+
+
+class MicroBatchEmbeddingServiceTest(unittest.TestCase):
+
+    def _service(self, model, **kwargs) -> MicroBatchEmbeddingServiceImpl:
+        service = MicroBatchEmbeddingServiceImpl(model, **kwargs)
+        self.addCleanup(service.close)
+        return service
+
+    def test_concurrent_requests_share_a_batch(self):
+        model = RecordingEmbeddingService()
+        service = self._service(model, batch_size=4, max_wait_ms=500)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(service.get_image_embedding, [_image(color) for color in range(4)]))
+
+        self.assertEqual(model.batches, [4])
+        expected = FakeEmbeddingService().get_image_embeddings([_image(color) for color in range(4)])[1]
+        self.assertEqual([embedding for _, embedding, _ in results], expected)
+
+    def test_single_request_is_flushed_after_max_wait(self):
+        model = RecordingEmbeddingService()
+        service = self._service(model, batch_size=32, max_wait_ms=20)
+        start = time.monotonic()
+        result, embedding, error = service.get_image_embedding(_image(1))
+        self.assertTrue(result, error)
+        self.assertEqual(model.batches, [1])
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_requests_after_close_are_rejected(self):
+        service = self._service(RecordingEmbeddingService())
+        service.close()
+        self.assertEqual(service.get_image_embedding(_image(1)), (False, None, MicroBatchEmbeddingServiceImpl.CLOSED_ERROR))
+
+    def test_model_errors_reach_every_request_of_the_batch(self):
+        service = self._service(FakeEmbeddingService(fail=True), max_wait_ms=1)
+        self.assertEqual(service.get_image_embedding(_image(1)), (False, None, "fallo simulado"))
+
+    def test_waiting_is_bounded(self):
+        model = RecordingEmbeddingService(blocked=True)
+        service = self._service(model, max_wait_ms=1, timeout=0.05)
+        self.assertEqual(service.get_image_embedding(_image(1))[:2], (False, None))
+        model.release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import dataclasses
+import hashlib
+import tempfile
+import unittest
+
+from app.application.use_cases.call_process_photo import CallProcessPhoto
+from app.config.container import _photo_score_threshold
+from app.infrastructure.db.models import Duplicate
+from tests.support import fake_analysis, isolated_container, photo_bytes
+
+
+class PhotoDuplicateThresholdTest(unittest.TestCase):
+    """
+    Solo cuenta como duplicado una foto cuyo embedding de CLIP supera
+    PHOTO_DUPLICATE_SIMILARITY; el vecino más cercano de una foto distinta no.
+    """
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.container = isolated_container(self.work_dir.name)
+        self.session = self.container.session_factory()()
+        self.process_photo = CallProcessPhoto(self.container)._build_process_photo(self.session)
+
+    def tearDown(self):
+        self.session.close()
+        self.container.shutdown_resources()
+        self.work_dir.cleanup()
+
+    def _save(self, seed: int, analysis=None):
+        content = photo_bytes(seed)
+        result, photo, error = self.process_photo.save(
+            content, hashlib.sha256(content).hexdigest(), analysis or fake_analysis(seed))
+        self.assertTrue(result, error)
+        return photo
+
+    def _search(self, seed: int):
+        query = self.container.embedding_service().get_image_embedding(fake_analysis(seed).preview)[1]
+        result, scored, error = self.container.photo_vector_repository().search_scored(query, top_k=10)
+        self.assertTrue(result, error)
+        return [id for id, _ in scored]
+
+    def test_distinct_photos_are_not_duplicates(self):
+        photos = [self._save(seed) for seed in range(5)]
+
+        self.assertEqual(self.session.query(Duplicate).count(), 0)
+        # Se guardan los cinco vectores y la búsqueda no aplica el umbral de duplicados
+        self.assertEqual(set(self._search(0)), {photo.id for photo in photos})
+
+    def test_same_image_in_another_file_is_a_duplicate(self):
+        original = self._save(1)
+        # Mismo contenido visual, otro archivo y otro pHash: solo CLIP lo reconoce
+        copy = self._save(2, dataclasses.replace(fake_analysis(1), phash="f" * 16))
+
+        duplicates = self.session.query(Duplicate).all()
+        self.assertEqual([(row.photo_id, row.duplicate_of_id) for row in duplicates], [(copy.id, original.id)])
+        self.assertEqual(self._search(1), [original.id])
+
+    def test_threshold_follows_the_collection_distance(self):
+        self.assertEqual(_photo_score_threshold("Cosine", 0.95), 0.95)
+        self.assertAlmostEqual(_photo_score_threshold("Euclid", 0.95), 0.1 ** 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
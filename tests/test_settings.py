@@ -0,0 +1,41 @@
+import os
+import unittest
+from unittest import mock
+
+from pydantic import ValidationError
+
+from app.config.settings import Settings
+
+
+class ThumbnailSettingsTest(unittest.TestCase):
+    """Las miniaturas se configuran con el formato de .env.example, no con JSON."""
+
+    def test_documented_env_format(self):
+        with mock.patch.dict(os.environ, {"THUMBNAIL_SIZES": "256:80,1024:85,2048:85", "THUMBNAIL_LAZY_SIZES": "2048"}):
+            settings = Settings()
+        self.assertEqual(settings.thumbnail_sizes, {256: 80, 1024: 85, 2048: 85})
+        self.assertEqual(settings.thumbnail_lazy_sizes, {2048})
+
+    def test_several_lazy_sizes_and_spaces(self):
+        with mock.patch.dict(os.environ, {"THUMBNAIL_SIZES": " 512:70 , 1024:80,", "THUMBNAIL_LAZY_SIZES": "512, 1024"}):
+            settings = Settings()
+        self.assertEqual(settings.thumbnail_sizes, {512: 70, 1024: 80})
+        self.assertEqual(settings.thumbnail_lazy_sizes, {512, 1024})
+
+    def test_no_lazy_sizes(self):
+        with mock.patch.dict(os.environ, {"THUMBNAIL_LAZY_SIZES": ""}):
+            self.assertEqual(Settings().thumbnail_lazy_sizes, set())
+
+    def test_values_passed_in_code(self):
+        settings = Settings(thumbnail_sizes={300: 75}, thumbnail_lazy_sizes={300})
+        self.assertEqual(settings.thumbnail_sizes, {300: 75})
+        self.assertEqual(settings.thumbnail_lazy_sizes, {300})
+
+    def test_size_without_quality_is_rejected(self):
+        with mock.patch.dict(os.environ, {"THUMBNAIL_SIZES": "256"}):
+            with self.assertRaises(ValidationError):
+                Settings()
+
+
+if __name__ == "__main__":
+    unittest.main()
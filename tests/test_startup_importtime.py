@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import unittest
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Librerías que solo deben cargarse cuando se usa la etapa que las necesita
+HEAVY_MODULES = {
+    "torch",
+    "sentence_transformers",
+    "fastembed",
+    "onnxruntime",
+    "face_recognition",
+    "dlib",
+    "sklearn",
+    "scipy",
+    "imagehash",
+    "pillow_heif",
+    "minio",
+    "qdrant_client",
+    "cv2",
+    "tqdm",
+}
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """
+    Importa `module` en un intérprete nuevo con `-X importtime` y devuelve el
+    tiempo acumulado en microsegundos de cada módulo importado.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class StartupImportTimeTest(unittest.TestCase):
+    """
+    Presupuesto de arranque de la API y de la CLI. Los límites se pueden
+    ajustar por entorno (STARTUP_BUDGET_API_MS, STARTUP_BUDGET_CLI_MS) en
+    máquinas lentas; la comprobación de librerías pesadas no depende de la máquina.
+    """
+
+    def assert_startup(self, module: str, budget_env: str, default_budget_ms: int):
+        times = import_times(module)
+
+        loaded = sorted(HEAVY_MODULES & set(times))
+        self.assertEqual(loaded, [], f"{module} importa librerías pesadas al arrancar")
+
+        budget_ms = int(os.getenv(budget_env, default_budget_ms))
+        elapsed_ms = times[module] / 1000
+        self.assertLess(elapsed_ms, budget_ms, f"{module} tarda {elapsed_ms:.0f} ms en importarse")
+
+    def test_api_startup(self):
+        self.assert_startup("app.api", "STARTUP_BUDGET_API_MS", 1500)
+
+    def test_cli_startup(self):
+        self.assert_startup("app.main_cli", "STARTUP_BUDGET_CLI_MS", 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
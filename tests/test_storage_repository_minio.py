@@ -0,0 +1,123 @@
+import io
+import threading
+import time
+import unittest
+
+from minio.error import S3Error
+
+from app.domain.models.storage_object import StorageObject
+from app.infrastructure.repositories import storage_repository_minio
+from app.infrastructure.repositories.storage_repository_minio import StorageRepositoryMinio
+
+
+def _s3_error(code: str) -> S3Error:
+    return S3Error(None, code, code, "recurso", "request", "host")
+
+
+class FakeMinio:
+    """Cliente de MinIO en memoria: `failing` falla al subir y `slow` tarda en subir."""
+
+    def __init__(self, existing=(), failing=(), slow=(), denied=(), barrier: threading.Barrier | None = None):
+        self.objects = {name: b"" for name in existing}
+        self.failing, self.slow, self.denied = set(failing), set(slow), set(denied)
+        self.barrier = barrier
+        self.buckets = set()
+        self.puts = []
+        self.lock = threading.Lock()
+
+    def bucket_exists(self, bucket_name):
+        return bucket_name in self.buckets
+
+    def make_bucket(self, bucket_name):
+        self.buckets.add(bucket_name)
+
+    def stat_object(self, bucket_name, object_name):
+        if object_name in self.denied:
+            raise _s3_error("AccessDenied")
+        if object_name not in self.objects:
+            raise _s3_error("NoSuchKey")
+        return object()
+
+    def put_object(self, bucket_name, object_name, data, length, content_type, part_size):
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        if object_name.split(".")[0] in self.slow:
+            time.sleep(0.05)
+        if object_name in self.failing:
+            raise _s3_error("InternalError")
+        with self.lock:
+            self.puts.append((object_name, length, content_type))
+            self.objects[object_name] = data.read()
+
+
+class StorageRepositoryMinioTest(unittest.TestCase):
+
+    def setUp(self):
+        storage_repository_minio._ready_buckets.clear()
+
+    def _repository(self, client: FakeMinio, upload_workers: int = 4) -> StorageRepositoryMinio:
+        repository = StorageRepositoryMinio(
+            endpoint="minio.test:9000", access_key="a", secret_key="b", bucket_name="fotos",
+            secure=False, upload_workers=upload_workers)
+        repository.client = client
+        self.addCleanup(lambda: repository._upload_pool and repository._upload_pool.shutdown())
+        return repository
+
+    def test_each_file_reports_its_own_result_in_order(self):
+        client = FakeMinio(existing={"thumb-a"}, failing={"roto"}, slow={"original"})
+        results = self._repository(client).upload_files([
+            StorageObject(b"original", "jpg", object_name="original.jpg"),
+            StorageObject(b"aleatorio", "jpg"),
+            StorageObject(b"miniatura", "webp", "image/webp", object_name="thumb-a", skip_if_exists=True),
+            StorageObject(b"miniatura", "webp", "image/webp", object_name="thumb-b", skip_if_exists=True),
+            StorageObject(b"roto", "webp", "image/webp", object_name="roto"),
+        ])
+
+        (ok, name, error, written), random_key, existing, new, failed = results
+        self.assertEqual((ok, name, error, written), (True, "original.jpg", "", True))
+        self.assertTrue(random_key[0] and random_key[3] and random_key[1].endswith(".jpg"))
+        self.assertEqual(existing, (True, "thumb-a", "", False))
+        self.assertEqual(new, (True, "thumb-b", "", True))
+        # Un fallo no cancela el resto: el que llama decide qué deshacer con `escrito`
+        self.assertEqual((failed[0], failed[1], failed[3]), (False, "", False))
+        self.assertIn("InternalError", failed[2])
+        self.assertEqual(client.objects[random_key[1]], b"aleatorio")
+        self.assertNotIn("thumb-a", [name for name, _, _ in client.puts])
+        self.assertEqual(client.buckets, {"fotos"})
+
+    def test_uploads_run_in_parallel(self):
+        files = [StorageObject(bytes([index]), "jpg", object_name=f"{index}.jpg") for index in range(3)]
+        client = FakeMinio(barrier=threading.Barrier(3))
+        results = self._repository(client, upload_workers=3).upload_files(files)
+        self.assertEqual(results, [(True, f"{index}.jpg", "", True) for index in range(3)])
+
+    def test_a_single_file_is_uploaded_without_the_pool(self):
+        repository = self._repository(FakeMinio())
+        self.assertEqual(repository.upload_files([StorageObject(b"x", "jpg", object_name="x.jpg")]),
+                         [(True, "x.jpg", "", True)])
+        self.assertIsNone(repository._upload_pool)
+
+    def test_errors_checking_existence_fail_only_that_file(self):
+        results = self._repository(FakeMinio(denied={"privada"})).upload_files([
+            StorageObject(b"x", "webp", object_name="privada", skip_if_exists=True),
+            StorageObject(b"y", "webp", object_name="publica", skip_if_exists=True),
+        ])
+        self.assertEqual((results[0][0], results[0][3]), (False, False))
+        self.assertIn("AccessDenied", results[0][2])
+        self.assertEqual(results[1], (True, "publica", "", True))
+
+    def test_stream_lengths(self):
+        client = FakeMinio()
+        repository = self._repository(client)
+        stream = io.BytesIO(b"0123456789")
+        stream.seek(4)
+        repository.upload_files([
+            StorageObject(b"abc", "jpg", object_name="bytes"),
+            StorageObject(stream, "jpg", object_name="stream"),
+        ])
+        self.assertEqual(sorted((name, length) for name, length, _ in client.puts), [("bytes", 3), ("stream", 6)])
+        self.assertEqual(client.objects["stream"], b"456789")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from sqlalchemy import Column, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.config.container import _enable_sqlite_savepoints
+from app.infrastructure.repositories.unit_of_work_orm import UnitOfWorkORM
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "row"
+    id = Column(String(8), primary_key=True)
+    value = Column(String(8), unique=True)
+
+
+class UnitOfWorkTest(unittest.TestCase):
+    """Cada foto de un lote va en su savepoint: si una falla, las demás se confirman."""
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        _enable_sqlite_savepoints(engine)
+        Base.metadata.create_all(engine)
+        self.session = Session(engine)
+        self.unit_of_work = UnitOfWorkORM(self.session)
+
+    def tearDown(self):
+        self.session.close()
+
+    def _insert(self, id: str, value: str):
+        self.session.add(Row(id=id, value=value))
+        self.session.flush()
+
+    def test_failed_flush_in_savepoint_keeps_the_batch(self):
+        undone = []
+        with self.unit_of_work:
+            self._insert("1", "a")
+            with self.assertRaises(Exception):
+                with self.unit_of_work as photo_unit_of_work:
+                    photo_unit_of_work.on_rollback(lambda: undone.append("2"))
+                    self._insert("2", "a")
+            self._insert("3", "c")
+        self.assertEqual(sorted(row.id for row in self.session.query(Row)), ["1", "3"])
+        self.assertEqual(undone, ["2"])
+
+    def test_outer_rollback_runs_callbacks_of_committed_savepoints(self):
+        undone = []
+        with self.assertRaises(RuntimeError):
+            with self.unit_of_work:
+                with self.unit_of_work as photo_unit_of_work:
+                    self._insert("1", "a")
+                    photo_unit_of_work.on_rollback(lambda: undone.append("1"))
+                raise RuntimeError("fallo del lote")
+        self.assertEqual(self.session.query(Row).count(), 0)
+        self.assertEqual(undone, ["1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from app import main_cli
+from app.infrastructure.repositories.vector_db_local import VectorDBLocal
+from tests.support import isolated_container
+
+
+def _vectors(count: int, size: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, size)).astype(np.float32)
+
+
+def _clustered(count: int, size: int = 16, centers: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    means = rng.standard_normal((centers, size))
+    return (means[rng.integers(0, centers, count)] + 0.2 * rng.standard_normal((count, size))).astype(np.float32)
+
+
+class VectorDBLocalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def _collection(self, **kwargs) -> VectorDBLocal:
+        return VectorDBLocal("vectors", kwargs.pop("vector_size", 16), self.work_dir.name, **kwargs)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.work_dir.name, "vectors", name)
+
+    def _add(self, collection: VectorDBLocal, vectors: np.ndarray, prefix: str = "v") -> list:
+        ids = [f"{prefix}{index}" for index in range(len(vectors))]
+        collection.add_vectors(vectors.tolist(), ids)
+        return ids
+
+    def test_writes_of_another_instance_are_replayed_from_the_journal(self):
+        writer, reader = self._collection(), self._collection()
+        vectors = _vectors(3)
+        ids = self._add(writer, vectors)
+
+        self.assertEqual(reader.search_ids(vectors[1].tolist(), top_k=1), (True, [ids[1]], ""))
+        reader.delete_by_id(ids[1])
+        self.assertNotIn(ids[1], writer.search_ids(vectors[1].tolist(), top_k=3)[1])
+
+        # Una línea a medio escribir no se aplica hasta que está completa
+        with open(self._file("ids.log"), "a", encoding="utf-8") as journal:
+            journal.write(f"0\t{ids[1]}")
+        self.assertNotIn(ids[1], reader.search_ids(vectors[0].tolist(), top_k=3)[1])
+        with open(self._file("ids.log"), "a", encoding="utf-8") as journal:
+            journal.write("\n")
+        self.assertEqual(reader.search_ids(vectors[0].tolist(), top_k=1)[1], [ids[1]])
+
+    def test_upsert_keeps_the_row_of_an_existing_id(self):
+        collection = self._collection()
+        vectors = _vectors(2)
+        collection.add_vectors([vectors[0].tolist()], ["a"])
+        collection.add_vectors([vectors[1].tolist()], ["a"])
+        self.assertEqual(collection.search_scored(vectors[1].tolist(), top_k=5)[1][0][0], "a")
+        self.assertEqual(len(collection.search_scored(vectors[1].tolist(), top_k=5)[1]), 1)
+
+    def test_deleted_rows_are_reused(self):
+        collection = self._collection()
+        vectors = _vectors(VectorDBLocal.GROWTH + 1)
+        ids = self._add(collection, vectors[:VectorDBLocal.GROWTH])
+        size = os.path.getsize(self._file("vectors.float32"))
+
+        collection.delete_many(ids[:1])
+        collection.add_vectors([vectors[-1].tolist()], ["new"])
+        self.assertEqual(os.path.getsize(self._file("vectors.float32")), size)
+        self.assertEqual(collection.search_ids(vectors[-1].tolist(), top_k=1)[1], ["new"])
+        self.assertEqual(self._collection().search_ids(vectors[1].tolist(), top_k=1)[1], [ids[1]])
+
+    def test_collection_is_compacted_when_most_entries_are_dead(self):
+        collection = self._collection()
+        other = self._collection()
+        vectors = _vectors(3 * VectorDBLocal.GROWTH)
+        ids = self._add(collection, vectors)
+        kept = list(range(0, len(ids), 10))
+        collection.delete_many([id for index, id in enumerate(ids) if index not in kept])
+
+        with open(self._file("ids.log"), encoding="utf-8") as journal:
+            lines = journal.read().splitlines()
+        self.assertTrue(lines[0].startswith("#"))
+        self.assertEqual(len(lines) - 1, len(kept))
+        self.assertEqual(os.path.getsize(self._file("vectors.float32")), VectorDBLocal.GROWTH * 16 * 4)
+        # Otro proceso abierto antes de compactar vuelve a leer el journal nuevo
+        for collection in (collection, other, self._collection()):
+            for index in kept[::25]:
+                self.assertEqual(collection.search_ids(vectors[index].tolist(), top_k=1)[1], [ids[index]])
+            self.assertEqual(len(collection.search_scored(vectors[0].tolist(), top_k=len(ids))[1]), len(kept))
+
+    def test_approximate_search_keeps_the_recall_of_the_exact_one(self):
+        vectors = _clustered(4000)
+        approximate = self._collection(approximate=True, approximate_min_size=1000, lists=32, probes=8)
+        self._add(approximate, vectors)
+        self.assertIsNotNone(approximate._centroids)
+        exact = self._collection()
+
+        queries = _clustered(50, seed=1)
+        found = approximate.search_many(queries.tolist())[1]
+        expected = exact.search_many(queries.tolist())[1]
+        recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, expected)])
+        self.assertGreaterEqual(recall, 0.9)
+
+    def test_searches_never_train_the_index(self):
+        writer = self._collection()
+        self._add(writer, _clustered(1200))
+        reader = self._collection(approximate=True, approximate_min_size=1000, lists=16)
+        with mock.patch.object(VectorDBLocal, "_train", side_effect=AssertionError("entrenamiento al buscar")):
+            self.assertTrue(reader.search_many(_clustered(5, seed=1).tolist())[0])
+            self.assertIsNone(reader._centroids)
+
+        reader.apply_collection_config()
+        with mock.patch.object(VectorDBLocal, "_train", side_effect=AssertionError("entrenamiento al buscar")):
+            # El índice guardado lo usan los demás procesos sin volver a entrenar
+            other = self._collection(approximate=True, approximate_min_size=1000, lists=16)
+            self.assertEqual(len(other._centroids), 16)
+            other.add_vectors([_clustered(1, seed=2)[0].tolist()], ["new"])
+            self.assertEqual(reader.search_ids(_clustered(1, seed=2)[0].tolist(), top_k=1)[1], ["new"])
+
+    def test_migrate_compacts_and_indexes_local_collections(self):
+        container = isolated_container(
+            self.work_dir.name, vector_approximate=True, vector_approximate_min_size=100_000, vector_ivf_lists=4)
+        self.addCleanup(container.shutdown_resources)
+        repository = container.photo_vector_repository()
+        vectors = _vectors(200, size=repository.vector_size)
+        ids = self._add(repository, vectors)
+        repository.delete_many(ids[100:])
+        repository.approximate_min_size = 50
+
+        with mock.patch("app.config.container.get_container", return_value=container), \
+                mock.patch("app.config.container.shutdown"):
+            main_cli.vectors_main("migrate", "photo_vectors")
+        journal_path = os.path.join(repository.path, "ids.log")
+        with open(journal_path, encoding="utf-8") as journal:
+            self.assertEqual(len(journal.read().splitlines()), 101)
+        self.assertEqual(len(repository._centroids), 4)
+        self.assertEqual(repository.search_ids(vectors[7].tolist(), top_k=1)[1], [ids[7]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import math
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+from app.config.container import _face_score_threshold, _photo_score_threshold
+from app.config.settings import Settings
+from app.infrastructure.repositories.vector_db_qdrant import QdrantCollectionConfig, VectorDBQdrant
+from tests.support import isolated_container
+
+
+class QdrantCollectionConfigTest(unittest.TestCase):
+
+    def test_settings_are_mapped_to_the_collection(self):
+        config = QdrantCollectionConfig.from_settings(Settings(
+            qdrant_quantization="scalar",
+            qdrant_quantization_quantile=0.95,
+            qdrant_quantization_always_ram=False,
+            qdrant_on_disk=True,
+            qdrant_rescore=False,
+            qdrant_oversampling=3.0,
+            qdrant_hnsw_m=32,
+            qdrant_hnsw_ef_construct=200,
+            qdrant_hnsw_ef=96,
+            qdrant_hnsw_on_disk=True,
+            qdrant_indexing_threshold=5000,
+            qdrant_memmap_threshold=20000))
+        self.assertEqual(config, QdrantCollectionConfig(
+            quantization="scalar", quantile=0.95, always_ram=False, on_disk=True, rescore=False,
+            oversampling=3.0, hnsw_m=32, hnsw_ef_construct=200, hnsw_ef=96, hnsw_on_disk=True,
+            indexing_threshold=5000, memmap_threshold=20000))
+
+        self.assertEqual(config.quantization_config(), models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=0.95, always_ram=False)))
+        self.assertEqual(config.hnsw_config(), models.HnswConfigDiff(m=32, ef_construct=200, on_disk=True))
+        self.assertEqual(config.optimizers_config(),
+                         models.OptimizersConfigDiff(indexing_threshold=5000, memmap_threshold=20000))
+        self.assertEqual(config.search_params(), models.SearchParams(
+            hnsw_ef=96, exact=False, quantization=models.QuantizationSearchParams(rescore=False, oversampling=3.0)))
+
+    def test_zero_keeps_the_qdrant_default(self):
+        config = QdrantCollectionConfig()
+        self.assertIsNone(config.quantization_config())
+        self.assertEqual(config.hnsw_config(), models.HnswConfigDiff(on_disk=False))
+        self.assertEqual(config.optimizers_config(), models.OptimizersConfigDiff())
+        self.assertEqual(config.search_params(), models.SearchParams(exact=False))
+
+    def test_binary_quantization_and_search_overrides(self):
+        config = QdrantCollectionConfig(quantization="binary", always_ram=True, hnsw_ef=64)
+        self.assertEqual(config.quantization_config(),
+                         models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True)))
+        params = config.search_params(hnsw_ef=128, rescore=False, exact=True)
+        self.assertEqual((params.hnsw_ef, params.exact, params.quantization.rescore), (128, True, False))
+
+    def test_unknown_quantization_is_rejected(self):
+        with self.assertRaises(ValueError):
+            QdrantCollectionConfig(quantization="pq").quantization_config()
+
+    def test_collection_is_created_and_migrated_with_the_config(self):
+        client = mock.Mock(spec=QdrantClient)
+        client.collection_exists.return_value = False
+        config = QdrantCollectionConfig(quantization="scalar", on_disk=True, hnsw_m=16)
+        repository = VectorDBQdrant("photos", 4, distance="Dot", collection_config=config, client=client)
+
+        kwargs = client.create_collection.call_args.kwargs
+        self.assertEqual(kwargs["vectors_config"], models.VectorParams(size=4, distance="Dot", on_disk=True))
+        self.assertEqual(kwargs["hnsw_config"], config.hnsw_config())
+        self.assertEqual(kwargs["quantization_config"], config.quantization_config())
+        self.assertEqual(kwargs["optimizers_config"], config.optimizers_config())
+
+        # Sin cuantización, migrate la desactiva explícitamente en la colección existente
+        repository.collection_config = QdrantCollectionConfig(on_disk=False)
+        repository.apply_collection_config()
+        kwargs = client.update_collection.call_args.kwargs
+        self.assertEqual(kwargs["quantization_config"], models.Disabled.DISABLED)
+        self.assertEqual(kwargs["vectors_config"], {"": models.VectorParamsDiff(on_disk=False)})
+
+
+class ScoreThresholdTest(unittest.TestCase):
+
+    def test_face_tolerance_becomes_a_cosine_threshold(self):
+        self.assertAlmostEqual(_face_score_threshold("Cosine", 0.6), 1 - 0.6 ** 2 / 2)
+        self.assertAlmostEqual(_face_score_threshold("Dot", 0.6), 0.82)
+        self.assertEqual(_face_score_threshold("Euclid", 0.6), 0.6)
+        # Dos vectores unitarios justo a la tolerancia tienen justo esa similitud
+        first = np.array([1.0, 0.0])
+        angle = 2 * math.asin(0.6 / 2)
+        second = np.array([math.cos(angle), math.sin(angle)])
+        self.assertAlmostEqual(np.linalg.norm(first - second), 0.6)
+        self.assertAlmostEqual(float(first @ second), _face_score_threshold("Cosine", 0.6))
+
+    def test_photo_similarity_becomes_a_distance_with_euclid(self):
+        self.assertEqual(_photo_score_threshold("Cosine", 0.95), 0.95)
+        self.assertAlmostEqual(_photo_score_threshold("Euclid", 0.95), math.sqrt(0.1))
+        self.assertEqual(_photo_score_threshold("Euclid", 1.2), 0.0)
+
+    def test_container_passes_the_thresholds(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            container = isolated_container(work_dir, distance="Euclid", face_recognition_tolerance=0.5)
+            try:
+                self.assertEqual(container.face_score_threshold(), 0.5)
+                self.assertEqual(container.people_vector_repository().score_threshold, 0.5)
+                self.assertAlmostEqual(container.photo_vector_repository().score_threshold, math.sqrt(0.1))
+            finally:
+                container.shutdown_resources()
+
+
+class VectorDBQdrantTest(unittest.TestCase):
+    """Contra el modo local (en memoria) de qdrant_client, sin servidor."""
+
+    def setUp(self):
+        self.client = QdrantClient(":memory:")
+        self.addCleanup(self.client.close)
+        self.ids = [str(uuid.uuid4()) for _ in range(3)]
+        angles = [0.0, 0.5, 1.5]
+        self.vectors = [[math.cos(angle), math.sin(angle), 0.0] for angle in angles]
+
+    def _repository(self, **kwargs) -> VectorDBQdrant:
+        repository = VectorDBQdrant("faces", 3, client=self.client, **kwargs)
+        repository.add_vectors(self.vectors, self.ids)
+        return repository
+
+    def test_threshold_filters_matches_but_not_the_ranking(self):
+        repository = self._repository(score_threshold=0.8)
+        self.assertEqual(repository.search_many([self.vectors[0]]), (True, [self.ids[:2]], ""))
+        result, scored, error = repository.search_scored(self.vectors[0], top_k=3)
+        self.assertTrue(result, error)
+        self.assertEqual([id for id, _ in scored], self.ids)
+        self.assertAlmostEqual(scored[1][1], math.cos(0.5), places=5)
+
+    def test_batch_search_and_delete(self):
+        repository = self._repository()
+        result, ids, error = repository.search_many([self.vectors[2], self.vectors[0]], top_k=1)
+        self.assertTrue(result, error)
+        self.assertEqual(ids, [[self.ids[2]], [self.ids[0]]])
+
+        repository.delete_many(self.ids[:2])
+        self.assertEqual(repository.search_ids(self.vectors[0], top_k=3), (True, [self.ids[2]], ""))
+        self.assertEqual(repository.search_scored(self.vectors[0], top_k=1, offset=1), (True, [], ""))
+
+
+if __name__ == "__main__":
+    unittest.main()